@@ -1,19 +1,40 @@
 # app.py
-import jwt
 import socketio
 from textwrap import dedent
 import datetime
-from fastapi import FastAPI, Query
-from fastapi.responses import HTMLResponse, PlainTextResponse
-import json
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import HTMLResponse, PlainTextResponse, Response
 from pydantic import BaseModel
 import random
 from loguru import logger
-import sys
+import os
+import asyncio
+import functools
+import heapq
+from contextlib import asynccontextmanager
 from pydantic import BaseModel, Field, ValidationError
 from typing import Annotated
 from decimal import Decimal
 
+from loop_lag import LoopLagMonitor
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, Metrics, instrument
+from profiler import SamplingProfiler
+from logging_setup import LogSampler, configure_logging, get_level, set_level
+from batch_validation import BatchValidator
+from assets import AssetCache, etag_matches
+from chat_batch import ChatBatcher
+from client_index import ClientIndex
+from ndjson_ingest import NDJSON_MEDIA_TYPE, DuplexStreamingResponse, ingest
+from outbound import OutboundPolicy, install as install_outbound, queue_of
+from auth import MAX_TOKEN_TTL, TOKEN_TTL, create_jwt, decode_jwt
+from presence import PresenceAggregator
+from rate_limit import RateLimiter, parse_rules
+from registry import ConnectionRegistry
+from session_cache import SessionCache
+from state_backend import create_backend
+from visits import VisitAggregator
+from wire import create_server
+
 
 class TrainTicket(BaseModel):
     train: Annotated[str, Field(description="Номер поезда")]
@@ -61,26 +82,38 @@ class Order(BaseModel):
     total_price: Annotated[float | Decimal, Field(gt=0, description="Общая стоимость заказа")]
 
 
-SECRET_KEY = "supersecret"  # демо-ключ, в проде храни в ENV
-ALGO = "HS256"
+# === Пакетные create_*: TypeAdapter(list[Model]) собирается один раз ===
+MAX_BATCH = int(os.environ.get("MAX_BATCH", "10000"))
+batch_validators = {
+    "products": BatchValidator(Product, max_items=MAX_BATCH),
+    "transfers": BatchValidator(Transfers, max_items=MAX_BATCH),
+    "orders": BatchValidator(Order, max_items=MAX_BATCH),
+}
 
 
-# Настройка logger'а Loguru для вывода логов в консоль и файл
-loguru_format = "<green>{time}</green> <level>{level}</level> {message}"
-logger.remove()
-logger.add(sys.stdout, colorize=True, level="DEBUG", format=loguru_format)
-logger.add("logs.log", level="DEBUG", format=loguru_format, rotation="10 MB")
+# JWT: SECRET_KEY/ALGO, create_jwt и decode_jwt с кэшем проверенных токенов — в auth.py
 
 
-# === Модуль 2.2, Практика 2: учёт неизвестных событий ===
-lost_queries = {"lost": 0}
+# Настройка logger'а Loguru для вывода логов в консоль и файл
+# (очередь + фоновая запись, уровень меняется через /admin/logging)
+configure_logging(os.environ.get("LOG_LEVEL", "INFO"))
+
+# Сэмплирование горячих событий: LOG_SAMPLE_MESSAGE=100 — логировать 1 из 100
+log_sampler = LogSampler({
+    "message": int(os.environ.get("LOG_SAMPLE_MESSAGE", "100")),
+    "create": int(os.environ.get("LOG_SAMPLE_CREATE", "1")),
+})
 
-# === Модуль 2.2, Практика 3: счётчик per-sid ===
-scores = {}
 
 # === Модуль 2.2 + 2.3: список клиентов, статус сервера, учёт времени сессий ===
-clients: list[str] = []
-sessions: dict[str, datetime.datetime] = {}
+# Одна запись на соединение: user_id, время подключения, цветная комната,
+# счёт (Модуль 2.2, Практика 3) и комнаты; плюс индекс user_id -> {sid}
+registry = ConnectionRegistry()
+
+# ====== Общее состояние: онлайн, комнаты, счётчики ======
+# memory — один процесс, MemoryBackend ведёт тот же registry (одна запись на sid);
+# unix — несколько воркеров через state_backend.StateStore
+backend, client_manager = create_backend(registry)
 
 server_status = {
     0: "Сервер пуст",        # Модуль 2.3, Задание 4 — статус сервера
@@ -89,23 +122,191 @@ server_status = {
 }
 
 # === Модуль 3.1, Практика 2–3: управление комнатами ===
-rooms: dict[str, set[str]] = {}
+# Сами комнаты — в backend (RoomFeed); клиенты получают снимок
+# по subscribe_rooms, дальше — только room_delta
+ROOMS_FEED = "rooms_feed"
+
+# подписчики потокового приёма /ingest/{kind}: комната на каждый kind
+INGEST_ROOMS = {kind: f"ingest:{kind}" for kind in ("products", "transfers", "orders")}
 
 # === Модуль 3.1, Задание 4: цветные комнаты red/green/blue ===
-rooms_color = {
-    "red": set(),
-    "green": set(),
-    "blue": set(),
-}
-sid_to_room_color: dict[str, str] = {}
+COLOR_ROOMS = ("red", "green", "blue")
+
+# ====== Онлайн: не чаще одной рассылки за PRESENCE_INTERVAL секунд ======
+PRESENCE_ROOM = "presence"
+
+# служебные комнаты переживают join_room
+SERVICE_ROOMS = {ROOMS_FEED, PRESENCE_ROOM, *INGEST_ROOMS.values()}
+
+
+# Значение общее для всех воркеров (poll при общем бэкенде), поэтому каждый
+# шлёт только своим клиентам: через шину UnixSocketManager клиент получил бы
+# по кадру от каждого воркера
+async def publish_online(value: int) -> None:
+    await sio.emit("message", {"online": value}, room=PRESENCE_ROOM, ignore_queue=True)
+
+
+presence = PresenceAggregator(
+    count=backend.count_connections,
+    publish=publish_online,
+    interval=float(os.environ.get("PRESENCE_INTERVAL", "0.25")),
+    # чужие воркеры не помечают наш счётчик — опрашиваем каждый тик
+    poll=backend.shared,
+)
+
+# ====== GET /: список клиентов страницами, заходы — одной рассылкой ======
+INDEX_PAGE_SIZE = int(os.environ.get("INDEX_PAGE_SIZE", "100"))
+INDEX_MAX_PAGE = 1000
+client_index = ClientIndex(
+    backend.sids,
+    ttl=float(os.environ.get("INDEX_CACHE_TTL", "1")),
+)
+
+
+async def publish_visits(count: int, interval: float) -> None:
+    await sio.emit("message", {
+        "text": f"{count} visits over http in the last {interval:g}s",
+        "visits": count,
+    }, ignore_queue=True)
+
+
+visits = VisitAggregator(
+    publish_visits,
+    interval=float(os.environ.get("VISIT_INTERVAL", "5")),
+    # заходы всех воркеров — в общем счётчике, каждый рассылает его прирост своим
+    shared=functools.partial(backend.incr, "visits") if backend.shared else None,
+)
 
 # ====== (ASGI) ======
-sio = socketio.AsyncServer(
+# WIRE_FORMAT=json | msgpack | negotiate — см. wire.py
+sio = create_server(
     async_mode="asgi",
     cors_allowed_origins="*",
+    client_manager=client_manager,
+)
+
+# ====== Исходящие очереди: у медленного клиента хвост не растёт без предела ======
+def outbound_key(event: str, data) -> str:
+    """
+    Ключ политики очереди: онлайн-счётчик ходит событием message, но это
+    состояние, а не чат.
+    """
+    if event == "message" and isinstance(data, dict) and "online" in data:
+        return "online"
+    return event
+
+
+outbound_policy = OutboundPolicy(
+    high_water=int(os.environ.get("OUTBOUND_HIGH_WATER", "256")),
+    backlog=int(os.environ.get("OUTBOUND_BACKLOG", "16")),
+    latest={"update", "online", "users", "score"},
+    disconnect={"message", "messages", "chat"},
+    key=outbound_key,
+    peek={"message"},
 )
+install_outbound(sio, outbound_policy)
+_evictions: set[asyncio.Task] = set()
+
+
+def evict_slow_consumer(sid: str) -> None:
+    """
+    Чат не поместился в очередь клиента — отключаем его.
+    """
+    logger.warning("sid={} не успевает читать чат, отключаем", sid)
+    task = asyncio.get_running_loop().create_task(sio.disconnect(sid))
+    _evictions.add(task)
+    task.add_done_callback(_evictions.discard)
+
+
+# ====== Ограничение частоты событий: token bucket на sid и на пользователя ======
+# событие -> {"sid": [токенов/с, ёмкость], "user": [...]}; RATE_LIMITS (JSON)
+# заменяет набор целиком, RATE_LIMITS='{}' отключает ограничения
+DEFAULT_RATE_LIMITS = {
+    "message": {"sid": [10, 20], "user": [20, 40]},
+    "increase_score": {"sid": [20, 40]},
+    "decrese_score": {"sid": [20, 40]},
+    "join_room": {"sid": [2, 5], "user": [5, 10]},
+    "leave_room": {"sid": [2, 5], "user": [5, 10]},
+    "create_product": {"sid": [20, 40], "user": [50, 100]},
+    "create_transfer": {"sid": [20, 40], "user": [50, 100]},
+    "create_order": {"sid": [20, 40], "user": [50, 100]},
+    "create_products": {"sid": [1, 3], "user": [2, 5]},
+    "create_transfers": {"sid": [1, 3], "user": [2, 5]},
+    "create_orders": {"sid": [1, 3], "user": [2, 5]},
+    # снимок комнат целиком — самые тяжёлые ответы
+    "subscribe_rooms": {"sid": [1, 5], "user": [2, 10]},
+    "resync_rooms": {"sid": [1, 5], "user": [2, 10]},
+    "presence_updates": {"sid": [2, 5]},
+    "subscribe_ingest": {"sid": [2, 5]},
+    "profile": {"sid": [5, 10]},
+}
+rate_limiter = RateLimiter(
+    parse_rules(os.environ.get("RATE_LIMITS") or DEFAULT_RATE_LIMITS)
+)
+# reject — ответить rate_limited (один раз, пока корзина пуста); drop — молча
+RATE_LIMIT_MODE = os.environ.get("RATE_LIMIT_MODE", "reject").lower()
+# столько отказов подряд — и клиент отключается (0 — никогда): отклонённое
+# событие всё равно стоит разбора пакета, бесконечный флуд дешевле оборвать
+RATE_LIMIT_DISCONNECT = int(os.environ.get("RATE_LIMIT_DISCONNECT", "500"))
+
+# ====== Сессии сокетов: читаются из памяти, в sio.save_session — отложенно ======
+sessions = SessionCache(
+    sio=sio,
+    registry=registry,
+    flush_interval=float(os.environ.get("SESSION_FLUSH_INTERVAL", "5")),
+)
+
+
+# ====== Чат пачками: CHAT_BATCH_WINDOW секунд на комнату (0 — сразу) ======
+CHAT_BATCH_WINDOW = float(os.environ.get("CHAT_BATCH_WINDOW", "0"))
+
+
+async def publish_chat_batch(room: str, items: list[dict]) -> None:
+    await sio.emit("messages", {"room": room, "messages": items}, room=room)
+
+
+chat_batcher = (
+    ChatBatcher(publish_chat_batch, window=CHAT_BATCH_WINDOW)
+    if CHAT_BATCH_WINDOW > 0 else None
+)
+
+
+# ====== Задержка цикла событий (для нагрузочных прогонов и мониторинга) ======
+loop_lag = LoopLagMonitor(interval=float(os.environ.get("LOOP_LAG_INTERVAL", "0.1")))
+
+
+# ====== Метрики для Prometheus: GET /metrics ======
+metrics = Metrics()  # обработчики оборачивает instrument в конце модуля
+
+
+async def count_rooms() -> int:
+    return len((await backend.rooms_snapshot())["rooms"])
+
+
+metrics.gauge("connections", "Соединения этого процесса", lambda: len(registry))
+metrics.gauge("users", "Уникальные пользователи этого процесса", registry.count_users)
+metrics.gauge("rooms", "Комнаты (общие для всех воркеров)", count_rooms)
+metrics.counter("lost_queries_total", "События без обработчика", lambda: backend.counter("lost"))
 
-fastapi_app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    presence.start()
+    visits.start()
+    sessions.start()
+    loop_lag.start()
+    yield
+    await loop_lag.stop()
+    await presence.stop()
+    await visits.stop()
+    if chat_batcher is not None:
+        await chat_batcher.close()
+    await sessions.stop()
+    await backend.close()
+    await logger.complete()
+
+
+fastapi_app = FastAPI(lifespan=lifespan)
 
 # ====== HTML для теста (для всех практик, где нужен фронт) ======
 SOCKET_TEST_HTML = dedent("""
@@ -234,13 +435,39 @@ SOCKET_TEST_HTML = dedent("""
         });
 
         // ===== СЛУШАЕМ СОБЫТИЯ =====
-        socket.on("connect", () => log("connected: " + socket.id));
+        socket.on("connect", () => {
+          log("connected: " + socket.id);
+          socket.emit("subscribe_rooms");
+        });
         socket.on("disconnect", (reason) => log("disconnected: " + reason));
         socket.on("connect_error", (err) => log("⚠ connect_error: " + err.message));
 
         socket.on("message",  (data) => log("message: "  + JSON.stringify(data)));
+        // CHAT_BATCH_WINDOW > 0: чат приходит пачками, свои сообщения пропускаем
+        socket.on("messages", (data) => {
+          for (const m of data.messages) {
+            if (m.sid !== socket.id) log("message: " + JSON.stringify({ text: m.text }));
+          }
+        });
         socket.on("users",    (data) => log("users: "    + JSON.stringify(data)));
         socket.on("update",   (data) => log("update: "   + JSON.stringify(data)));
+
+        // лента комнат: снимок + дельты, при пропуске версии — resync
+        let roomsVersion = null;
+        socket.on("rooms_snapshot", (data) => {
+          roomsVersion = data.version;
+          log("rooms_snapshot: " + JSON.stringify(data));
+        });
+        socket.on("room_delta", (data) => {
+          for (const change of data.changes) {
+            if (roomsVersion !== null && change.version !== roomsVersion + 1) {
+              socket.emit("resync_rooms", { since: roomsVersion });
+              return;
+            }
+            roomsVersion = change.version;
+          }
+          log("room_delta: " + JSON.stringify(data));
+        });
         socket.on("queries",  (data) => log("queries: "  + JSON.stringify(data)));
         socket.on("score",    (data) => log("score: "    + JSON.stringify(data)));
         socket.on("profile",  (data) => log("profile: "  + JSON.stringify(data)));
@@ -383,50 +610,166 @@ SOCKET_TEST_HTML = dedent("""
 
 # === Модуль 2.5, Практика 1–2: HTTP главная страница + нотификация message ===
 @fastapi_app.get("/", response_class=PlainTextResponse)
-async def index():
-    # Практика 2: при обращении к главной странице слать всем message {"text": "..."}
-    await sio.emit("message", {"text": "someone visited over http"})
-    # Практика 1: вывод списка активных клиентов по HTTP
-    return json.dumps(clients, ensure_ascii=False)
+async def index(
+    request: Request,
+    offset: int = Query(default=0, ge=0),
+    limit: int = Query(default=INDEX_PAGE_SIZE, ge=1, le=INDEX_MAX_PAGE),
+):
+    # Практика 2: о заходах всем приходит message — одна рассылка за
+    # VISIT_INTERVAL секунд, а не на каждый запрос
+    visits.hit()
+    # Практика 1: вывод списка активных клиентов по HTTP — страницами
+    # из снимка на INDEX_CACHE_TTL секунд, с ETag/304
+    page = await client_index.page(offset, limit)
+    headers = {"ETag": page.etag, "X-Total-Count": str(page.total)}
+    if etag_matches(request.headers.get("if-none-match"), page.etag):
+        return Response(status_code=304, headers=headers)
+    return PlainTextResponse(page.body, headers=headers)
+
+
+@fastapi_app.get("/healthz", response_class=PlainTextResponse)
+async def healthz():
+    """
+    Проверка живости для балансировщика: без общего состояния и рассылок.
+    """
+    return "ok"
+
+
+# страница собирается один раз и отдаётся из памяти сжатой, с ETag/304
+assets = AssetCache()
+test_page_asset = assets.add_text("/test", SOCKET_TEST_HTML)
 
 
 @fastapi_app.get("/test", response_class=HTMLResponse)
-async def test_page(user: str = Query(default="alice")):
+async def test_page(request: Request, user: str = Query(default="alice")):
     """
     Тестовая страница для проверки Socket.IO-подключения и JWT-аутентификации.
     """
-    return SOCKET_TEST_HTML
+    return assets.response(test_page_asset, request)
 
 
 
-# ====== JWT helpers ======
-def create_jwt(sub: str) -> str:
+# === Endpoint для выдачи демо-JWT (поддержка всех практик с авторизацией) ===
+@fastapi_app.get("/token", response_class=PlainTextResponse)
+async def issue_token(
+    sub: str = Query(..., description="User identifier"),
+    ttl: int = Query(default=TOKEN_TTL, gt=0, le=MAX_TOKEN_TTL, description="Token lifetime, seconds"),
+):
     """
-    Создать JWT-токен для указанного пользователя.
+    Endpoint для выдачи демо-JWT по идентификатору пользователя.
     """
-    token = jwt.encode({"sub": sub}, SECRET_KEY, algorithm=ALGO)
-    if isinstance(token, bytes):
-        token = token.decode("utf-8")
-    return token
+    return create_jwt(sub, ttl)
+
+
+# === Управление логированием на лету ===
+class LoggingConfigIn(BaseModel):
+    level: str | None = None
+    sample: dict[str, Annotated[int, Field(ge=0)]] | None = None
 
 
-def decode_jwt(token: str):
+@fastapi_app.get("/admin/logging")
+async def logging_config():
     """
-    Проверить JWT-токен и вернуть payload, либо None, если токен невалиден.
+    Текущий уровень логов и частоты сэмплирования событий.
     """
-    try:
-        return jwt.decode(token, SECRET_KEY, algorithms=[ALGO])
-    except jwt.InvalidTokenError:
-        return None
+    return {"level": get_level(), "sample": log_sampler.rates}
 
 
-# === Endpoint для выдачи демо-JWT (поддержка всех практик с авторизацией) ===
-@fastapi_app.get("/token", response_class=PlainTextResponse)
-async def issue_token(sub: str = Query(..., description="User identifier")):
+@fastapi_app.put("/admin/logging")
+async def update_logging_config(payload: LoggingConfigIn):
     """
-    Endpoint для выдачи демо-JWT по идентификатору пользователя.
+    Сменить уровень логов ({"level": "DEBUG"}) и/или сэмплирование
+    ({"sample": {"message": 10}}) без перезапуска.
+    """
+    if payload.level is not None:
+        try:
+            await set_level(payload.level)
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+    for event, rate in (payload.sample or {}).items():
+        log_sampler.set_rate(event, rate)
+    return {"level": get_level(), "sample": log_sampler.rates}
+
+
+# === Ограничение частоты событий: правила и счётчики ===
+@fastapi_app.get("/admin/rate_limits")
+async def rate_limits():
+    """
+    Правила rate limiting и счётчики пропущенных/отклонённых событий.
     """
-    return create_jwt(sub)
+    return {"mode": RATE_LIMIT_MODE, **rate_limiter.stats()}
+
+
+# === Задержка цикла событий ===
+@fastapi_app.get("/admin/loop_lag")
+async def loop_lag_stats(reset: bool = Query(default=False, description="Reset after reading")):
+    """
+    p50/p99/max задержки цикла событий с последнего сброса.
+    """
+    stats = loop_lag.stats()
+    if reset:
+        loop_lag.reset()
+    return stats
+
+
+# === Исходящие очереди: глубина по соединениям ===
+@fastapi_app.get("/admin/outbound")
+async def outbound_queues(limit: int = Query(default=20, ge=1, le=1000)):
+    """
+    Глубина исходящих очередей: сумма и limit самых глубоких соединений.
+    """
+    conns = [conn for conn in registry if conn.outbox is not None]
+    deepest = heapq.nlargest(limit, conns, key=lambda conn: conn.outbox.qsize())
+    return {
+        "high_water": outbound_policy.high_water,
+        "backlog": outbound_policy.backlog,
+        "connections": len(conns),
+        "total_depth": sum(conn.outbox.qsize() for conn in conns),
+        "deepest": [
+            {
+                "sid": conn.sid,
+                "user_id": conn.user_id,
+                "depth": conn.outbox.qsize(),
+                "coalesced": conn.outbox.coalesced,
+                "dropped": conn.outbox.dropped,
+            }
+            for conn in deepest
+        ],
+    }
+
+
+# === Метрики в формате Prometheus ===
+@fastapi_app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    """
+    Гистограммы обработчиков, исходящие кадры/байты по событиям, соединения и комнаты.
+    """
+    return PlainTextResponse(await metrics.render(), media_type=METRICS_CONTENT_TYPE)
+
+
+# === Профилирование по требованию: collapsed stacks для flame graph ===
+profiling = asyncio.Lock()
+
+
+@fastapi_app.get("/admin/profile", response_class=PlainTextResponse)
+async def admin_profile(
+    seconds: float = Query(default=10, gt=0, le=120, description="Profiling duration"),
+    interval: float = Query(default=0.005, ge=0.001, le=1, description="Sampling interval"),
+):
+    """
+    Снимать стек цикла событий seconds секунд и вернуть collapsed stacks
+    (flamegraph.pl, speedscope). Одновременно — один прогон.
+    """
+    if profiling.locked():
+        raise HTTPException(status_code=409, detail="Profiling already in progress")
+    async with profiling:
+        profiler = SamplingProfiler(interval=interval)
+        profiler.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            profiler.stop()
+    return profiler.collapsed()
 
 
 # === Модуль 2.5, Практика 3: трансляция по HTTP POST /broadcast ===
@@ -439,39 +782,46 @@ async def broadcast(payload: BroadcastIn):
     await sio.emit("message", {"text": payload.message})
 
 
-# обернуть FastAPI в Socket.IO-приложение
-app = socketio.ASGIApp(sio, other_asgi_app=fastapi_app)
-
-# ====== Хранилище состояния (общая инфраструктура) ======
-online_sids: set[str] = set()          # все активные соединения (по вкладкам)
-user_to_sids: dict[str, set[str]] = {} # user_id -> множество sid
+# === Потоковый приём NDJSON: /ingest/products|transfers|orders ===
+INGEST_CHUNK_LINES = int(os.environ.get("INGEST_CHUNK_LINES", "1000"))
+INGEST_MAX_LINE = int(os.environ.get("INGEST_MAX_LINE", str(64 * 1024)))
 
 
-def add_user_sid(user_id: str, sid: str) -> None:
-    """
-    Зарегистрировать новое соединение sid для пользователя user_id.
+@fastapi_app.post("/ingest/{kind}")
+async def ingest_ndjson(
+    kind: str,
+    request: Request,
+    notify: bool = Query(default=False, description="Notify ingest subscribers"),
+):
     """
-    online_sids.add(sid)
-    user_to_sids.setdefault(user_id, set()).add(sid)
-
+    Принять NDJSON (один объект на строку) и валидировать его пачками
+    по INGEST_CHUNK_LINES строк, не держа тело целиком в памяти.
+    В ответ — NDJSON с ошибками по строкам и итогом каждой пачки.
 
-def remove_sid(sid: str) -> None:
+    notify=true — принятые объекты пачки рассылаются подписчикам
+    (subscribe_ingest) одним событием "ingested".
     """
-    Удалить соединение sid и почистить привязку к пользователю, если нужно.
-    """
-    online_sids.discard(sid)
-    for uid, sids in list(user_to_sids.items()):
-        if sid in sids:
-            sids.discard(sid)
-            if not sids:
-                user_to_sids.pop(uid, None)
+    validator = batch_validators.get(kind)
+    if validator is None:
+        raise HTTPException(status_code=404, detail=f"Unknown kind {kind!r}")
+
+    async def publish(items: list[dict]) -> None:
+        await sio.emit("ingested", {"kind": kind, "items": items}, room=INGEST_ROOMS[kind])
+
+    return DuplexStreamingResponse(
+        ingest(
+            request.stream(),
+            validator,
+            on_accepted=publish if notify else None,
+            chunk_lines=INGEST_CHUNK_LINES,
+            max_line=INGEST_MAX_LINE,
+        ),
+        media_type=NDJSON_MEDIA_TYPE,
+    )
 
 
-def count_unique_users() -> int:
-    """
-    Количество уникальных пользователей онлайн.
-    """
-    return len(user_to_sids)
+# обернуть FastAPI в Socket.IO-приложение
+app = socketio.ASGIApp(sio, other_asgi_app=fastapi_app)
 
 
 # === Модуль 2.3, Задание 4: статус сервера ===
@@ -481,12 +831,48 @@ def get_status(n: int) -> str:
 
 
 # === Модуль 3.1, Практика 2–3: сериализация состояния комнат ===
-def build_rooms_state() -> dict[str, list[str]]:
-    return {room: list(sids) for room, sids in rooms.items()}
+async def build_rooms_state() -> dict[str, list[str]]:
+    return (await backend.rooms_snapshot())["rooms"]
+
+
+async def publish_room_changes(changes: list[dict]) -> None:
+    """
+    Разослать подписчикам ленты комнат накопленные дельты одним событием.
+    """
+    if not changes:
+        return
+    await sio.emit(
+        "room_delta",
+        {"version": changes[-1]["version"], "changes": changes},
+        room=ROOMS_FEED,
+    )
 
 
 # ====== Обработчики Socket.IO ======
 
+def limited(handler, event: str):
+    """
+    Пропускать событие event через rate_limiter.
+    """
+    @functools.wraps(handler)
+    async def wrapper(sid, *args):
+        conn = registry.get(sid)
+        bucket = rate_limiter.check(conn, event) if conn is not None else None
+        if bucket is None:
+            return await handler(sid, *args)
+        if RATE_LIMIT_DISCONNECT and bucket.denied == RATE_LIMIT_DISCONNECT:
+            logger.warning("sid={} отключён за флуд событием {}", sid, event)
+            await sio.disconnect(sid)
+        elif RATE_LIMIT_MODE == "reject" and bucket.denied == 1:
+            await sio.emit(
+                "rate_limited",
+                {"event": event, "retry_after": round(bucket.retry_after(), 3)},
+                room=sid,
+            )
+
+    return wrapper
+
+
 # === Модуль 2.2/2.3/3.1/3.1(цветные) — основной connect с авторизацией и логикой ===
 @sio.event
 async def connect(sid, environ, auth):
@@ -510,54 +896,47 @@ async def connect(sid, environ, auth):
     user_id = str(payload["sub"])
 
     # === Модуль 2.2, Практика 1: список клиентов ===
-    clients.append(sid)
+    # (здесь же фиксируется время подключения — Модуль 2.3, Задание 5)
+    conn = registry.add(sid, user_id)
+    conn.outbox = queue_of(sio, sid)
+    if conn.outbox is not None:
+        conn.outbox.on_overflow = functools.partial(evict_slow_consumer, sid)
+    await backend.add_connection(sid, user_id)
 
     # === Модуль 2.3, Задание 1: приветствие / Welcome to the server (по смыслу) ===
     await sio.emit("message", {"content": f"User {user_id} connected."}, room=sid)
 
-    # сохранить user_id в сессии сокета
-    await sio.save_session(sid, {"user_id": user_id})
-    add_user_sid(user_id, sid)
-    session = await sio.get_session(sid)
-    session["messages_sent"] = 0
-    await sio.save_session(sid, session)
-    # === Модуль 3.2, Задание 3: добавить owns_rooms ===
-    session = await sio.get_session(sid)
-    session["owns_rooms"] = []
-    await sio.save_session(sid, session)
-
+    # сохранить user_id в сессии сокета (messages_sent = 0,
+    # owns_rooms = [] — Модуль 3.2, Задание 3); запись в sio — отложенная
+    sessions.create(sid, user_id)
 
     # === Модуль 3.1, Задание 1: добавить в lobby и оповестить остальных ===
     await sio.enter_room(sid, "lobby")
     await sio.emit("update", {"message": "user_joined"}, room="lobby", skip_sid=sid)
 
-    # === Модуль 2.3, Задание 5: учёт времени подключения ===
-    sessions[sid] = datetime.datetime.now()
-
     # === Модуль 2.3, Задания 2–3: вывести список и онлайн ===
-    await sio.emit("message", {"clients": clients}, to=sid)
-    await sio.emit("message", {"online": len(clients)})
-
-    logger.debug(f"Клиент {sid} подключился")
-    logger.info(get_status(len(clients)))
-    logger.info(clients)
-    logger.info(
-        f"connect: sid={sid}, user={user_id}, "
-        f"online_sids={len(online_sids)}, users={count_unique_users()}"
-    )
-
-    # === Модуль 3.1, Задание 2: вести словарь rooms и рассылать state ===
-    rooms.setdefault("lobby", set()).add(sid)
-    state = build_rooms_state()
-    await sio.emit("update", state)
+    online = await backend.count_connections()
+    await sio.emit("message", {"clients": await backend.sids()}, to=sid)
+    # остальным — агрегированно, раз в тик (см. PresenceAggregator)
+    await sio.emit("message", {"online": online}, to=sid)
+    await sio.enter_room(sid, PRESENCE_ROOM)
+    presence.mark_dirty()
+
+    logger.debug("Клиент {} подключился", sid)
+    logger.info("{}", get_status(online))
+    logger.opt(lazy=True).debug("clients: {}", registry.sids)
+    logger.info("connect: sid={}, user={}, online_sids={}", sid, user_id, online)
+
+    # === Модуль 3.1, Задание 2: вести словарь rooms и рассылать дельту ===
+    # членство в комнатах хранит только backend (у MemoryBackend — conn.rooms)
+    await publish_room_changes(await backend.room_add("lobby", sid))
 
     # === Модуль 3.1, Задание 4: распределение в цветные комнаты ===
-    room = random.choice(["red", "green", "blue"])
+    room = random.choice(COLOR_ROOMS)
     await sio.enter_room(sid, room)
-    rooms_color[room].add(sid)
-    sid_to_room_color[sid] = room
+    conn.color = room
     
-    logger.info(f"Пользователь {sid} добавлен в цветную комнату '{room}'")
+    logger.info("Пользователь {} добавлен в цветную комнату '{}'", sid, room)
 
 
 # === Модуль 2.2, Практика 3: счётчик per-sid ===
@@ -566,8 +945,9 @@ async def increase_score(sid):
     """
     Увеличить счёт пользователя на 1.
     """
-    scores.setdefault(sid, 0)
-    scores[sid] += 1
+    conn = registry.get(sid)
+    if conn is not None:
+        conn.score += 1
 
 
 @sio.event
@@ -575,8 +955,9 @@ async def decrese_score(sid):
     """
     Уменьшить счёт пользователя на 1.
     """
-    scores.setdefault(sid, 0)
-    scores[sid] -= 1
+    conn = registry.get(sid)
+    if conn is not None:
+        conn.score -= 1
 
 
 @sio.event
@@ -584,7 +965,8 @@ async def get_score(sid):
     """
     Отправить значение счёта для текущего sid.
     """
-    await sio.emit("score", {"score": scores.get(sid, 0)}, room=sid)
+    conn = registry.get(sid)
+    await sio.emit("score", {"score": conn.score if conn else 0}, room=sid)
 
 
 @sio.event
@@ -599,34 +981,31 @@ async def disconnect(sid):
     """
     Обработать разрыв соединения, убрать sid из онлайна и вывести статус.
     """
-    try:
-        session = await sio.get_session(sid)
-        user_id = session.get("user_id")
-    except KeyError:
-        user_id = None
-
-    if sid in clients:
-        clients.remove(sid)
-
-    remove_sid(sid)
-
-    logger.debug("Клиент отключился!")
-    logger.debug(f"Клиент {sid} отключился")
-    logger.info(get_status(len(clients)))
-    logger.info(clients)
+    await sessions.close(sid)
+    conn = registry.get(sid)
+    user_id = conn.user_id if conn else None
+
+    if conn is not None:
+        presence.mark_dirty()
+        # из реестра — после backend: MemoryBackend берёт комнаты из той же записи
+        changes = await backend.room_leave_all(sid)
+        await backend.remove_connection(sid)
+        registry.remove(sid)
+        await publish_room_changes(changes)
+
+    online = await backend.count_connections()
+    logger.debug("Клиент {} отключился", sid)
+    logger.info("{}", get_status(online))
+    logger.opt(lazy=True).debug("clients: {}", registry.sids)
 
     # Модуль 2.3, Задание 5 — время сессии
-    start = sessions.pop(sid, None)
-    if start is not None:
-        duration = datetime.datetime.now() - start
-        logger.info(f"Клиент {sid} отключился, время сессии: {duration}")
+    if conn is not None:
+        duration = datetime.timedelta(seconds=conn.duration())
+        logger.info("Клиент {} отключился, время сессии: {}", sid, duration)
     else:
-        logger.error(f"Клиент {sid} отключился, но время старта не найдено")
+        logger.error("Клиент {} отключился, но время старта не найдено", sid)
 
-    logger.info(
-        f"disconnect: sid={sid}, user={user_id}, "
-        f"online_sids={len(online_sids)}, users={count_unique_users()}"
-    )
+    logger.info("disconnect: sid={}, user={}, online_sids={}", sid, user_id, online)
 
 
 # === Модуль 2.2, Практика 1: get_users_online ===
@@ -635,7 +1014,10 @@ async def get_users_online(sid):
     """
     Отправить запрашивающему количество соединений и уникальных пользователей онлайн.
     """
-    data = {"connections": len(online_sids), "users": count_unique_users()}
+    data = {
+        "connections": await backend.count_connections(),
+        "users": await backend.count_users(),
+    }
     await sio.emit("users", data, room=sid)
 
 
@@ -645,7 +1027,7 @@ async def unknown_event(event, sid, data):
     """
     Обработчик неизвестных событий для отладки и статистики.
     """
-    lost_queries["lost"] += 1
+    await backend.incr("lost")
 
 
 @sio.event
@@ -653,7 +1035,7 @@ async def count_queries(sid):
     """
     Отправить количество потерянных запросов.
     """
-    await sio.emit("queries", {"lost": lost_queries["lost"]}, room=sid)
+    await sio.emit("queries", {"lost": await backend.counter("lost")}, room=sid)
 
 
 # === Модуль 3.1, Практика 2–3: join с обновлением карты комнат ===
@@ -663,39 +1045,111 @@ async def join_room(sid, data):
     Переместить пользователя в указанную комнату и разослать всем список комнат.
     """
     room = data.get("room") or data.get("room_id")
-    if not room:
+    conn = registry.get(sid)
+    if not room or conn is None:
         return
 
     for r in list(sio.rooms(sid)):
-        if r != sid:
+        if r != sid and r not in SERVICE_ROOMS:
             await sio.leave_room(sid, r)
 
-    for room_name, sids in list(rooms.items()):
-        sids.discard(sid)
-        if not sids:
-            rooms.pop(room_name)
-            
-    current_members = rooms.get(room)
-    is_new_room = (current_members is None) or (len(current_members) == 0)
+    changes = await backend.room_leave_all(sid)
 
     await sio.enter_room(sid, room)
-    rooms.setdefault(room, set()).add(sid)
+    added = await backend.room_add(room, sid)
+    is_new_room = any(c["op"] == "create" for c in added)
+    changes.extend(added)
     
-    logger.info(f"Пользователь {sid} присоединился к комнате '{room}'")
+    logger.info("Пользователь {} присоединился к комнате '{}'", sid, room)
 
     
     if is_new_room:
-        session = await sio.get_session(sid)
-        owns = session.get("owns_rooms", [])
-        if room not in owns:
-            owns.append(room)
-        session["owns_rooms"] = owns
-        await sio.save_session(sid, session)
-    
-    
-    state = build_rooms_state()
-    await sio.emit("update", state)
+        session = await sessions.load(sid)
+        if room not in session.owns_rooms:
+            session.owns_rooms.append(room)
+            sessions.mark_dirty(sid)
+
+    await publish_room_changes(changes)
+
 
+# === Подписка на счётчик онлайна ===
+@sio.event
+async def presence_updates(sid, data):
+    """
+    Клиент присылает:
+      presence_updates {"enabled": true | false}
+
+    Включает или выключает агрегированные рассылки {"online": N}.
+    При включении сразу отправляет текущее значение.
+    """
+    enabled = data.get("enabled", True) if isinstance(data, dict) else bool(data)
+    if not enabled:
+        await sio.leave_room(sid, PRESENCE_ROOM)
+        return
+    await sio.enter_room(sid, PRESENCE_ROOM)
+    await sio.emit("message", {"online": await backend.count_connections()}, to=sid)
+
+
+# === Лента состояния комнат: снимок + дельты ===
+@sio.event
+async def subscribe_rooms(sid, data=None):
+    """
+    Подписаться на ленту комнат: один полный снимок, дальше room_delta.
+    """
+    await sio.enter_room(sid, ROOMS_FEED)
+    await sio.emit("rooms_snapshot", await backend.rooms_snapshot(), room=sid)
+
+
+@sio.event
+async def unsubscribe_rooms(sid, data=None):
+    """
+    Отписаться от ленты комнат.
+    """
+    await sio.leave_room(sid, ROOMS_FEED)
+
+
+@sio.event
+async def resync_rooms(sid, data):
+    """
+    Клиент присылает:
+      resync_rooms {"since": <последняя применённая версия>}
+
+    Если история ещё хранит пропущенные дельты — отправляем только их,
+    иначе — полный снимок.
+    """
+    since = data.get("since") if isinstance(data, dict) else None
+    changes = await backend.rooms_since(since) if isinstance(since, int) else None
+    if changes is None:
+        await sio.emit("rooms_snapshot", await backend.rooms_snapshot(), room=sid)
+        return
+    await sio.emit(
+        "room_delta",
+        {"version": changes[-1]["version"] if changes else since, "changes": changes},
+        room=sid,
+    )
+
+
+
+# === Подписка на потоковый приём /ingest/{kind} ===
+@sio.event
+async def subscribe_ingest(sid, data):
+    """
+    Клиент присылает:
+      subscribe_ingest {"kind": "products", "enabled": true}
+
+    Подписчик получает "ingested" {"kind", "items"} на каждую принятую
+    пачку загрузки с notify=true. Ack — действует ли подписка.
+    """
+    data = data if isinstance(data, dict) else {}
+    room = INGEST_ROOMS.get(data.get("kind"))
+    if room is None:
+        return False
+    enabled = bool(data.get("enabled", True))
+    if enabled:
+        await sio.enter_room(sid, room)
+    else:
+        await sio.leave_room(sid, room)
+    return enabled
 
 
 # Старый leave_room из ранних задач
@@ -704,8 +1158,8 @@ async def leave_room(sid, data):
     """
     Убрать текущее соединение из комнаты и разослать системное сообщение.
     """
-    session = await sio.get_session(sid)
-    user_id = session["user_id"]
+    session = await sessions.load(sid)
+    user_id = session.user_id
     room_id = str(data.get("room_id"))
     if not room_id:
         return
@@ -734,15 +1188,15 @@ async def join(sid, data):
     surname = data.get("surname")
     user_id = data.get("id")
 
-    session = await sio.get_session(sid)
+    session = await sessions.load(sid)
 
-    session["profile"] = {
+    session.profile = {
         "name": name,
         "surname": surname,
         "id": user_id,
     }
 
-    await sio.save_session(sid, session)
+    sessions.mark_dirty(sid)
 
 
 @sio.event
@@ -758,12 +1212,11 @@ async def get_profile(sid, data):
     if not target_sid:
         return
 
-    try:
-        target_session = await sio.get_session(target_sid)
-    except KeyError:
+    target_session = await sessions.load(target_sid)
+    if target_session is None:
         return
 
-    profile = target_session.get("profile")
+    profile = target_session.profile
     if not profile:
         return
 
@@ -779,9 +1232,8 @@ async def profile(sid):
     В ответ получает:
       profile {"owns_rooms": [...]}
     """
-    session = await sio.get_session(sid)
-    owns = session.get("owns_rooms", [])
-    await sio.emit("profile", {"owns_rooms": owns}, room=sid)
+    session = await sessions.load(sid)
+    await sio.emit("profile", {"owns_rooms": session.owns_rooms}, room=sid)
 
 
 # === Модуль 3.1, Задания 4–5: message + молчаливая lobby ===
@@ -790,41 +1242,49 @@ async def message(sid, data):
     """
     Если пользователь в lobby — выкинуть его из lobby и не слать сообщение.
     Иначе — разослать текст всем в его цветной комнате, кроме него.
+
+    С CHAT_BATCH_WINDOW > 0 текст копится и уходит всей комнате событием
+    messages {"room", "messages": [{"sid", "text"}, ...]} раз в окно;
+    отправитель тоже получает пачку и сам пропускает свои сообщения по sid.
     """
     text = data.get("text")
     if text is None:
-        logger.error(f"Событие 'message' без поля 'text' от sid={sid}: {data!r}")
+        logger.error("Событие 'message' без поля 'text' от sid={}: {!r}", sid, data)
         return
 
     text = str(text).strip()
     if not text:
-        logger.error(f"Событие 'message' с пустым 'text' от sid={sid}: {data!r}")
+        logger.error("Событие 'message' с пустым 'text' от sid={}: {!r}", sid, data)
         return
 
-    session = await sio.get_session(sid)
-    current = session.get("messages_sent", 0)
-    session["messages_sent"] = current + 1
-    await sio.save_session(sid, session)
+    session = await sessions.load(sid)
+    session.messages_sent += 1
+    sessions.mark_dirty(sid)
+    if log_sampler.hit("message"):
+        logger.info(
+            "message от sid={}: {} символов, всего сообщений {}",
+            sid, len(text), session.messages_sent,
+        )
     
     
     # Задание 5: lobby — комната, где нельзя говорить
     user_rooms = sio.rooms(sid)
     if "lobby" in user_rooms:
         await sio.leave_room(sid, "lobby")
-
-        lobby_set = rooms.get("lobby")
-        if lobby_set:
-            lobby_set.discard(sid)
-            if not lobby_set:
-                rooms.pop("lobby")
+        await publish_room_changes(await backend.room_remove("lobby", sid))
 
         return  # сообщение не отправляем
 
     # Задание 4: цветные комнаты red/green/blue
-    room = sid_to_room_color.get(sid)
+    conn = registry.get(sid)
+    room = conn.color if conn else None
     if not room:
         return
 
+    if chat_batcher is not None:
+        chat_batcher.add(room, {"sid": sid, "text": text})
+        return
+
     await sio.emit(
         "message",
         {"text": text},
@@ -835,11 +1295,11 @@ async def message(sid, data):
 
 @sio.event
 async def create_product(sid, data):
-    logger.debug(f"create_product от sid={sid}: {data!r}")
+    logger.debug("create_product от sid={}: {!r}", sid, data)
     try:
         product = Product(**data)
     except ValidationError as e:
-        logger.error(f"Ошибка валидации Product от sid={sid}: {e}")
+        logger.error("Ошибка валидации Product от sid={}: ошибок {}", sid, e.error_count())
         await sio.emit(
             "errors",
             {"errors": e.errors()},
@@ -848,7 +1308,8 @@ async def create_product(sid, data):
         return
 
     product_dict = product.model_dump()
-    logger.info(f"Продукт успешно создан для sid={sid}: {product_dict}")
+    if log_sampler.hit("create"):
+        logger.info("Продукт успешно создан для sid={}", sid)
 
     await sio.emit(
         "product",
@@ -857,13 +1318,13 @@ async def create_product(sid, data):
     )
     
     
-@sio.event    
+@sio.event
 async def create_transfer(sid, data):
-    logger.debug(f"create_transfer от sid={sid}: {data!r}")
+    logger.debug("create_transfer от sid={}: {!r}", sid, data)
     try:
         transfer = Transfers(**data)
     except ValidationError as e:
-        logger.error(f"Ошибка валидации Transfers от sid={sid}: {e}")
+        logger.error("Ошибка валидации Transfers от sid={}: ошибок {}", sid, e.error_count())
         await sio.emit(
             "errors",
             {"errors": e.errors()},
@@ -872,7 +1333,8 @@ async def create_transfer(sid, data):
         return
 
     transfer_dict = transfer.model_dump()
-    logger.info(f"Перевод успешно создан для sid={sid}: {transfer_dict}")
+    if log_sampler.hit("create"):
+        logger.info("Перевод успешно создан для sid={}", sid)
 
     await sio.emit(
         "transfer",
@@ -882,11 +1344,11 @@ async def create_transfer(sid, data):
     
 @sio.event
 async def create_order(sid, data):
-    logger.debug(f"create_transfer1 от sid={sid}: {data!r}")
+    logger.debug("create_order от sid={}: {!r}", sid, data)
     try:
         order = Order(**data)
     except ValidationError as e:
-        logger.error(f"Ошибка валидации Order от sid={sid}: {e}")
+        logger.error("Ошибка валидации Order от sid={}: ошибок {}", sid, e.error_count())
         await sio.emit(
             "errors",
             {"errors": e.errors()},
@@ -895,7 +1357,8 @@ async def create_order(sid, data):
         return
 
     order_dict = order.model_dump()
-    logger.info(f"Заказ успешно создан для sid={sid}: {order_dict}")
+    if log_sampler.hit("create"):
+        logger.info("Заказ успешно создан для sid={}", sid)
 
     await sio.emit(
         "order",
@@ -905,6 +1368,59 @@ async def create_order(sid, data):
 
 
 
+# === Пакетные варианты: массив объектов -> одно событие с результатом ===
+async def create_batch(sid, kind: str, data):
+    """
+    Провалидировать массив объектов за один проход и ответить одним
+    событием kind: {"items": [...принятые...], "errors": [{"index", "errors"}]}.
+    """
+    accepted, errors = batch_validators[kind].validate(data)
+    if errors:
+        logger.error("Ошибки валидации {} от sid={}: принято {}, отклонено {}",
+                     kind, sid, len(accepted), len(errors))
+    elif log_sampler.hit("create"):
+        logger.info("Пакет {} успешно создан для sid={}: {} шт.", kind, sid, len(accepted))
+
+    await sio.emit(
+        kind,
+        {"items": accepted, "errors": errors},
+        room=sid,
+    )
+
+
+@sio.event
+async def create_products(sid, data):
+    await create_batch(sid, "products", data)
+
+
+@sio.event
+async def create_transfers(sid, data):
+    await create_batch(sid, "transfers", data)
+
+
+@sio.event
+async def create_orders(sid, data):
+    await create_batch(sid, "orders", data)
+
+
+# === Ограничение частоты — на все события разом (см. limited) ===
+def limit_all_events(namespace: str = "/") -> None:
+    """
+    Обернуть limited каждый обработчик namespace, кроме connect/disconnect
+    и catch-all; о правилах RATE_LIMITS для несуществующих событий — warning.
+    """
+    handlers = sio.handlers.get(namespace, {})
+    for event, handler in list(handlers.items()):
+        if event not in ("connect", "disconnect", "*"):
+            handlers[event] = limited(handler, event)
+    for event in rate_limiter.rules.keys() - handlers.keys():
+        logger.warning("RATE_LIMITS: правило для {} — такого события нет", event)
+
+
+limit_all_events()
+instrument(sio, metrics)
+
+
 if __name__ == "__main__":
     import uvicorn
 
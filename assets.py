@@ -0,0 +1,146 @@
+# assets.py
+"""
+Кэш отдаваемых страниц и статики в памяти, заранее сжатых.
+
+Каждый ресурс читается один раз и хранится в трёх видах: как есть,
+gzip и brotli (если установлен пакет brotli). Ответ выбирается по
+Accept-Encoding без сжатия на запрос; ETag сильный, свой для каждого
+кодирования, If-None-Match даёт 304. Файлы перечитываются сами: не
+чаще раза в check_interval секунд ресурс сверяет mtime и размер файла.
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+import time
+from pathlib import Path
+from typing import Callable
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli не установлен, только gzip
+    brotli = None
+
+DEFAULT_CACHE_CONTROL = "public, max-age=60, must-revalidate"
+
+# меньше этого сжимать нет смысла: заголовки gzip съедят выигрыш
+MIN_COMPRESS_SIZE = 256
+
+
+class Asset:
+    """
+    Один ресурс во всех кодированиях: encoding -> (тело, ETag).
+    """
+
+    __slots__ = ("media_type", "variants", "stamp", "checked_at")
+
+    def __init__(self, body: bytes, media_type: str, stamp: tuple | None = None):
+        self.media_type = media_type
+        self.stamp = stamp          # (mtime_ns, size) файла; None — строка в памяти
+        self.checked_at = 0.0
+        digest = hashlib.blake2b(body, digest_size=12).hexdigest()
+        self.variants: dict[str, tuple[bytes, str]] = {"identity": (body, f'"{digest}"')}
+        if len(body) >= MIN_COMPRESS_SIZE:
+            self._add("gzip", gzip.compress(body, compresslevel=9, mtime=0), digest, body)
+            if brotli is not None:
+                self._add("br", brotli.compress(body, quality=11), digest, body)
+
+    def _add(self, encoding: str, data: bytes, digest: str, body: bytes) -> None:
+        if len(data) < len(body):
+            self.variants[encoding] = (data, f'"{digest}-{encoding}"')
+
+    def pick(self, accept_encoding: str) -> str:
+        """
+        Лучшее кодирование из доступных, которое принимает клиент.
+        """
+        accepted = _accepted(accept_encoding)
+        for encoding in ("br", "gzip"):
+            if encoding in self.variants and encoding in accepted:
+                return encoding
+        return "identity"
+
+
+def _accepted(header: str) -> set[str]:
+    accepted = set()
+    for item in header.split(","):
+        name, _, params = item.strip().partition(";")
+        q = params.strip().removeprefix("q=")
+        if name and q not in ("0", "0.0", "0.00", "0.000"):
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+class AssetCache:
+    """
+    Ресурсы по имени: строки (add_text) и файлы (file, с автоперечитыванием).
+    """
+
+    def __init__(
+        self,
+        cache_control: str = DEFAULT_CACHE_CONTROL,
+        check_interval: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.cache_control = cache_control
+        self.check_interval = check_interval
+        self._clock = clock
+        self._assets: dict[str, Asset] = {}
+        self.loads = 0
+
+    def add_text(self, name: str, text: str, media_type: str = "text/html; charset=utf-8") -> Asset:
+        asset = self._assets[name] = Asset(text.encode("utf-8"), media_type)
+        return asset
+
+    def get(self, name: str) -> Asset | None:
+        return self._assets.get(name)
+
+    def file(self, path: str | os.PathLike) -> Asset:
+        """
+        Ресурс файла path; OSError, если файла нет.
+        """
+        key = os.fspath(path)
+        asset = self._assets.get(key)
+        now = self._clock()
+        if asset is not None and now - asset.checked_at < self.check_interval:
+            return asset
+        st = os.stat(key)
+        stamp = (st.st_mtime_ns, st.st_size)
+        if asset is None or asset.stamp != stamp:
+            asset = self._assets[key] = Asset(Path(key).read_bytes(), _media_type(key), stamp)
+            self.loads += 1
+        asset.checked_at = now
+        return asset
+
+    def response(self, asset: Asset, request: Request) -> Response:
+        encoding = asset.pick(request.headers.get("accept-encoding", ""))
+        body, etag = asset.variants[encoding]
+        headers = {"ETag": etag, "Cache-Control": self.cache_control, "Vary": "Accept-Encoding"}
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+        return Response(body, media_type=asset.media_type, headers=headers)
+
+
+def _media_type(path: str) -> str:
+    media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    if media_type.startswith("text/") or media_type in ("application/javascript",
+                                                         "application/json"):
+        media_type += "; charset=utf-8"
+    return media_type
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """
+    Совпадает ли ETag с заголовком If-None-Match (список, *, W/-префиксы).
+    """
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
@@ -0,0 +1,99 @@
+# auth.py
+import hashlib
+import time
+from collections import OrderedDict
+
+import jwt
+
+SECRET_KEY = "supersecret"  # демо-ключ, в проде храни в ENV
+ALGO = "HS256"
+
+TOKEN_TTL = 3600              # срок жизни токена по умолчанию, секунд
+MAX_TOKEN_TTL = 7 * 24 * 3600
+
+
+class VerifiedTokenCache:
+    """
+    LRU уже проверенных токенов: sha256(token) -> (payload, exp).
+
+    Повторный connect с тем же токеном не пересчитывает HMAC.
+    Запись недействительна после exp токена и удаляется при обращении;
+    токены без exp не кэшируются (иначе жили бы в кэше вечно).
+    Размер кэша ограничен maxsize (вытесняются давно не использованные).
+    """
+
+    def __init__(self, maxsize: int = 10_000, clock=time.time):
+        self.maxsize = maxsize
+        self.clock = clock
+        self._entries: OrderedDict[bytes, tuple[dict, float]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> dict | None:
+        key = self._key(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        payload, exp = entry
+        if exp <= self.clock():
+            del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return payload
+
+    def put(self, token: str, payload: dict) -> None:
+        exp = payload.get("exp")
+        if exp is None:
+            return
+        key = self._key(token)
+        self._entries[key] = (payload, float(exp))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+token_cache = VerifiedTokenCache()
+
+
+def create_jwt(sub: str, ttl: int = TOKEN_TTL) -> str:
+    """
+    Создать JWT-токен для указанного пользователя со сроком жизни ttl секунд.
+    """
+    now = int(time.time())
+    token = jwt.encode(
+        {"sub": sub, "iat": now, "exp": now + ttl}, SECRET_KEY, algorithm=ALGO
+    )
+    if isinstance(token, bytes):
+        token = token.decode("utf-8")
+    return token
+
+
+def decode_jwt(token: str):
+    """
+    Проверить JWT-токен и вернуть payload, либо None, если токен невалиден,
+    истёк или в нём нет exp/sub. Проверенные токены берутся из token_cache.
+    """
+    payload = token_cache.get(token)
+    if payload is not None:
+        return payload
+    try:
+        payload = jwt.decode(
+            token, SECRET_KEY, algorithms=[ALGO], options={"require": ["exp", "sub"]}
+        )
+    except jwt.InvalidTokenError:
+        return None
+    token_cache.put(token, payload)
+    return payload
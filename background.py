@@ -0,0 +1,50 @@
+# background.py
+"""
+Общее для фоновых задач процесса.
+
+BackgroundTask — одна задача на объект: start() запускает run(), если
+она ещё не идёт, stop() отменяет и дожидается её. every() — тело run()
+для периодического сброса: раз в interval секунд вызывает action, ошибку
+пишет в лог и продолжает. percentile() — квантиль по отсортированным
+замерам для stats() мониторов и очередей.
+"""
+import asyncio
+from typing import Awaitable, Callable, Sequence
+
+from loguru import logger
+
+
+class BackgroundTask:
+    """Наследник реализует run(); остановка наследника может досбросить своё после super().stop()."""
+
+    _task: asyncio.Task | None = None
+
+    async def run(self) -> None:
+        raise NotImplementedError
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+async def every(interval: float, action: Callable[[], Awaitable], error: str) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await action()
+        except Exception:
+            logger.exception(error)
+
+
+def percentile(ordered: Sequence[float], q: float) -> float:
+    """Ближайший ранг без интерполяции; пустая выборка — 0."""
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
@@ -0,0 +1,72 @@
+# batch_validation.py
+from typing import Annotated, Any, Union
+
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError
+
+
+class BatchValidator:
+    """
+    Валидация списка объектов одной моделью за один проход.
+
+    TypeAdapter собирается один раз при создании. Элемент списка — это
+    Model | Any слева направо: валидный объект становится моделью, а
+    невалидный проходит как есть, не обрывая проверку всего пакета.
+    Повторно (по одному) проверяются только отклонённые элементы — чтобы
+    собрать их ошибки.
+    """
+
+    def __init__(self, model: type[BaseModel], max_items: int = 10_000):
+        self.model = model
+        self.max_items = max_items
+        self.adapter = TypeAdapter(
+            list[Annotated[Union[model, Any], Field(union_mode="left_to_right")]]
+        )
+        self.item_adapter = TypeAdapter(model)
+        self.dump_adapter = TypeAdapter(list[model])
+
+    def validate(self, items) -> tuple[list[dict], list[dict]]:
+        """
+        Вернуть (принятые объекты как dict, ошибки по индексам).
+
+        Ошибки: [{"index": i, "errors": [...]}], loc внутри — без индекса.
+        Ошибка формата всего пакета: [{"index": None, "errors": [...]}].
+        """
+        if isinstance(items, list) and len(items) > self.max_items:
+            return [], [{
+                "index": None,
+                "errors": [{
+                    "type": "too_long",
+                    "loc": [],
+                    "msg": f"Batch should have at most {self.max_items} items",
+                }],
+            }]
+        try:
+            values = self.adapter.validate_python(items)
+        except ValidationError as e:  # сам пакет — не список
+            return [], [{"index": None, "errors": e.errors(include_url=False)}]
+        return self._split(values)
+
+    def validate_json(self, data: bytes) -> tuple[list[dict], list[dict]]:
+        """
+        То же для JSON-массива в байтах: разбор и валидация за один проход
+        в pydantic-core, без промежуточных объектов json.loads.
+        """
+        try:
+            values = self.adapter.validate_json(data)
+        except ValidationError as e:  # невалидный JSON или не массив
+            return [], [{"index": None, "errors": e.errors(include_url=False)}]
+        if len(values) > self.max_items:
+            return self.validate(values)
+        return self._split(values)
+
+    def _split(self, values: list) -> tuple[list[dict], list[dict]]:
+        models, errors = [], []
+        for index, value in enumerate(values):
+            if isinstance(value, self.model):
+                models.append(value)
+                continue
+            try:
+                models.append(self.item_adapter.validate_python(value))
+            except ValidationError as e:
+                errors.append({"index": index, "errors": e.errors(include_url=False)})
+        return self.dump_adapter.dump_python(models), errors
@@ -0,0 +1,84 @@
+# benchmarks/bench_batch_create.py
+"""
+Создание объектов: по одному (create_product) против пакета (create_products).
+
+Запуск:
+    python benchmarks/bench_batch_create.py --items 10000 --invalid 0.01
+
+Одиночный путь — Model(**data) + model_dump() на каждый объект, как в
+create_product; пакетный — один BatchValidator.validate на весь массив.
+Меряется только валидация, без сети: в реальном клиенте одиночный путь
+добавляет ещё items сетевых round trip'ов против одного.
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+from pydantic import ValidationError
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app import Order, Product, Transfers, batch_validators  # noqa: E402
+
+SAMPLES = {
+    "products": (Product, lambda i: {"title": f"Товар {i}", "price": 10.0 + i, "discount": 1.0},
+                 {"title": "", "price": -1}),
+    "transfers": (Transfers, lambda i: {"ac_from": f"{i:016d}", "ac_to": "7890789078907890",
+                                        "amount": 1.5 + i},
+                  {"ac_from": "1", "ac_to": "2", "amount": 0}),
+    "orders": (Order, lambda i: {"customer_name": f"Клиент {i}", "customer_address": "Москва",
+                                 "total_price": 99.9},
+               {"customer_name": "", "customer_address": "", "total_price": -5}),
+}
+
+
+def single(model, items: list[dict]) -> int:
+    accepted = 0
+    for data in items:
+        try:
+            model(**data).model_dump()
+            accepted += 1
+        except ValidationError as e:
+            e.errors()
+    return accepted
+
+
+def per_second(fn, items: list[dict], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(items)
+        best = min(best, time.perf_counter() - started)
+    return len(items) / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--items", type=int, default=10_000)
+    parser.add_argument("--invalid", type=float, default=0.01, help="доля невалидных")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rnd = random.Random(0)
+    for kind, (model, make, bad) in SAMPLES.items():
+        items = [bad if rnd.random() < args.invalid else make(i) for i in range(args.items)]
+        validator = batch_validators[kind]
+        accepted, errors = validator.validate(items)
+        assert len(accepted) == single(model, items)
+
+        one = per_second(lambda xs: single(model, xs), items, args.repeat)
+        batch = per_second(validator.validate, items, args.repeat)
+        print({
+            "kind": kind,
+            "items": args.items,
+            "rejected": len(errors),
+            "single_per_s": round(one),
+            "batch_per_s": round(batch),
+            "speedup": round(batch / one, 2),
+        })
+
+
+if __name__ == "__main__":
+    main()
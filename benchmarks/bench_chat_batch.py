@@ -0,0 +1,125 @@
+# benchmarks/bench_chat_batch.py
+"""
+Рассылка чата в комнату: каждое сообщение сразу против пачек ChatBatcher.
+
+Запуск:
+    python benchmarks/bench_chat_batch.py --members 200 --rate 500 --duration 3 --windows 5 20 50
+
+Сообщения приходят равномерно, rate в секунду, в комнату из members
+участников. Рассылка моделируется как в socketio.AsyncManager: пакет
+кодируется один раз, затем кладётся в очередь каждого получателя.
+Считаются записи в сокеты, время цикла событий в рассылке и задержка
+от прихода сообщения до записи (p50/p99).
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from chat_batch import ChatBatcher  # noqa: E402
+
+
+class Room:
+    """Участники комнаты: счётчик записей, занятое время, задержки."""
+
+    def __init__(self, members: int):
+        self.members = members
+        self.writes = 0
+        self.busy = 0.0
+        self.latencies: list[float] = []
+
+    def send(self, event: str, data: dict, arrived: list[float]) -> None:
+        started = time.perf_counter()
+        frame = json.dumps([event, data])
+        queues = [[] for _ in range(self.members)]
+        for queue in queues:
+            queue.append(frame)
+            self.writes += 1
+        now = time.perf_counter()
+        self.busy += now - started
+        self.latencies.extend(now - t for t in arrived)
+
+
+async def produce(rate: int, duration: float, on_message) -> None:
+    interval = 1 / rate
+    started = time.perf_counter()
+    n = 0
+    while time.perf_counter() - started < duration:
+        due = started + n * interval
+        while n < rate * duration and time.perf_counter() >= due:
+            on_message(n, time.perf_counter())
+            n += 1
+            due = started + n * interval
+        await asyncio.sleep(0.001)
+
+
+def percentile(values: list[float], q: int) -> float:
+    return statistics.quantiles(values, n=100)[q - 1] if len(values) > 1 else 0.0
+
+
+def report(name: str, room: Room, messages: int, duration: float) -> dict:
+    return {
+        "mode": name,
+        "messages": messages,
+        "writes": room.writes,
+        "writes_per_s": round(room.writes / duration),
+        "busy_ms": round(room.busy * 1000, 1),
+        "latency_p50_ms": round(percentile(room.latencies, 50) * 1000, 2),
+        "latency_p99_ms": round(percentile(room.latencies, 99) * 1000, 2),
+    }
+
+
+async def run_immediate(members: int, rate: int, duration: float) -> dict:
+    room = Room(members)
+    count = 0
+
+    def on_message(n: int, arrived: float) -> None:
+        nonlocal count
+        count += 1
+        room.send("message", {"text": f"msg {n}"}, [arrived])
+
+    await produce(rate, duration, on_message)
+    return report("immediate", room, count, duration)
+
+
+async def run_batched(members: int, rate: int, duration: float, window: float) -> dict:
+    room = Room(members)
+    count = 0
+
+    async def publish(name: str, items: list[dict]) -> None:
+        arrived = [item.pop("arrived") for item in items]
+        room.send("messages", {"room": name, "messages": items}, arrived)
+
+    batcher = ChatBatcher(publish, window=window)
+
+    def on_message(n: int, arrived: float) -> None:
+        nonlocal count
+        count += 1
+        batcher.add("red", {"sid": "s", "text": f"msg {n}", "arrived": arrived})
+
+    await produce(rate, duration, on_message)
+    await batcher.close()
+    return report(f"batched_{round(window * 1000)}ms", room, count, duration)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--members", type=int, default=200)
+    parser.add_argument("--rate", type=int, default=500, help="сообщений в секунду")
+    parser.add_argument("--duration", type=float, default=3)
+    parser.add_argument("--windows", type=float, nargs="+", default=[5, 20, 50],
+                        help="окна в миллисекундах")
+    args = parser.parse_args()
+
+    print(asyncio.run(run_immediate(args.members, args.rate, args.duration)))
+    for window in args.windows:
+        print(asyncio.run(run_batched(args.members, args.rate, args.duration, window / 1000)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+# benchmarks/bench_game_state.py
+"""
+Состояние игры project3: pydantic Game/Player против GameState.
+
+Запуск:
+    python benchmarks/bench_game_state.py --games 10000 --answers 200000 --players 2 10 50
+
+Память — прирост по tracemalloc на игру (games игр на одной теме, у
+каждой свои игроки). Скорость — ответы в секунду в цикле обработчика
+answer: найти игрока по sid, записать ответ, и когда ответили все —
+разобрать вопрос (evaluate) и сбросить ответы. --players — размер лобби:
+у pydantic Game проверка «все ответили» проходит по всем игрокам на
+каждый ответ, у GameState — счётчик ожидаемых ответов.
+"""
+import argparse
+import gc
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from project3.models import Game, Player  # noqa: E402
+from project3.state import GameState  # noqa: E402
+from project3.trivia_data import load_topics  # noqa: E402
+
+
+def make_model(uid: str, topic, sids: list[str]):
+    """Как было в main.py."""
+    return Game(uid=uid, topic=topic, players=[Player(sid=sid, name=sid) for sid in sids])
+
+
+def make_state(uid: str, topic, sids: list[str]):
+    return GameState(uid, topic, sids, sids)
+
+
+def answer_model(game, sid: str, index: int):
+    player = next((p for p in game.players if p.sid == sid), None)
+    if not player:
+        return
+    game.record_answer(sid, index)
+    if game.both_answered():
+        game.evaluate_answers()
+
+
+def answer_state(game, sid: str, index: int):
+    if sid not in game.slot:
+        return
+    game.record_answer(sid, index)
+    if game.all_answered():
+        game.evaluate_answers()
+
+
+def lobby(n: int, players: int) -> list[str]:
+    return [f"p{n}-{k}" for k in range(players)]
+
+
+def memory_per_game(make, topic, games: int, players: int) -> int:
+    sids = [lobby(n, players) for n in range(games)]
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = [make(f"g{n}", topic, sids[n]) for n in range(games)]
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del kept
+    # uid игры считается у обоих вариантов одинаково — вычитаем
+    return (used - sum(sys.getsizeof(f"g{n}") for n in range(games))) // games
+
+
+def seat_sid(game, k: int) -> str:
+    return game.sids[k] if isinstance(game, GameState) else game.players[k].sid
+
+
+def answers_per_second(make, answer, topic, answers: int, players: int) -> int:
+    games = [make(f"g{n}", topic, lobby(n, players)) for n in range(max(1, 2000 // players))]
+    # по кругу: каждый игрок каждой игры отвечает, потом следующий вопрос
+    order = [(game, seat_sid(game, k), random.randint(1, 4)) for k in range(players) for game in games]
+    order = (order * (answers // len(order) + 1))[:answers]
+    started = time.perf_counter()
+    for game, sid, index in order:
+        answer(game, sid, index)
+    return int(answers / (time.perf_counter() - started))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--games", type=int, default=10000)
+    parser.add_argument("--answers", type=int, default=200000)
+    parser.add_argument("--players", type=int, nargs="+", default=[2, 10, 50])
+    args = parser.parse_args()
+
+    topic = load_topics()[0]
+    for players in args.players:
+        games = max(1, args.games * 2 // players)
+        for name, make, answer in (("pydantic", make_model, answer_model),
+                                   ("slots", make_state, answer_state)):
+            print({
+                "impl": name,
+                "players": players,
+                "bytes_per_game": memory_per_game(make, topic, games, players),
+                "answers_per_s": answers_per_second(make, answer, topic, args.answers, players),
+            })
+
+
+if __name__ == "__main__":
+    main()
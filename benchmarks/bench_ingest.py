@@ -0,0 +1,119 @@
+# benchmarks/bench_ingest.py
+"""
+Потоковый приём NDJSON: пропускная способность и память сервера.
+
+Запуск:
+    python benchmarks/bench_ingest.py --mb 1024 --invalid 0.01
+
+Поднимает app:app отдельным процессом, заливает --mb мегабайт продуктов
+в POST /ingest/products (chunked, aiohttp читает ответ параллельно
+с отправкой) и раз в 0.2 с снимает RSS сервера через psutil.
+"""
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import aiohttp
+import psutil
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def make_lines(total_bytes: int, invalid: float, block: int = 1000):
+    """Генератор кусков тела по block строк, всего около total_bytes."""
+    sent = 0
+    n = 0
+    every = int(1 / invalid) if invalid > 0 else 0
+    while sent < total_bytes:
+        lines = []
+        for _ in range(block):
+            n += 1
+            price = -1 if every and n % every == 0 else 10.0 + n % 100
+            lines.append(json.dumps({"title": f"Товар {n}", "price": price,
+                                     "discount": 1.0}, ensure_ascii=False))
+        data = ("\n".join(lines) + "\n").encode()
+        sent += len(data)
+        yield data
+
+
+async def wait_ready(url: str) -> None:
+    async with aiohttp.ClientSession() as session:
+        for _ in range(100):
+            try:
+                async with session.get(f"{url}/token", params={"sub": "bench"}):
+                    return
+            except aiohttp.ClientError:
+                await asyncio.sleep(0.1)
+    raise RuntimeError("сервер не поднялся")
+
+
+async def sample_rss(proc: psutil.Process, samples: list[int], stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        samples.append(proc.memory_info().rss)
+        await asyncio.sleep(0.2)
+
+
+async def run(args) -> dict:
+    url = f"http://127.0.0.1:{args.port}"
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--port", str(args.port),
+         "--log-level", "warning"],
+        cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        await wait_ready(url)
+        proc = psutil.Process(server.pid)
+        rss_start = proc.memory_info().rss
+        samples: list[int] = []
+        stop = asyncio.Event()
+        sampler = asyncio.create_task(sample_rss(proc, samples, stop))
+
+        total = args.mb * 1024 * 1024
+
+        async def body():
+            for data in make_lines(total, args.invalid):
+                yield data
+
+        started = time.perf_counter()
+        summary = None
+        timeout = aiohttp.ClientTimeout(total=None)
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            async with session.post(f"{url}/ingest/products", data=body()) as resp:
+                async for line in resp.content:
+                    result = json.loads(line)
+                    if result.get("done"):
+                        summary = result
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await sampler
+    finally:
+        server.terminate()
+        server.wait()
+
+    return {
+        "mb": args.mb,
+        "lines": summary["lines"],
+        "accepted": summary["accepted"],
+        "rejected": summary["rejected"],
+        "lines_per_s": round(summary["lines"] / elapsed),
+        "mb_per_s": round(args.mb / elapsed, 1),
+        "rss_start_mb": round(rss_start / 2**20, 1),
+        "rss_peak_mb": round(max(samples, default=rss_start) / 2**20, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--mb", type=int, default=256)
+    parser.add_argument("--invalid", type=float, default=0.01, help="доля невалидных")
+    parser.add_argument("--port", type=int, default=8010)
+    args = parser.parse_args()
+    print(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# benchmarks/bench_matchmaking.py
+"""
+Очередь ожидания project3: списки по темам против Matchmaker.
+
+Запуск:
+    python benchmarks/bench_matchmaking.py --waiting 1000 10000 50000 --ops 2000
+
+В очереди одной темы ждут waiting игроков. Меряется среднее время
+операции: join, который сводит с самым старым (раньше pop(0)), и уход
+игрока из середины очереди (раньше обход тем и list.remove).
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from project3.matchmaking import Matchmaker  # noqa: E402
+
+
+class ListQueues:
+    """Как было в main.py: topic_pk -> [sid]."""
+
+    def __init__(self):
+        self.waiting: dict[int, list[str]] = {}
+
+    def join(self, sid: str, topic: int):
+        waiting = self.waiting.setdefault(topic, [])
+        if not waiting:
+            waiting.append(sid)
+            return None
+        return waiting.pop(0)
+
+    def cancel(self, sid: str) -> None:
+        for topic, sids in self.waiting.items():
+            if sid in sids:
+                sids.remove(sid)
+                break
+
+
+def fill(queues, waiting: int) -> list[str]:
+    sids = [f"w{n}" for n in range(waiting)]
+    for sid in sids:
+        if isinstance(queues, ListQueues):
+            queues.waiting.setdefault(1, []).append(sid)
+        else:
+            queues.join(sid, 1, rating=0)  # рейтинг 0 у всех: band не разводит
+    return sids
+
+
+def per_op_us(func, ops: int) -> float:
+    started = time.perf_counter()
+    for n in range(ops):
+        func(n)
+    return round((time.perf_counter() - started) / ops * 1e6, 3)
+
+
+def run(name: str, make, waiting: int, ops: int) -> dict:
+    queues = make()
+    sids = fill(queues, waiting)
+    # join сводит со старейшим — а уходящего сразу возвращаем в хвост,
+    # чтобы глубина не менялась
+    join = per_op_us(lambda n: (queues.join(f"j{n}", 1), queues.join(f"r{n}", 1)), ops // 2)
+    victims = random.sample(sids[waiting // 4:], min(ops, waiting // 2))
+    cancel = per_op_us(lambda n: queues.cancel(victims[n]), len(victims))
+    return {"impl": name, "waiting": waiting, "join_us": join, "cancel_us": cancel}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--waiting", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--ops", type=int, default=2000)
+    args = parser.parse_args()
+
+    for waiting in args.waiting:
+        print(run("list", ListQueues, waiting, args.ops))
+        print(run("matchmaker", Matchmaker, waiting, args.ops))
+        print(run("matchmaker_band", lambda: Matchmaker(band=100), waiting, args.ops))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# benchmarks/bench_presence.py
+"""
+Шторм подключений: немедленная рассылка онлайна против PresenceAggregator.
+
+Запуск:
+    python benchmarks/bench_presence.py --connects 5000 --duration 2 --interval 0.25
+
+Подключения приходят равномерно за duration секунд. Рассылка моделируется
+как в socketio.AsyncManager: пакет кодируется один раз, затем кладётся
+в очередь каждого получателя. Считаются отправленные кадры и время,
+которое цикл событий провёл в обработчиках и рассылках.
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from collections import deque
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from presence import PresenceAggregator  # noqa: E402
+
+
+class FakeHub:
+    """Получатели с исходящими очередями и учётом кадров и занятого времени."""
+
+    def __init__(self):
+        self.queues: dict[int, deque] = {}
+        self.frames = 0
+        self.busy = 0.0
+
+    def send(self, data: dict, to: int | None = None) -> None:
+        started = time.perf_counter()
+        packet = json.dumps(["message", data])
+        targets = [to] if to is not None else self.queues
+        for sid in targets:
+            queue = self.queues[sid]
+            queue.append(packet)
+            if len(queue) > 8:
+                queue.popleft()  # клиент «вычитывает» очередь
+            self.frames += 1
+        self.busy += time.perf_counter() - started
+
+
+async def storm(connects: int, duration: float, on_connect) -> None:
+    per_ms = max(1, connects // max(1, int(duration * 1000)))
+    for i in range(0, connects, per_ms):
+        for sid in range(i, min(i + per_ms, connects)):
+            await on_connect(sid)
+        await asyncio.sleep(0.001)
+
+
+async def run_old(connects: int, duration: float) -> dict:
+    hub = FakeHub()
+
+    async def on_connect(sid: int) -> None:
+        hub.queues[sid] = deque()
+        hub.send({"online": len(hub.queues)})
+
+    started = time.perf_counter()
+    await storm(connects, duration, on_connect)
+    return {"mode": "broadcast", "frames": hub.frames,
+            "loop_busy_s": round(hub.busy, 4),
+            "wall_s": round(time.perf_counter() - started, 3)}
+
+
+async def run_new(connects: int, duration: float, interval: float) -> dict:
+    hub = FakeHub()
+
+    async def publish(value: int) -> None:
+        hub.send({"online": value})
+
+    presence = PresenceAggregator(lambda: len(hub.queues), publish, interval)
+    presence.start()
+
+    async def on_connect(sid: int) -> None:
+        hub.queues[sid] = deque()
+        hub.send({"online": len(hub.queues)}, to=sid)
+        presence.mark_dirty()
+
+    started = time.perf_counter()
+    await storm(connects, duration, on_connect)
+    await asyncio.sleep(interval * 1.5)
+    await presence.stop()
+    return {"mode": f"aggregated/{interval}s", "frames": hub.frames,
+            "publishes": presence.published,
+            "loop_busy_s": round(hub.busy, 4),
+            "wall_s": round(time.perf_counter() - started, 3)}
+
+
+async def main_async(args) -> None:
+    print(await run_old(args.connects, args.duration))
+    print(await run_new(args.connects, args.duration, args.interval))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--connects", type=int, default=5000)
+    parser.add_argument("--duration", type=float, default=2.0)
+    parser.add_argument("--interval", type=float, default=0.25)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+# benchmarks/bench_quiz_players.py
+"""
+Нагрузочный прогон викторины project3: N ботов-игроков.
+
+Запуск:
+    python benchmarks/bench_quiz_players.py --players 200 --rounds 3 --delay 0.05
+    python benchmarks/bench_quiz_players.py --players 500 --lobby-size 50
+    python benchmarks/bench_quiz_players.py --url http://host:8000 --players 50 --delay 3
+
+Без --url поднимает project3 (project3.main:app_with_socket из корня
+репозитория) отдельным процессом с QUESTION_DELAY=--delay,
+LOBBY_SIZE=--lobby-size и SIO_LOG=0. Каждый бот проходит полный цикл: get_topics -> join_game в случайной теме (в
+момент, разбросанный по --join-spread секундам) -> ответ на каждый
+вопрос после случайного «раздумья» -> over, и так --rounds раз. Темы
+раздаются группами по --lobby-size, чтобы каждое лобби набралось.
+
+Меряется:
+  matchmaking      — от join_game до первого вопроса (p50/p95/p99);
+  question         — доставка следующего вопроса: от разбора ответов до
+                     вопроса за вычетом --delay (p50/p95/p99);
+  games_per_s      — завершённые игры в секунду;
+  rss_per_game     — прирост RSS сервера на активную игру: в первом
+                     раунде боты не отвечают, пока все игры не начнутся,
+                     и RSS снимается до и после.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import aiohttp
+import socketio
+
+try:
+    import psutil
+except ImportError:  # pragma: no cover - RSS сервера не снимаем
+    psutil = None
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def percentiles(values: list[float]) -> dict:
+    """p50/p95/p99 в миллисекундах."""
+    if len(values) < 2:
+        value = round(values[0] * 1000, 3) if values else None
+        return {"count": len(values), "p50_ms": value, "p95_ms": value, "p99_ms": value}
+    cuts = statistics.quantiles(values, n=100)
+    return {
+        "count": len(values),
+        "p50_ms": round(cuts[49] * 1000, 3),
+        "p95_ms": round(cuts[94] * 1000, 3),
+        "p99_ms": round(cuts[98] * 1000, 3),
+    }
+
+
+class Stats:
+    """Замеры всех ботов."""
+
+    def __init__(self):
+        self.matchmaking: list[float] = []
+        self.question: list[float] = []
+        self.games: set[str] = set()
+        self.errors: dict[str, int] = {}
+        self.failed = 0
+
+    def error(self, name: str) -> None:
+        self.errors[name] = self.errors.get(name, 0) + 1
+
+
+class Player:
+    """Бот: события сервера складываются в очередь и разбираются play()."""
+
+    def __init__(self, index: int, url: str, topic_pk: int, args, stats: Stats,
+                 session: aiohttp.ClientSession):
+        self.index = index
+        self.url = url
+        self.topic_pk = topic_pk
+        self.args = args
+        self.stats = stats
+        self.inbox: asyncio.Queue = asyncio.Queue()
+        self.client = socketio.AsyncClient(reconnection=False, http_session=session)
+        for event in ("topics", "game", "over", "error"):
+            self.client.on(event, self._handler(event))
+
+    def _handler(self, event: str):
+        async def handler(data=None):
+            self.inbox.put_nowait((event, data, time.perf_counter()))
+        return handler
+
+    async def receive(self, *events: str) -> tuple[str, object, float]:
+        while True:
+            event, data, at = await asyncio.wait_for(self.inbox.get(), self.args.reply_timeout)
+            if event == "error":
+                self.stats.error(data.get("error", "?") if isinstance(data, dict) else "?")
+                raise RuntimeError(data)
+            if event in events:
+                return event, data, at
+
+    async def connect(self) -> None:
+        await self.client.connect(self.url, transports=["websocket"],
+                                  wait_timeout=self.args.connect_timeout)
+
+    async def play(self, first_round: bool, started: asyncio.Event | None,
+                   hold: asyncio.Event | None) -> None:
+        await self.client.emit("get_topics")
+        await self.receive("topics")
+        await asyncio.sleep(random.uniform(0, self.args.join_spread) if first_round else 0)
+
+        joined = time.perf_counter()
+        await self.client.emit("join_game", {"topic_pk": self.topic_pk,
+                                             "name": f"bot{self.index}"})
+        _, game, at = await self.receive("game")
+        self.stats.matchmaking.append(at - joined)
+        if started is not None:
+            started.set()
+            await hold.wait()
+
+        while True:
+            options = len(game["current_question"]["options"])
+            await asyncio.sleep(random.uniform(self.args.think_min, self.args.think_max))
+            await self.client.emit("answer", {"game_uid": game["uid"],
+                                              "index": random.randint(1, options)})
+            _, feedback, judged = await self.receive("game")
+            event, data, at = await self.receive("game", "over")
+            if event == "over":
+                self.stats.games.add(game["uid"])
+                return
+            self.stats.question.append(max(0.0, at - judged - self.args.delay))
+            game = data
+
+    async def run(self, started: asyncio.Event, hold: asyncio.Event) -> None:
+        try:
+            for n in range(self.args.rounds):
+                first = n == 0
+                await self.play(first, started if first else None, hold if first else None)
+        except Exception:
+            self.stats.failed += 1
+            started.set()
+        finally:
+            await self.client.disconnect()
+
+
+class Server:
+    """Локальный project3 или внешний сервер по --url."""
+
+    def __init__(self, args):
+        self.url = args.url or f"http://127.0.0.1:{args.port}"
+        self.process = None
+        if not args.url:
+            env = dict(os.environ, QUESTION_DELAY=str(args.delay), SIO_LOG="0",
+                       LOBBY_SIZE=str(args.lobby_size))
+            self.process = subprocess.Popen(
+                [sys.executable, "-m", "uvicorn", "project3.main:app_with_socket",
+                 "--port", str(args.port), "--log-level", "warning"],
+                cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            )
+        self.proc = psutil.Process(self.process.pid) if self.process and psutil else None
+
+    def rss(self) -> int | None:
+        return self.proc.memory_info().rss if self.proc is not None else None
+
+    async def wait_ready(self, session: aiohttp.ClientSession) -> None:
+        for _ in range(100):
+            try:
+                async with session.get(f"{self.url}/socket.io/",
+                                       params={"EIO": "4", "transport": "polling"}):
+                    return
+            except aiohttp.ClientError:
+                await asyncio.sleep(0.1)
+        raise RuntimeError("сервер не поднялся")
+
+    def stop(self) -> None:
+        if self.process is not None:
+            self.process.terminate()
+            self.process.wait()
+
+
+async def run(args) -> dict:
+    server = Server(args)
+    stats = Stats()
+    try:
+        # websocket держит соединение пула, лимит aiohttp (100) снимаем
+        async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=0)) as session:
+            await server.wait_ready(session)
+            topics = list(range(1, args.topics + 1))
+            size = args.lobby_size
+            players = [Player(i, server.url, None, args, stats, session)
+                       for i in range(args.players - args.players % size)]
+            for start in range(0, len(players), size):
+                topic_pk = random.choice(topics)
+                for player in players[start:start + size]:
+                    player.topic_pk = topic_pk
+
+            results = await asyncio.gather(*(p.connect() for p in players),
+                                           return_exceptions=True)
+            connected = [p for p, r in zip(players, results) if not isinstance(r, Exception)]
+            await asyncio.sleep(0.5)
+            rss_idle = server.rss()
+
+            started = [asyncio.Event() for _ in connected]
+            hold = asyncio.Event()
+            began = time.perf_counter()
+            tasks = [asyncio.create_task(p.run(s, hold)) for p, s in zip(connected, started)]
+            # первый вопрос (или сбой) у всех ботов: игры первого раунда активны
+            await asyncio.gather(*(event.wait() for event in started))
+            await asyncio.sleep(0.2)
+            rss_games = server.rss()
+            active = len(connected) // size
+            hold.set()
+            await asyncio.gather(*tasks)
+            elapsed = time.perf_counter() - began
+    finally:
+        server.stop()
+
+    per_game = None
+    if rss_idle is not None and rss_games is not None and active:
+        per_game = round((rss_games - rss_idle) / active)
+    return {
+        "players": args.players,
+        "connected": len(connected),
+        "failed": stats.failed,
+        "errors": stats.errors,
+        "rounds": args.rounds,
+        "lobby_size": args.lobby_size,
+        "question_delay_s": args.delay,
+        "games": len(stats.games),
+        "elapsed_s": round(elapsed, 3),
+        "games_per_s": round(len(stats.games) / elapsed, 2) if elapsed else None,
+        "matchmaking": percentiles(stats.matchmaking),
+        "question": percentiles(stats.question),
+        "active_games": active,
+        "rss_idle_mb": round(rss_idle / 2**20, 1) if rss_idle else None,
+        "rss_games_mb": round(rss_games / 2**20, 1) if rss_games else None,
+        "rss_per_game_bytes": per_game,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", help="внешний сервер; без него поднимается project3")
+    parser.add_argument("--port", type=int, default=8013)
+    parser.add_argument("--players", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--topics", type=int, default=3, help="темы 1..topics")
+    parser.add_argument("--lobby-size", type=int, default=2, help="игроков в игре (LOBBY_SIZE)")
+    parser.add_argument("--delay", type=float, default=0.05,
+                        help="QUESTION_DELAY сервера, секунды")
+    parser.add_argument("--think-min", type=float, default=0.0)
+    parser.add_argument("--think-max", type=float, default=0.2)
+    parser.add_argument("--join-spread", type=float, default=1.0)
+    parser.add_argument("--connect-timeout", type=float, default=30)
+    parser.add_argument("--reply-timeout", type=float, default=30)
+    parser.add_argument("--out", help="записать итог в JSON-файл")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    if args.out:
+        Path(args.out).write_text(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+# benchmarks/bench_rate_limit.py
+"""
+Задержка обычных клиентов, пока один клиент заваливает сервер message.
+
+Запуск:
+    python benchmarks/bench_rate_limit.py --clients 50 --duration 10
+
+Сервер app:app поднимается трижды: без ограничений (RATE_LIMITS='{}'),
+с правилами по умолчанию и с ними же плюс отключение флудера. Обычные клиенты раз в 100 мс шлют get_score и
+ждут score; флудер в отдельном процессе шлёт message без пауз.
+Печатаются p50/p99 задержки обычных клиентов и счётчики лимитера;
+--disconnect задаёт RATE_LIMIT_DISCONNECT для прогона с лимитами.
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+import socketio
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def get_token(url: str, user: str) -> str:
+    with urllib.request.urlopen(f"{url}/token?sub={user}") as resp:
+        return resp.read().decode()
+
+
+def wait_ready(url: str) -> None:
+    for _ in range(100):
+        try:
+            get_token(url, "probe")
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("сервер не поднялся")
+
+
+async def flood(url: str, duration: float) -> None:
+    client = socketio.AsyncClient()
+    await client.connect(url, auth={"token": get_token(url, "abuser")}, transports=["websocket"])
+    deadline = time.monotonic() + duration
+    n = 0
+    while time.monotonic() < deadline and client.connected:
+        try:
+            await client.emit("message", {"text": f"spam {n}"})
+        except socketio.exceptions.SocketIOError:
+            break  # сервер отключил флудера
+        n += 1
+        if n % 100 == 0:
+            await asyncio.sleep(0)  # дать клиенту отправить накопленное
+    if client.connected:
+        await client.disconnect()
+
+
+def run_flooder(url: str, duration: float) -> None:
+    asyncio.run(flood(url, duration))
+
+
+async def well_behaved(url: str, user: str, duration: float, latencies: list[float]) -> None:
+    client = socketio.AsyncClient()
+    replies: asyncio.Queue = asyncio.Queue()
+    client.on("score", lambda data: replies.put_nowait(time.perf_counter()))
+    await client.connect(url, auth={"token": get_token(url, user)}, transports=["websocket"])
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        sent = time.perf_counter()
+        await client.emit("get_score")
+        try:
+            received = await asyncio.wait_for(replies.get(), timeout=5)
+        except asyncio.TimeoutError:
+            received = sent + 5
+        latencies.append(received - sent)
+        await asyncio.sleep(0.1)
+    await client.disconnect()
+
+
+def percentile(values: list[float], q: float) -> float:
+    return statistics.quantiles(values, n=100)[int(q) - 1] if len(values) > 1 else 0.0
+
+
+async def measure(url: str, clients: int, duration: float) -> list[float]:
+    latencies: list[float] = []
+    await asyncio.gather(*(
+        well_behaved(url, f"user-{i}", duration, latencies) for i in range(clients)
+    ))
+    return latencies
+
+
+def run(args, rate_limits: str | None, disconnect: int) -> dict:
+    url = f"http://127.0.0.1:{args.port}"
+    env = dict(os.environ, LOG_LEVEL="WARNING")
+    if rate_limits is not None:
+        env["RATE_LIMITS"] = rate_limits
+    env["RATE_LIMIT_DISCONNECT"] = str(disconnect)
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--port", str(args.port),
+         "--log-level", "warning"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_ready(url)
+        baseline = asyncio.run(measure(url, args.clients, 2))
+        flooder = multiprocessing.Process(target=run_flooder, args=(url, args.duration + 1))
+        flooder.start()
+        time.sleep(0.5)
+        loaded = asyncio.run(measure(url, args.clients, args.duration))
+        flooder.join()
+        with urllib.request.urlopen(f"{url}/admin/rate_limits") as resp:
+            stats = json.load(resp)
+    finally:
+        server.terminate()
+        server.wait()
+
+    return {
+        "limits": "off" if rate_limits == "{}" else "default",
+        "disconnect_after": disconnect,
+        "idle_p50_ms": round(percentile(baseline, 50) * 1000, 2),
+        "idle_p99_ms": round(percentile(baseline, 99) * 1000, 2),
+        "flood_p50_ms": round(percentile(loaded, 50) * 1000, 2),
+        "flood_p99_ms": round(percentile(loaded, 99) * 1000, 2),
+        "message_allowed": stats["allowed"].get("message", 0),
+        "message_limited": stats["limited"].get("message", 0),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--port", type=int, default=8011)
+    parser.add_argument("--disconnect", type=int, default=500)
+    args = parser.parse_args()
+
+    print(run(args, "{}", 0))
+    print(run(args, None, 0))
+    print(run(args, None, args.disconnect))
+
+
+if __name__ == "__main__":
+    main()
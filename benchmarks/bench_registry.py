@@ -0,0 +1,64 @@
+# benchmarks/bench_registry.py
+"""
+Память и время реестра соединений.
+
+Запуск:
+    python benchmarks/bench_registry.py --connections 100000
+
+Для разного числа уникальных пользователей меряет байты на соединение
+(tracemalloc) и время add/remove. Байты на соединение не должны расти
+с числом пользователей, время remove — с числом соединений.
+"""
+import argparse
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from registry import ConnectionRegistry  # noqa: E402
+
+
+def run(connections: int, users: int) -> dict:
+    sids = [f"sid-{i:08d}" for i in range(connections)]
+    user_ids = [f"user-{i % users}" for i in range(connections)]
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    registry = ConnectionRegistry()
+    started = time.perf_counter()
+    for sid, user_id in zip(sids, user_ids):
+        registry.add(sid, user_id)
+    add_time = time.perf_counter() - started
+    traced = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    estimate = registry.memory_per_connection()
+
+    started = time.perf_counter()
+    for sid in sids:
+        registry.remove(sid)
+    remove_time = time.perf_counter() - started
+
+    return {
+        "connections": connections,
+        "users": users,
+        "bytes_per_connection": round(traced / connections, 1),
+        "estimate_per_connection": round(estimate, 1),
+        "add_us": round(add_time / connections * 1e6, 3),
+        "remove_us": round(remove_time / connections * 1e6, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--connections", type=int, default=100_000)
+    args = parser.parse_args()
+
+    for users in (1, 100, args.connections // 10, args.connections):
+        print(run(args.connections, max(users, 1)))
+
+
+if __name__ == "__main__":
+    main()
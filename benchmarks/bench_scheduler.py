@@ -0,0 +1,115 @@
+# benchmarks/bench_scheduler.py
+"""
+Сроки игр project3: задача со sleep на каждую игру против Scheduler.
+
+Запуск:
+    python benchmarks/bench_scheduler.py --games 10000 100000 --delay 4
+
+Для games игр ставится по сроку со случайной задержкой до delay секунд,
+половина снимается (игры, где оба ответили раньше срока). Меряется
+прирост памяти процесса (RSS), время постановки на игру и опоздание
+срабатываний (p50/p99/max) относительно заданного срока. Каждый прогон —
+в отдельном процессе, чтобы RSS не делил арены с предыдущим.
+"""
+import argparse
+import asyncio
+import gc
+import multiprocessing
+import random
+import sys
+import time
+from pathlib import Path
+
+import psutil
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from project3.scheduler import Scheduler  # noqa: E402
+
+
+async def run_tasks(delays: list[float], late: list[float]):
+    """Как было в main.py: asyncio.create_task с asyncio.sleep внутри."""
+    loop = asyncio.get_running_loop()
+
+    async def deadline(due: float):
+        await asyncio.sleep(due - loop.time())
+        late.append(loop.time() - due)
+
+    now = loop.time()
+    timers = [asyncio.create_task(deadline(now + d)) for d in delays]
+    return timers, (lambda t: t.cancel()), (lambda: asyncio.gather(*timers, return_exceptions=True))
+
+
+async def run_scheduler(delays: list[float], late: list[float]):
+    loop = asyncio.get_running_loop()
+    scheduler = Scheduler()
+    scheduler.start()
+    done = loop.create_future()
+    left = [len(delays) - len(delays) // 2]
+
+    def deadline(due: float):
+        late.append(loop.time() - due)
+        left[0] -= 1
+        if not left[0]:
+            done.set_result(None)
+
+    now = loop.time()
+    # срок считаем от общего now, как и у задач: постановка тоже занимает время
+    timers = [scheduler.call_later(now + d - loop.time(), deadline, now + d) for d in delays]
+
+    async def wait():
+        await done
+        await scheduler.stop()
+
+    return timers, (lambda t: t.cancel()), wait
+
+
+async def measure(name: str, impl, games: int, delay: float) -> dict:
+    gc.collect()
+    process = psutil.Process()
+    rss_before = process.memory_info().rss
+    delays = [random.uniform(delay / 2, delay) for _ in range(games)]
+    late: list[float] = []
+
+    started = time.perf_counter()
+    timers, cancel, wait = await impl(delays, late)
+    setup = time.perf_counter() - started
+    rss = process.memory_info().rss - rss_before
+    for timer in timers[::2]:
+        cancel(timer)
+    await wait()
+
+    late.sort()
+    pick = lambda q: round(late[min(len(late) - 1, int(q * len(late)))] * 1000, 2)
+    return {
+        "impl": name,
+        "games": games,
+        "rss_mb": round(rss / 2**20, 1),
+        "setup_us": round(setup / games * 1e6, 2),
+        "late_p50_ms": pick(0.50),
+        "late_p99_ms": pick(0.99),
+        "late_max_ms": round(late[-1] * 1000, 2),
+    }
+
+
+IMPLS = {"tasks": run_tasks, "scheduler": run_scheduler}
+
+
+def run(name: str, games: int, delay: float) -> dict:
+    return asyncio.run(measure(name, IMPLS[name], games, delay))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--games", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--delay", type=float, default=4.0)
+    args = parser.parse_args()
+
+    with multiprocessing.get_context("spawn").Pool(1, maxtasksperchild=1) as pool:
+        for games in args.games:
+            for name in IMPLS:
+                print(pool.apply(run, (name, games, args.delay)))
+
+
+if __name__ == "__main__":
+    main()
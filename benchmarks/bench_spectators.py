@@ -0,0 +1,124 @@
+# benchmarks/bench_spectators.py
+"""
+Рассылка игры project3 зрителям: одна игра, S зрителей через spectate.
+
+Запуск:
+    python benchmarks/bench_spectators.py --spectators 1000 --games 3
+
+Без --url поднимает project3, как bench_quiz_players. Два бота играют
+--games игр подряд, отвечая сразу; перед первым ответом каждой игры все
+зрители подключаются к ней событием spectate. Для каждого обновления
+комнаты (вопрос, разбор, over) меряется отставание зрителя от первого
+получателя — сколько занимает веер на S сокетов (p50/p95/p99), и сколько
+обновлений недосчитались.
+"""
+import argparse
+import asyncio
+import random
+import time
+
+import aiohttp
+import socketio
+
+from bench_quiz_players import Server, percentiles
+
+
+class Viewer:
+    """Клиент, который записывает время прихода каждого обновления игры."""
+
+    def __init__(self, url: str, session: aiohttp.ClientSession, seen: dict):
+        self.url = url
+        self.seen = seen
+        self.inbox: asyncio.Queue = asyncio.Queue()
+        self.watching: set[str] = set()
+        self.client = socketio.AsyncClient(reconnection=False, http_session=session)
+        self.client.on("game", self._on_game)
+        self.client.on("over", self._on_over)
+
+    async def _on_game(self, data):
+        if data["uid"] in self.watching:
+            key = (data["uid"], data["question_count"], "feedback" in data)
+            self.seen.setdefault(key, []).append(time.perf_counter())
+        else:
+            self.watching.add(data["uid"])  # снимок по spectate (или первый вопрос) — лично
+        self.inbox.put_nowait(data)
+
+    async def _on_over(self, data):
+        self.seen.setdefault(("over", len(self.watching)), []).append(time.perf_counter())
+        self.inbox.put_nowait(None)
+
+    async def connect(self, timeout: float) -> None:
+        await self.client.connect(self.url, transports=["websocket"], wait_timeout=timeout)
+
+
+async def play(players: list[Viewer], spectators: list[Viewer], args) -> None:
+    for player in players:
+        await player.client.emit("join_game", {"topic_pk": 1, "name": "bot"})
+    game = [await asyncio.wait_for(p.inbox.get(), args.reply_timeout) for p in players][0]
+    for viewer in spectators:
+        await viewer.client.emit("spectate", {"game_uid": game["uid"]})
+    # снимок игры у каждого зрителя — все в комнате
+    await asyncio.gather(*(asyncio.wait_for(v.inbox.get(), args.reply_timeout) for v in spectators))
+    while True:
+        options = len(game["current_question"]["options"])
+        for player in players:
+            await player.client.emit("answer", {"game_uid": game["uid"],
+                                                "index": random.randint(1, options)})
+        for player in players:
+            await asyncio.wait_for(player.inbox.get(), args.reply_timeout)  # разбор
+        updates = [await asyncio.wait_for(p.inbox.get(), args.reply_timeout) for p in players]
+        if updates[0] is None:
+            break
+        game = updates[0]
+    # over у зрителей (по пути — разборы и вопросы)
+    for viewer in spectators:
+        while await asyncio.wait_for(viewer.inbox.get(), args.reply_timeout) is not None:
+            pass
+
+
+async def run(args) -> dict:
+    server = Server(args)
+    seen: dict = {}
+    try:
+        async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=0)) as session:
+            await server.wait_ready(session)
+            players = [Viewer(server.url, session, {}) for _ in range(2)]
+            spectators = [Viewer(server.url, session, seen) for _ in range(args.spectators)]
+            await asyncio.gather(*(v.connect(args.connect_timeout) for v in players + spectators))
+            began = time.perf_counter()
+            for _ in range(args.games):
+                await play(players, spectators, args)
+            elapsed = time.perf_counter() - began
+            for viewer in players + spectators:
+                await viewer.client.disconnect()
+    finally:
+        server.stop()
+
+    lags = [t - min(times) for times in seen.values() for t in times]
+    updates = len(seen)
+    return {
+        "spectators": args.spectators,
+        "games": args.games,
+        "updates": updates,
+        "missing": updates * args.spectators - len(lags),
+        "elapsed_s": round(elapsed, 3),
+        "fanout_lag": percentiles(lags),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", help="внешний сервер; без него поднимается project3")
+    parser.add_argument("--port", type=int, default=8014)
+    parser.add_argument("--spectators", type=int, default=1000)
+    parser.add_argument("--games", type=int, default=3)
+    parser.add_argument("--delay", type=float, default=0.05,
+                        help="QUESTION_DELAY локального сервера, секунды")
+    parser.add_argument("--connect-timeout", type=float, default=60)
+    parser.add_argument("--reply-timeout", type=float, default=60)
+    args = parser.parse_args()
+    print(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
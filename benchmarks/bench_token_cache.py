@@ -0,0 +1,69 @@
+# benchmarks/bench_token_cache.py
+"""
+Проверка JWT при connect: холодный кэш против тёплого.
+
+Запуск:
+    python benchmarks/bench_token_cache.py --connects 50000 --users 50
+
+Холодный прогон — каждый токен проверяется впервые (полный HS256).
+Тёплый — шторм переподключений тех же users токенов, проверка из кэша.
+Меряется только часть connect до регистрации соединения: извлечение
+токена из auth/заголовка и decode_jwt.
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from auth import create_jwt, decode_jwt, token_cache  # noqa: E402
+
+
+def authenticate(auth: dict, environ: dict) -> str | None:
+    """Тот же путь, что в app.connect."""
+    token = auth.get("token")
+    if not token:
+        token = environ.get("HTTP_AUTHORIZATION")
+        if token and token.lower().startswith("bearer "):
+            token = token.split(" ", 1)[1]
+    payload = decode_jwt(token) if token else None
+    if not payload or "sub" not in payload:
+        return None
+    return str(payload["sub"])
+
+
+def connects_per_second(tokens: list[str]) -> float:
+    started = time.perf_counter()
+    for token in tokens:
+        assert authenticate({"token": token}, {}) is not None
+    return len(tokens) / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--connects", type=int, default=50_000)
+    parser.add_argument("--users", type=int, default=50)
+    args = parser.parse_args()
+
+    distinct = [create_jwt(f"user-{i}") for i in range(args.connects)]
+    token_cache.clear()
+    token_cache.maxsize = args.connects
+    cold = connects_per_second(distinct)
+
+    handful = [create_jwt(f"user-{i}") for i in range(args.users)]
+    storm = [handful[i % args.users] for i in range(args.connects)]
+    token_cache.clear()
+    warm = connects_per_second(storm)
+
+    print({
+        "connects": args.connects,
+        "cold_per_s": round(cold),
+        "warm_per_s": round(warm),
+        "speedup": round(warm / cold, 2),
+        "cache_hits": token_cache.hits,
+    })
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# benchmarks/bench_wire.py
+"""
+JSON против MessagePack для типичных пакетов Socket.IO.
+
+Запуск:
+    python benchmarks/bench_wire.py --rounds 2000
+
+Пакеты: update (снимок комнат), topics (список тем project3 с вопросами),
+errors (ошибки валидации Product). Для каждого — байты на проводе и время
+кодирования/декодирования одного пакета так, как это делает сервер.
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from pydantic import ValidationError  # noqa: E402
+from socketio import packet  # noqa: E402
+from socketio.msgpack_packet import MsgPackPacket  # noqa: E402
+
+from project3.trivia_data import load_topics  # noqa: E402
+from wire import encode_msgpack  # noqa: E402
+
+
+def update_payload(rooms: int = 200, members: int = 50) -> dict:
+    return {
+        "version": 123456,
+        "rooms": {
+            f"room-{r}": [f"{r:04d}-sid-{m:04d}-abcdefgh" for m in range(members)]
+            for r in range(rooms)
+        },
+    }
+
+
+def topics_payload() -> list:
+    return [
+        {
+            "pk": t.pk,
+            "name": t.name,
+            "questions": [
+                {"text": q.text, "options": q.options, "correct_index": q.correct_index}
+                for q in t.questions
+            ],
+            "has_players": False,
+        }
+        for t in load_topics()
+    ]
+
+
+def errors_payload() -> dict:
+    # модель из app.py без импорта всего сервера
+    from typing import Annotated
+
+    from pydantic import BaseModel, Field
+
+    class Product(BaseModel):
+        title: Annotated[str, Field(min_length=1, max_length=140)]
+        price: Annotated[float, Field(gt=0)]
+        discount: Annotated[float, Field(ge=0, default=0.0)]
+
+    try:
+        Product(title="", price=-10.0, discount=-5.0)
+    except ValidationError as e:
+        return {"errors": e.errors()}
+
+
+def measure(event: str, payload, rounds: int) -> dict:
+    pkt = packet.Packet(packet.EVENT, data=[event, payload])
+
+    started = time.perf_counter()
+    for _ in range(rounds):
+        as_json = pkt.encode()
+    json_encode = (time.perf_counter() - started) / rounds
+
+    started = time.perf_counter()
+    for _ in range(rounds):
+        packet.Packet(encoded_packet=as_json)
+    json_decode = (time.perf_counter() - started) / rounds
+
+    started = time.perf_counter()
+    for _ in range(rounds):
+        as_msgpack = encode_msgpack(pkt)
+    msgpack_encode = (time.perf_counter() - started) / rounds
+
+    started = time.perf_counter()
+    for _ in range(rounds):
+        MsgPackPacket(encoded_packet=as_msgpack)
+    msgpack_decode = (time.perf_counter() - started) / rounds
+
+    return {
+        "event": event,
+        "json_bytes": len(as_json.encode("utf-8")),
+        "msgpack_bytes": len(as_msgpack),
+        "json_encode_us": round(json_encode * 1e6, 2),
+        "msgpack_encode_us": round(msgpack_encode * 1e6, 2),
+        "json_decode_us": round(json_decode * 1e6, 2),
+        "msgpack_decode_us": round(msgpack_decode * 1e6, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+
+    for event, payload in (
+        ("update", update_payload()),
+        ("topics", topics_payload()),
+        ("errors", errors_payload()),
+    ):
+        print(measure(event, payload, args.rounds))
+
+
+if __name__ == "__main__":
+    main()
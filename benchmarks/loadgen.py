@@ -0,0 +1,354 @@
+# benchmarks/loadgen.py
+"""
+Нагрузочный прогон app.py: тысячи asyncio-клиентов Socket.IO.
+
+Запуск (aiohttp и psutil — из requirements-dev.txt):
+    pip install -r requirements-dev.txt
+    python benchmarks/loadgen.py --scenario default --out results.json
+    python benchmarks/loadgen.py --scenario smoke --clients 200 --server-env CHAT_BATCH_WINDOW=0.02
+    python benchmarks/loadgen.py --url http://host:8000 --scenario chat_heavy
+
+Без --url поднимает app:app отдельным процессом (параметры окружения —
+через --server-env). Фазы прогона:
+  connect        — /token и подключение с JWT, connects/s;
+  chat           — chatters клиентов пишут в цветные комнаты, задержка
+                   доставки остальным участникам (p50/p95/p99);
+  create_product — запрос create_product и ожидание ответа product;
+  join_rooms     — join_room в одну из rooms комнат.
+Клиенты, которых сервер отключил (например, как медленных читателей),
+считаются в dropped_by_server.
+Для каждой фазы снимаются RSS сервера (если он наш) и задержка цикла
+событий (/admin/loop_lag). Итог — JSON: печатается и пишется в --out,
+чтобы прогоны можно было сравнивать.
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import aiohttp
+import socketio
+
+try:
+    import psutil
+except ImportError:  # pragma: no cover - RSS сервера не снимаем
+    psutil = None
+
+ROOT = Path(__file__).resolve().parent.parent
+CHAT_PREFIX = "lg|"
+
+SCENARIOS = {
+    "smoke": {"clients": 50, "chatters": 10, "messages": 5, "products": 5, "rooms": 5},
+    "default": {"clients": 1000, "chatters": 10, "messages": 10, "products": 2, "rooms": 20},
+    "connect_storm": {"clients": 3000, "chatters": 0, "messages": 0, "products": 0, "rooms": 0},
+    "chat_heavy": {"clients": 1000, "chatters": 500, "messages": 20, "products": 0, "rooms": 0},
+}
+
+
+def percentiles(values: list[float]) -> dict:
+    """p50/p95/p99 в миллисекундах."""
+    if len(values) < 2:
+        value = round(values[0] * 1000, 3) if values else None
+        return {"count": len(values), "p50_ms": value, "p95_ms": value, "p99_ms": value}
+    cuts = statistics.quantiles(values, n=100)
+    return {
+        "count": len(values),
+        "p50_ms": round(cuts[49] * 1000, 3),
+        "p95_ms": round(cuts[94] * 1000, 3),
+        "p99_ms": round(cuts[98] * 1000, 3),
+    }
+
+
+class Bot:
+    """Один клиент: подключение, чат, create_product, join_room."""
+
+    def __init__(self, index: int, url: str, session: aiohttp.ClientSession,
+                 fanout: list[float], reply_timeout: float = 10):
+        self.index = index
+        self.url = url
+        self.fanout = fanout
+        self.reply_timeout = reply_timeout
+        self.dropped: str | None = None  # причина, если соединение закрыл не клиент
+        self.client = socketio.AsyncClient(reconnection=False, http_session=session)
+        self.client.on("disconnect", self._on_disconnect)
+        self.replies: dict[str, asyncio.Queue] = {"product": asyncio.Queue(),
+                                                  "score": asyncio.Queue()}
+        self.client.on("message", self._on_message)
+        self.client.on("messages", self._on_messages)
+        self.client.on("product", lambda data: self.replies["product"].put_nowait(data))
+        self.client.on("score", lambda data: self.replies["score"].put_nowait(data))
+
+    def _record(self, text) -> None:
+        if isinstance(text, str) and text.startswith(CHAT_PREFIX):
+            sent = int(text.split("|", 2)[1])
+            self.fanout.append((time.perf_counter_ns() - sent) / 1e9)
+
+    async def _on_disconnect(self, reason=None) -> None:
+        if reason != self.client.reason.CLIENT_DISCONNECT:
+            self.dropped = str(reason)
+
+    async def _on_message(self, data) -> None:
+        if isinstance(data, dict):
+            self._record(data.get("text"))
+
+    async def _on_messages(self, data) -> None:
+        for item in data.get("messages", []):
+            if item.get("sid") != self.client.get_sid():
+                self._record(item.get("text"))
+
+    async def connect(self, token: str, timeout: float) -> float:
+        started = time.perf_counter()
+        await self.client.connect(self.url, auth={"token": token}, transports=["websocket"],
+                                  wait_timeout=timeout)
+        return time.perf_counter() - started
+
+    async def chat(self, text: str) -> None:
+        await self.client.emit("message", {"text": text})
+
+    async def create_product(self, n: int) -> float:
+        started = time.perf_counter()
+        await self.client.emit("create_product", {"title": f"bot {self.index}-{n}", "price": 10.0})
+        await asyncio.wait_for(self.replies["product"].get(), timeout=self.reply_timeout)
+        return time.perf_counter() - started
+
+    async def roundtrip(self) -> float:
+        """get_score -> score: события одного клиента сервер уже разобрал."""
+        started = time.perf_counter()
+        await self.client.emit("get_score")
+        await asyncio.wait_for(self.replies["score"].get(), timeout=self.reply_timeout)
+        return time.perf_counter() - started
+
+
+class Server:
+    """Локальный app:app или внешний сервер по --url."""
+
+    def __init__(self, args):
+        self.url = args.url or f"http://127.0.0.1:{args.port}"
+        self.process = None
+        if not args.url:
+            env = dict(os.environ, LOG_LEVEL="WARNING")
+            env.update(dict(item.split("=", 1) for item in args.server_env))
+            self.process = subprocess.Popen(
+                [sys.executable, "-m", "uvicorn", "app:app", "--port", str(args.port),
+                 "--log-level", "warning"],
+                cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            )
+        self.proc = psutil.Process(self.process.pid) if self.process and psutil else None
+        self.rss_peak = 0
+
+    def rss(self) -> int | None:
+        if self.proc is None:
+            return None
+        rss = self.proc.memory_info().rss
+        self.rss_peak = max(self.rss_peak, rss)
+        return rss
+
+    async def wait_ready(self, session: aiohttp.ClientSession) -> None:
+        for _ in range(100):
+            try:
+                async with session.get(f"{self.url}/token", params={"sub": "probe"}):
+                    return
+            except aiohttp.ClientError:
+                await asyncio.sleep(0.1)
+        raise RuntimeError("сервер не поднялся")
+
+    async def loop_lag(self, session: aiohttp.ClientSession, reset: bool = True) -> dict | None:
+        try:
+            async with session.get(f"{self.url}/admin/loop_lag",
+                                   params={"reset": str(reset).lower()}) as resp:
+                return await resp.json() if resp.status == 200 else None
+        except aiohttp.ClientError:
+            return None
+
+    def stop(self) -> None:
+        if self.process is not None:
+            self.process.terminate()
+            self.process.wait()
+
+
+async def sample_rss(server: Server, stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        server.rss()
+        await asyncio.sleep(0.2)
+
+
+async def phase(name: str, server: Server, session, results: dict, body) -> None:
+    """Выполнить фазу и дописать в results её метрики, RSS и задержку цикла."""
+    await server.loop_lag(session)  # сброс
+    started = time.perf_counter()
+    metrics = await body()
+    metrics["duration_s"] = round(time.perf_counter() - started, 3)
+    metrics["server_rss_mb"] = round(server.rss() / 2**20, 1) if server.proc else None
+    metrics["loop_lag"] = await server.loop_lag(session)
+    results[name] = metrics
+
+
+async def run(args, params: dict) -> dict:
+    server = Server(args)
+    fanout: list[float] = []
+    results: dict = {}
+    dropped: dict[str, int] = {}
+    connector = aiohttp.TCPConnector(limit=0)
+    stop = asyncio.Event()
+    try:
+        async with aiohttp.ClientSession(connector=connector) as session:
+            await server.wait_ready(session)
+            rss_start = server.rss()
+            sampler = asyncio.create_task(sample_rss(server, stop))
+            bots = [Bot(i, server.url, session, fanout, args.reply_timeout)
+                    for i in range(params["clients"])]
+            gate = asyncio.Semaphore(args.concurrency)
+
+            async def connect_all() -> dict:
+                errors: dict[str, int] = {}
+
+                async def one(bot: Bot) -> float | None:
+                    async with gate:
+                        try:
+                            async with session.get(f"{server.url}/token",
+                                                   params={"sub": f"bot-{bot.index}"}) as resp:
+                                token = await resp.text()
+                            return await bot.connect(token, args.connect_timeout)
+                        except Exception as e:
+                            name = type(e).__name__
+                            errors[name] = errors.get(name, 0) + 1
+                            return None
+
+                started = time.perf_counter()
+                times = await asyncio.gather(*(one(bot) for bot in bots))
+                elapsed = time.perf_counter() - started
+                ok = [t for t in times if t is not None]
+                return {"connected": len(ok), "failed": len(times) - len(ok), "errors": errors,
+                        "connects_per_s": round(len(ok) / elapsed, 1),
+                        "connect_latency": percentiles(ok)}
+
+            await phase("connect", server, session, results, connect_all)
+            live = [bot for bot in bots if bot.client.connected]
+
+            def alive() -> list[Bot]:
+                return [bot for bot in live if bot.client.connected]
+
+            async def chat() -> dict:
+                # первое сообщение только выводит из lobby (Модуль 3.1, Задание 5)
+                await asyncio.gather(*(bot.chat("hello") for bot in alive()),
+                                     return_exceptions=True)
+                await asyncio.gather(*(bot.roundtrip() for bot in alive()),
+                                     return_exceptions=True)
+                fanout.clear()
+                chatters = alive()[:params["chatters"]]
+                sent = 0
+
+                async def talk(bot: Bot) -> None:
+                    nonlocal sent
+                    for n in range(params["messages"]):
+                        await bot.chat(f"{CHAT_PREFIX}{time.perf_counter_ns()}|{bot.index}-{n}")
+                        sent += 1
+                        await asyncio.sleep(args.chat_interval)
+
+                await asyncio.gather(*(talk(bot) for bot in chatters), return_exceptions=True)
+                await asyncio.sleep(args.settle)
+                return {"chatters": len(chatters), "sent": sent,
+                        "delivered": len(fanout), "fanout_latency": percentiles(fanout)}
+
+            if params["chatters"] and params["messages"]:
+                await phase("chat", server, session, results, chat)
+
+            async def create_products() -> dict:
+                latencies: list[float] = []
+
+                async def produce(bot: Bot) -> None:
+                    for n in range(params["products"]):
+                        latencies.append(await bot.create_product(n))
+
+                started = time.perf_counter()
+                outcomes = await asyncio.gather(*(produce(bot) for bot in alive()),
+                                                return_exceptions=True)
+                elapsed = time.perf_counter() - started
+                return {"requests": len(latencies),
+                        "failed_clients": sum(1 for o in outcomes if o is not None),
+                        "per_s": round(len(latencies) / elapsed, 1),
+                        "latency": percentiles(latencies)}
+
+            if params["products"]:
+                await phase("create_product", server, session, results, create_products)
+
+            async def join_rooms() -> dict:
+                joiners = alive()
+                started = time.perf_counter()
+                await asyncio.gather(*(
+                    bot.client.emit("join_room", {"room": f"load-{bot.index % params['rooms']}"})
+                    for bot in joiners
+                ), return_exceptions=True)
+                acks = await asyncio.gather(*(bot.roundtrip() for bot in joiners),
+                                            return_exceptions=True)
+                elapsed = time.perf_counter() - started
+                return {"joins": len(joiners), "joins_per_s": round(len(joiners) / elapsed, 1),
+                        "roundtrip_after_join": percentiles(
+                            [a for a in acks if isinstance(a, float)])}
+
+            if params["rooms"]:
+                await phase("join_rooms", server, session, results, join_rooms)
+
+            for bot in live:
+                if bot.dropped:
+                    dropped[bot.dropped] = dropped.get(bot.dropped, 0) + 1
+            await asyncio.gather(*(bot.client.disconnect() for bot in alive()),
+                                 return_exceptions=True)
+            stop.set()
+            await sampler
+    finally:
+        server.stop()
+
+    return {
+        "scenario": args.scenario,
+        "params": {**params, "concurrency": args.concurrency,
+                   "connect_timeout": args.connect_timeout,
+                   "chat_interval": args.chat_interval, "server_env": args.server_env},
+        "started_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "phases": results,
+        "dropped_by_server": dropped,
+        "server": {
+            "rss_start_mb": round(rss_start / 2**20, 1) if rss_start else None,
+            "rss_peak_mb": round(server.rss_peak / 2**20, 1) if server.rss_peak else None,
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), default="default")
+    for key in ("clients", "chatters", "messages", "products", "rooms"):
+        parser.add_argument(f"--{key}", type=int, help="переопределить значение сценария")
+    parser.add_argument("--concurrency", type=int, default=100, help="одновременных connect")
+    parser.add_argument("--connect-timeout", type=float, default=30,
+                        help="ожидание подключения к namespace, с")
+    parser.add_argument("--reply-timeout", type=float, default=10,
+                        help="ожидание ответа product/score, с")
+    parser.add_argument("--chat-interval", type=float, default=0.5, help="пауза чаттера, с")
+    parser.add_argument("--settle", type=float, default=2.0, help="ожидание доставки, с")
+    parser.add_argument("--url", help="внешний сервер вместо локального app:app")
+    parser.add_argument("--port", type=int, default=8030)
+    parser.add_argument("--server-env", action="append", default=[], metavar="KEY=VALUE")
+    parser.add_argument("--out", help="файл для JSON-результата")
+    args = parser.parse_args()
+
+    params = dict(SCENARIOS[args.scenario])
+    for key in params:
+        if getattr(args, key) is not None:
+            params[key] = getattr(args, key)
+
+    result = asyncio.run(run(args, params))
+    text = json.dumps(result, ensure_ascii=False, indent=2)
+    print(text)
+    if args.out:
+        Path(args.out).write_text(text + "\n", encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# chat_batch.py
+import asyncio
+from typing import Awaitable, Callable
+
+from loguru import logger
+
+
+class ChatBatcher:
+    """
+    Микропакетная рассылка чата по комнатам.
+
+    Сообщения, пришедшие в комнату за window секунд, уходят одним кадром
+    (publish(room, items)): участник получает одну запись в сокет на окно,
+    а не на каждое сообщение. Окно открывает первое сообщение после
+    паузы, так что в простое таймеров нет. Комната, набравшая max_batch
+    сообщений, отправляется сразу, не дожидаясь конца окна.
+    """
+
+    def __init__(
+        self,
+        publish: Callable[[str, list[dict]], Awaitable[None]],
+        window: float = 0.02,
+        max_batch: int = 256,
+    ):
+        self._publish = publish
+        self.window = window
+        self.max_batch = max_batch
+        self._pending: dict[str, list[dict]] = {}
+        self._timer: asyncio.Task | None = None
+        self._tasks: set[asyncio.Task] = set()
+        self.frames = 0
+        self.messages = 0
+
+    def add(self, room: str, item: dict) -> None:
+        batch = self._pending.setdefault(room, [])
+        batch.append(item)
+        if len(batch) >= self.max_batch:
+            del self._pending[room]
+            self._spawn(self._send(room, batch))
+        if self._timer is None:
+            self._timer = asyncio.create_task(self._flush_later())
+
+    async def flush(self) -> None:
+        """
+        Отправить всё накопленное сейчас.
+        """
+        pending, self._pending = self._pending, {}
+        for room, items in pending.items():
+            await self._send(room, items)
+
+    async def close(self) -> None:
+        """
+        Остановить таймер и дослать накопленное (при остановке сервера).
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        await self.flush()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.window)
+        self._timer = None
+        await self.flush()
+
+    async def _send(self, room: str, items: list[dict]) -> None:
+        self.frames += 1
+        self.messages += len(items)
+        try:
+            await self._publish(room, items)
+        except Exception:
+            logger.exception("Не удалось разослать пачку чата в {}", room)
+
+    def _spawn(self, coro) -> None:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
@@ -0,0 +1,83 @@
+# client_index.py
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, NamedTuple
+
+
+class Page(NamedTuple):
+    body: str
+    etag: str
+    total: int
+
+
+class ClientIndex:
+    """
+    Список клиентов для GET /: снимок sids живёт ttl секунд, страницы
+    сериализуются один раз на снимок.
+
+    Пока снимок свежий, запрос стоит поиска в словаре страниц; загрузка
+    снимка одна на всех одновременных запросах. ETag страницы — хэш
+    снимка и границы страницы, так что If-None-Match отвечает 304, пока
+    список не изменился.
+
+    Страниц в кэше не больше max_pages (LRU, сбрасывается со снимком);
+    offset за концом списка — пустая страница "[]", её не кэшируем.
+    """
+
+    def __init__(
+        self,
+        load: Callable[[], Awaitable[list[str]]],
+        ttl: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+        max_pages: int = 32,
+    ):
+        self._load = load
+        self.ttl = ttl
+        self.max_pages = max_pages
+        self._clock = clock
+        self._sids: list[str] = []
+        self._digest = ""
+        self._loaded_at: float | None = None
+        self._pages: OrderedDict[tuple[int, int], Page] = OrderedDict()
+        self._loading: asyncio.Future | None = None
+        self.loads = 0
+
+    async def page(self, offset: int, limit: int) -> Page:
+        await self._refresh()
+        total = len(self._sids)
+        offset = min(offset, total)
+        if offset == total:
+            return Page("[]", f'"{self._digest}-{total}-0"', total)
+        key = (offset, limit)
+        page = self._pages.get(key)
+        if page is not None:
+            self._pages.move_to_end(key)
+            return page
+        body = json.dumps(self._sids[offset:offset + limit], ensure_ascii=False)
+        page = self._pages[key] = Page(body, f'"{self._digest}-{offset}-{limit}"', total)
+        if len(self._pages) > self.max_pages:
+            self._pages.popitem(last=False)
+        return page
+
+    async def _refresh(self) -> None:
+        if self._loaded_at is not None and self._clock() - self._loaded_at < self.ttl:
+            return
+        if self._loading is None:
+            self._loading = asyncio.ensure_future(self._reload())
+        await asyncio.shield(self._loading)
+
+    async def _reload(self) -> None:
+        try:
+            sids = await self._load()
+            digest = hashlib.blake2b("\n".join(sids).encode(), digest_size=8).hexdigest()
+            if digest != self._digest:
+                self._sids, self._digest = sids, digest
+                self._pages.clear()
+            self._loaded_at = self._clock()
+            self.loads += 1
+        finally:
+            self._loading = None
+
@@ -0,0 +1,85 @@
+# logging_setup.py
+import asyncio
+import sys
+
+from loguru import logger
+
+LOG_FORMAT = "<green>{time}</green> <level>{level}</level> {message}"
+LOG_FILE = "logs.log"
+
+_state = {"level": None, "handlers": []}
+
+
+def _add_handlers(level: str) -> list[int]:
+    return [
+        logger.add(sys.stdout, colorize=True, level=level, format=LOG_FORMAT,
+                   enqueue=True),
+        logger.add(LOG_FILE, level=level, format=LOG_FORMAT, rotation="10 MB",
+                   enqueue=True),
+    ]
+
+
+def configure_logging(level: str = "INFO") -> None:
+    """
+    Консоль + logs.log через очередь (enqueue=True): запись в файл идёт
+    в фоновом потоке и не блокирует цикл событий.
+
+    Уровень задаётся при добавлении обработчиков, поэтому loguru отбрасывает
+    сообщения ниже уровня ещё до форматирования аргументов: в обработчиках
+    пишем logger.info("... {}", value), а не f-строки.
+    """
+    level = level.upper()
+    logger.level(level)  # ValueError, если такого уровня нет
+    old = _state["handlers"]
+    if _state["level"] is None:
+        logger.remove()  # стандартный обработчик loguru
+    _state.update(level=level, handlers=_add_handlers(level))
+    for handler_id in old:
+        logger.remove(handler_id)
+
+
+async def set_level(level: str) -> str:
+    """
+    Сменить уровень на лету: сначала новые обработчики с тем же форматом,
+    потом снять старые. logger.remove у enqueue-обработчика ждёт его фоновый
+    поток, поэтому снимаем в отдельном потоке, а не в цикле событий.
+    """
+    level = level.upper()
+    logger.level(level)  # ValueError, если такого уровня нет
+    old = _state["handlers"]
+    _state.update(level=level, handlers=_add_handlers(level))
+    for handler_id in old:
+        await asyncio.to_thread(logger.remove, handler_id)
+    return level
+
+
+def get_level() -> str | None:
+    return _state["level"]
+
+
+class LogSampler:
+    """
+    Сэмплирование логов горячих событий: пишем 1 из N.
+
+    rates: событие -> N (1 — логировать каждое, 0 — не логировать вовсе).
+    События без настройки логируются всегда.
+    """
+
+    def __init__(self, rates: dict[str, int] | None = None):
+        self.rates: dict[str, int] = dict(rates or {})
+        self._counts: dict[str, int] = {}
+
+    def hit(self, event: str) -> bool:
+        rate = self.rates.get(event, 1)
+        if rate <= 1:
+            return rate == 1
+        count = self._counts.get(event, 0) + 1
+        if count >= rate:
+            self._counts[event] = 0
+            return True
+        self._counts[event] = count
+        return False
+
+    def set_rate(self, event: str, rate: int) -> None:
+        self.rates[event] = rate
+        self._counts.pop(event, None)
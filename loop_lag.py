@@ -0,0 +1,47 @@
+# loop_lag.py
+import asyncio
+import time
+from collections import deque
+
+from background import BackgroundTask, percentile
+
+
+class LoopLagMonitor(BackgroundTask):
+    """
+    Задержка цикла событий: фоновая задача засыпает на interval секунд
+    и меряет, насколько позже она проснулась. Хранит последние samples
+    замеров и максимум с последнего сброса.
+    """
+
+    def __init__(self, interval: float = 0.1, samples: int = 600):
+        self.interval = interval
+        self.lags: deque[float] = deque(maxlen=samples)
+        self.max_lag = 0.0
+
+    def record(self, lag: float) -> None:
+        self.lags.append(lag)
+        if lag > self.max_lag:
+            self.max_lag = lag
+
+    async def run(self) -> None:
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.record(max(0.0, time.perf_counter() - started - self.interval))
+
+    def stats(self) -> dict:
+        """
+        p50/p99/max задержки в миллисекундах по накопленным замерам.
+        """
+        ordered = sorted(self.lags)
+
+        return {
+            "samples": len(ordered),
+            "p50_ms": round(percentile(ordered, 0.50) * 1000, 3),
+            "p99_ms": round(percentile(ordered, 0.99) * 1000, 3),
+            "max_ms": round(self.max_lag * 1000, 3),
+        }
+
+    def reset(self) -> None:
+        self.lags.clear()
+        self.max_lag = 0.0
@@ -0,0 +1,284 @@
+# metrics.py
+"""
+Метрики процесса в текстовом формате Prometheus (/metrics).
+
+Всё считается в памяти заранее: гистограмма — список счётчиков по
+корзинам, счётчики кадров — словари имя события -> число. Сервер
+однопоточный (asyncio), поэтому на горячем пути нет ни блокировок, ни
+выделения памяти сверх первого появления события; разбор в текст
+делается только при запросе /metrics.
+
+instrument(sio, metrics) — обёртка каждого зарегистрированного обработчика
+@sio.event и подсчёт исходящих кадров сервера Socket.IO:
+  <prefix>_handler_seconds          — гистограмма времени обработчика по событию;
+  <prefix>_handler_emit_seconds     — из него: ожидание sio.emit;
+  <prefix>_handler_exceptions_total — исключения по событию и типу;
+  <prefix>_emitted_frames_total     — кадры, ушедшие клиентам, по событию;
+  <prefix>_emitted_bytes_total      — их размер в байтах.
+Широковещательный emit кодируется один раз и шлётся каждому получателю
+тем же объектом пакета — имя события и размер берутся из кэша. Кадры
+из wire (JSON и MessagePack) помечены исходным пакетом, и имя берётся
+из него без разбора кадра.
+Остальное (соединения, комнаты, игры) приложение регистрирует через
+gauge()/counter() как функции, которые вызываются при чтении.
+"""
+import functools
+import inspect
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Awaitable, Callable
+
+import socketio
+from engineio import packet as eio_packet
+from socketio import packet
+
+from wire import text_event_name
+
+try:
+    from socketio.msgpack_packet import MsgPackPacket
+except ImportError:  # pragma: no cover - msgpack не установлен
+    MsgPackPacket = None
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# секунды: от 0.1 мс до 10 с
+DEFAULT_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+    0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+_PACKET_NAMES = {
+    packet.CONNECT: "_connect",
+    packet.DISCONNECT: "_disconnect",
+    packet.ACK: "_ack",
+    packet.CONNECT_ERROR: "_connect_error",
+    packet.BINARY_ACK: "_ack",
+}
+
+
+class Histogram:
+    """Корзины храним не накопленными: observe — один bisect и два сложения."""
+
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> list[int]:
+        total, out = 0, []
+        for n in self.counts:
+            total += n
+            out.append(total)
+        return out
+
+
+Reader = Callable[[], float | int | Awaitable[float | int]]
+
+
+class Metrics:
+    """Реестр метрик одного процесса."""
+
+    def __init__(self, prefix: str = "sio", buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.prefix = prefix
+        self.buckets = buckets
+        self.handler_seconds: dict[str, Histogram] = {}
+        self.emit_seconds: dict[str, Histogram] = {}
+        self.exceptions: dict[tuple[str, str], int] = {}
+        self.frames: dict[str, int] = {}
+        self.bytes: dict[str, int] = {}
+        self._readers: list[tuple[str, str, str, Reader]] = []
+
+    def observe(self, event: str, seconds: float, emit_seconds: float = 0.0) -> None:
+        hist = self.handler_seconds.get(event)
+        if hist is None:
+            hist = self.handler_seconds[event] = Histogram(self.buckets)
+            self.emit_seconds[event] = Histogram(self.buckets)
+        hist.observe(seconds)
+        self.emit_seconds[event].observe(emit_seconds)
+
+    def count_exception(self, event: str, exc: BaseException) -> None:
+        key = (event, type(exc).__name__)
+        self.exceptions[key] = self.exceptions.get(key, 0) + 1
+
+    def count_frame(self, event: str, size: int) -> None:
+        self.frames[event] = self.frames.get(event, 0) + 1
+        self.bytes[event] = self.bytes.get(event, 0) + size
+
+    def gauge(self, name: str, help: str, read: Reader) -> None:
+        """
+        Текущее значение: read() (можно корутину) вызывается при чтении.
+        """
+        self._readers.append((name, "gauge", help, read))
+
+    def counter(self, name: str, help: str, read: Reader) -> None:
+        """
+        Монотонный счётчик, который уже ведёт приложение.
+        """
+        self._readers.append((name, "counter", help, read))
+
+    async def render(self) -> str:
+        p = self.prefix
+        lines: list[str] = []
+        _render_histograms(lines, f"{p}_handler_seconds",
+                           "Время обработчика события Socket.IO", self.handler_seconds)
+        _render_histograms(lines, f"{p}_handler_emit_seconds",
+                           "Ожидание sio.emit внутри обработчика", self.emit_seconds)
+
+        lines.append(f"# HELP {p}_handler_exceptions_total Исключения обработчиков")
+        lines.append(f"# TYPE {p}_handler_exceptions_total counter")
+        for (event, kind), value in sorted(self.exceptions.items()):
+            lines.append(
+                f"{p}_handler_exceptions_total{{event={_label(event)},type={_label(kind)}}} {value}"
+            )
+
+        for name, help, values in (
+            ("emitted_frames_total", "Кадры, отправленные клиентам", self.frames),
+            ("emitted_bytes_total", "Байты, отправленные клиентам", self.bytes),
+        ):
+            lines.append(f"# HELP {p}_{name} {help}")
+            lines.append(f"# TYPE {p}_{name} counter")
+            for event, value in sorted(values.items()):
+                lines.append(f"{p}_{name}{{event={_label(event)}}} {value}")
+
+        for name, kind, help, read in self._readers:
+            value = read()
+            if inspect.isawaitable(value):
+                value = await value
+            lines.append(f"# HELP {p}_{name} {help}")
+            lines.append(f"# TYPE {p}_{name} {kind}")
+            lines.append(f"{p}_{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _render_histograms(lines: list[str], name: str, help: str,
+                       hists: dict[str, Histogram]) -> None:
+    lines.append(f"# HELP {name} {help}")
+    lines.append(f"# TYPE {name} histogram")
+    for event, hist in sorted(hists.items()):
+        label = _label(event)
+        for bound, total in zip((*hist.bounds, "+Inf"), hist.cumulative()):
+            lines.append(f'{name}_bucket{{event={label},le="{bound}"}} {total}')
+        lines.append(f"{name}_sum{{event={label}}} {hist.sum:.6f}")
+        lines.append(f"{name}_count{{event={label}}} {hist.count}")
+
+
+def _label(value: str) -> str:
+    escaped = value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return f'"{escaped}"'
+
+
+def frame_event(pkt) -> tuple[str, int] | None:
+    """
+    (имя события, размер в байтах) исходящего engine.io-кадра; служебные
+    кадры Socket.IO получают имя вида "_ack", ping/pong — None.
+    """
+    if pkt.packet_type != eio_packet.MESSAGE:
+        return None
+    data = pkt.data
+    size = len(data.encode()) if isinstance(data, str) else len(data)
+    source = getattr(data, "packet", None)  # wire._EncodedText / wire._EncodedBytes
+    if source is not None:
+        kind, args = source.packet_type, source.data
+        name = args[0] if kind in (packet.EVENT, packet.BINARY_EVENT) and args else None
+    elif isinstance(data, str):
+        kind = int(data[0]) if data[:1].isdigit() else -1
+        name = text_event_name(data) if kind in (packet.EVENT, packet.BINARY_EVENT) else None
+    else:
+        if MsgPackPacket is None:
+            return "_binary", size
+        try:
+            source = MsgPackPacket(encoded_packet=data)
+        except Exception:
+            return "_binary", size
+        kind, args = source.packet_type, source.data
+        name = args[0] if kind in (packet.EVENT, packet.BINARY_EVENT) and args else None
+    if name is None:
+        name = _PACKET_NAMES.get(kind, "_other")
+    return str(name), size
+
+
+# накопленное ожидание emit текущего обработчика (None — вне обработчика)
+_emit_wait: ContextVar[list[float] | None] = ContextVar("emit_wait", default=None)
+
+
+def instrument(sio: socketio.AsyncServer, metrics: Metrics, namespace: str = "/") -> None:
+    """
+    Мерить обработчики событий sio и исходящие кадры.
+
+    Оборачивает обработчики, уже зарегистрированные в sio.handlers[namespace],
+    поэтому вызывается после всех @sio.event. Меряются только события с
+    обработчиком, так что клиент не может завести гистограммы под
+    произвольные имена (всё, что поймал catch-all, идёт под именем "*").
+    Исключение обработчика считается и пробрасывается дальше как было.
+    Кадры считаются в публичном sio.eio.send_packet.
+    """
+    handlers = sio.handlers.get(namespace, {})
+    for event, handler in list(handlers.items()):
+        handlers[event] = _timed_handler(handler, event, metrics)
+
+    emit = sio.emit
+
+    async def timed_emit(*args, **kwargs):
+        emit_wait = _emit_wait.get()
+        if emit_wait is None:
+            return await emit(*args, **kwargs)
+        started = time.perf_counter()
+        try:
+            return await emit(*args, **kwargs)
+        finally:
+            emit_wait[0] += time.perf_counter() - started
+
+    sio.emit = timed_emit
+
+    send_packet = sio.eio.send_packet
+    last = [None, None]  # последний пакет и его (событие, размер)
+
+    async def counted_send_packet(eio_sid, pkt):
+        if pkt is last[0]:
+            seen = last[1]
+        else:
+            seen = frame_event(pkt)
+            last[0], last[1] = pkt, seen
+        if seen is not None:
+            metrics.count_frame(*seen)
+        return await send_packet(eio_sid, pkt)
+
+    sio.eio.send_packet = counted_send_packet
+
+
+def _timed_handler(handler, event: str, metrics: Metrics):
+    is_async = inspect.iscoroutinefunction(handler)
+
+    @functools.wraps(handler)
+    async def timed(*args):
+        emit_wait = [0.0]
+        token = _emit_wait.set(emit_wait)
+        started = time.perf_counter()
+        try:
+            return await handler(*args) if is_async else handler(*args)
+        except TypeError as exc:
+            # connect/disconnect старой сигнатуры: сервер повторит вызов
+            # с меньшим числом аргументов
+            if event in ("connect", "disconnect"):
+                started = None
+            else:
+                metrics.count_exception(event, exc)
+            raise
+        except Exception as exc:
+            metrics.count_exception(event, exc)
+            raise
+        finally:
+            _emit_wait.reset(token)
+            if started is not None:
+                metrics.observe(event, time.perf_counter() - started, emit_wait[0])
+
+    return timed
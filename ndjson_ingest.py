@@ -0,0 +1,179 @@
+# ndjson_ingest.py
+"""
+Потоковый приём NDJSON: тело запроса читается кусками, строки
+валидируются пачками по chunk_lines, результаты уходят клиенту сразу.
+
+В памяти одновременно живут только текущий кусок тела и одна пачка
+строк (не больше chunk_lines × max_line байт), поэтому расход памяти не
+зависит от размера загрузки.
+"""
+import json
+from typing import AsyncIterator, Awaitable, Callable
+
+from starlette.requests import ClientDisconnect
+from starlette.responses import StreamingResponse
+
+from batch_validation import BatchValidator
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse, который отвечает, пока ещё читается тело запроса.
+
+    Обычный StreamingResponse (ASGI spec < 2.4) параллельно слушает
+    receive() в ожидании disconnect и забирал бы себе куски тела.
+    Здесь receive() читает только генератор ответа; обрыв соединения он
+    и так увидит как ClientDisconnect.
+    """
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await self.stream_response(send)
+        except OSError:
+            raise ClientDisconnect()
+        if self.background is not None:
+            await self.background()
+
+
+def _line_error(error_type: str, msg: str) -> list[dict]:
+    return [{"type": error_type, "loc": [], "msg": msg}]
+
+
+async def iter_line_chunks(
+    stream: AsyncIterator[bytes],
+    chunk_lines: int = 1000,
+    max_line: int = 64 * 1024,
+) -> AsyncIterator[list[tuple[int, bytes | None]]]:
+    """
+    Разбить поток байтов на пачки (номер строки, строка) по chunk_lines.
+
+    Номера строк начинаются с 1, пустые строки пропускаются.
+    Строка длиннее max_line не накапливается: вместо неё — None.
+    """
+    pending: list[tuple[int, bytes | None]] = []
+    buffer = bytearray()
+    line_no = 0
+    overflow = False  # текущая строка уже длиннее max_line, ждём её конца
+
+    def take(line: bytes | None) -> None:
+        nonlocal line_no
+        line_no += 1
+        if line is None or line.strip():
+            pending.append((line_no, line))
+
+    async for data in stream:
+        *complete, tail = data.split(b"\n")
+        for part in complete:
+            if overflow:
+                take(None)
+                overflow = False
+            elif buffer:
+                buffer += part
+                take(None if len(buffer) > max_line else bytes(buffer))
+                buffer.clear()
+            else:
+                take(None if len(part) > max_line else part)
+            if len(pending) >= chunk_lines:
+                yield pending
+                pending = []
+        if not overflow:
+            buffer += tail
+            if len(buffer) > max_line:
+                buffer.clear()
+                overflow = True
+
+    if overflow:
+        take(None)
+    elif buffer:
+        take(bytes(buffer))
+    if pending:
+        yield pending
+
+
+def validate_lines(
+    validator: BatchValidator, lines: list[tuple[int, bytes | None]]
+) -> tuple[list[dict], list[dict]]:
+    """
+    Разобрать и провалидировать пачку строк.
+
+    Вернуть (принятые объекты, ошибки вида {"line": n, "errors": [...]}).
+    Обычно пачка склеивается в один JSON-массив и разбирается вместе с
+    валидацией в pydantic-core; только если в ней есть битый JSON или
+    слишком длинные строки, строки разбираются по одной.
+    """
+    if all(raw is not None for _, raw in lines):
+        accepted, item_errors = validator.validate_json(
+            b"[" + b",".join(raw for _, raw in lines) + b"]"
+        )
+        # строка вида {...},{...} дала бы лишний элемент и сдвинула номера
+        whole = not item_errors or item_errors[0]["index"] is not None
+        if whole and len(accepted) + len(item_errors) == len(lines):
+            return accepted, [
+                {"line": lines[error["index"]][0], "errors": error["errors"]}
+                for error in item_errors
+            ]
+
+    items, item_lines, errors = [], [], []
+    for line_no, raw in lines:
+        if raw is None:
+            errors.append({"line": line_no, "errors": _line_error(
+                "line_too_long", "Line is too long")})
+            continue
+        try:
+            items.append(json.loads(raw.decode()))
+        except ValueError as e:
+            errors.append({"line": line_no, "errors": _line_error("json_invalid", str(e))})
+            continue
+        item_lines.append(line_no)
+
+    accepted, item_errors = validator.validate(items)
+    for error in item_errors:
+        errors.append({"line": item_lines[error["index"]], "errors": error["errors"]})
+    errors.sort(key=lambda e: e["line"])
+    return accepted, errors
+
+
+def _encode(obj: dict) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, default=str).encode() + b"\n"
+
+
+async def ingest(
+    stream: AsyncIterator[bytes],
+    validator: BatchValidator,
+    on_accepted: Callable[[list[dict]], Awaitable[None]] | None = None,
+    chunk_lines: int = 1000,
+    max_line: int = 64 * 1024,
+) -> AsyncIterator[bytes]:
+    """
+    Принять NDJSON-поток и выдать NDJSON-результаты.
+
+    На каждую отклонённую строку — {"line": n, "errors": [...]}; после
+    каждой пачки — {"lines": [первая, последняя], "accepted": a,
+    "rejected": r} (все строки диапазона без своей ошибки приняты);
+    в конце — {"done": true, "lines": ..., "accepted": ..., "rejected": ...}.
+
+    Принятые объекты пачки передаются в on_accepted одним вызовом.
+    """
+    total_lines = total_accepted = total_rejected = 0
+    async for lines in iter_line_chunks(stream, chunk_lines, max_line):
+        accepted, errors = validate_lines(validator, lines)
+        if accepted and on_accepted is not None:
+            await on_accepted(accepted)
+        for error in errors:
+            yield _encode(error)
+        total_lines = lines[-1][0]
+        total_accepted += len(accepted)
+        total_rejected += len(errors)
+        yield _encode({
+            "lines": [lines[0][0], total_lines],
+            "accepted": len(accepted),
+            "rejected": len(errors),
+        })
+    yield _encode({
+        "done": True,
+        "lines": total_lines,
+        "accepted": total_accepted,
+        "rejected": total_rejected,
+    })
@@ -0,0 +1,176 @@
+# outbound.py
+"""
+Ограниченная исходящая очередь на каждое соединение.
+
+Engine.IO складывает кадры для клиента в socket.queue, а писатель
+отправляет их по мере того, как клиент читает. У медленного клиента эта
+очередь росла без предела. OutboundQueue подменяет её (через фабрику
+eio.create_queue) и, когда у клиента накопился хвост, применяет
+политику по типу события:
+
+  latest     — состояние (update, online, ...): в очереди держим только
+               последний кадр, новый заменяет старый на его месте;
+  disconnect — чат: выше high_water клиент отключается;
+  остальное  — выше high_water новые кадры отбрасываются.
+
+Пока очередь короче backlog кадров, пакеты не разбираются вовсе; дальше
+у JSON-кадра читается только имя события, а данные — лишь для событий
+из peek, ключ которых от них зависит.
+Служебные пакеты (connect, ack, disconnect, ping) не трогаются никогда.
+"""
+import asyncio
+from collections import deque
+from typing import Callable
+
+import socketio
+from engineio import packet as eio_packet
+from socketio import packet
+
+from wire import text_event_name
+
+try:
+    from socketio.msgpack_packet import MsgPackPacket
+except ImportError:  # pragma: no cover - msgpack не установлен
+    MsgPackPacket = None
+
+_EVENTS = (packet.EVENT, packet.BINARY_EVENT)
+
+
+def event_of(pkt, peek: set[str] = frozenset()) -> tuple[str, object] | None:
+    """
+    (имя события, данные) для engine.io-пакета с событием Socket.IO, иначе
+    None. JSON-текст целиком разбирается только для событий из peek,
+    у остальных данные — None.
+    """
+    if pkt is None or pkt.packet_type != eio_packet.MESSAGE:
+        return None
+    data = pkt.data
+    source = getattr(data, "packet", None)  # wire._EncodedText
+    try:
+        if source is None and isinstance(data, str):
+            if not data.startswith("2"):
+                return None
+            name = text_event_name(data)
+            if name is None:
+                return None
+            if name not in peek:
+                return name, None
+            source = packet.Packet(encoded_packet=data)
+        elif source is None and isinstance(data, (bytes, bytearray)) and MsgPackPacket:
+            source = MsgPackPacket(encoded_packet=data)
+    except Exception:
+        return None
+    if source is None or source.packet_type not in _EVENTS or not source.data:
+        return None
+    args = source.data
+    return args[0], args[1] if len(args) > 1 else None
+
+
+class OutboundPolicy:
+    """
+    Политика для всех очередей: пороги и что делать с каким событием.
+
+    key(event, data) даёт ключ политики: по умолчанию имя события, но
+    приложение может различать, например, "message" с online и с текстом.
+    peek — события, для которых key нужны данные (у прочих data=None).
+    """
+
+    def __init__(
+        self,
+        high_water: int = 256,
+        backlog: int = 16,
+        latest: set[str] = frozenset(),
+        disconnect: set[str] = frozenset(),
+        key: Callable[[str, object], str] | None = None,
+        peek: set[str] = frozenset(),
+    ):
+        self.high_water = high_water
+        self.backlog = min(backlog, high_water)
+        self.latest = set(latest)
+        self.disconnect = set(disconnect)
+        self.key = key or (lambda event, data: event)
+        self.peek = frozenset(peek)
+
+
+class OutboundQueue(asyncio.Queue):
+    """
+    Очередь кадров одного engine.io-сокета с политикой OutboundPolicy.
+
+    on_overflow вызывается один раз, когда событие с политикой disconnect
+    не помещается под high_water (приложение отключает клиента).
+    """
+
+    def __init__(self, policy: OutboundPolicy):
+        super().__init__()
+        self.policy = policy
+        self.on_overflow: Callable[[], None] | None = None
+        self.overflowed = False
+        self.coalesced = 0
+        self.dropped = 0
+
+    def _init(self, maxsize):
+        self._queue = deque()
+        self._latest: dict[str, object] = {}     # ключ -> кадр в очереди
+        self._latest_keys: dict[int, str] = {}   # id(кадр) -> ключ
+
+    def _get(self):
+        pkt = self._queue.popleft()
+        key = self._latest_keys.pop(id(pkt), None)
+        if key is not None:
+            del self._latest[key]
+        return pkt
+
+    def put_nowait(self, pkt):
+        if len(self._queue) < self.policy.backlog:
+            return super().put_nowait(pkt)
+        event = event_of(pkt, self.policy.peek)
+        if event is None:
+            return super().put_nowait(pkt)
+
+        policy = self.policy
+        key = policy.key(*event)
+        if key in policy.latest:
+            queued = self._latest.get(key)
+            if queued is not None:
+                self._replace(queued, pkt, key)
+                self.coalesced += 1
+                return None
+            super().put_nowait(pkt)
+            self._latest[key] = pkt
+            self._latest_keys[id(pkt)] = key
+            return None
+
+        if len(self._queue) < policy.high_water:
+            return super().put_nowait(pkt)
+        self.dropped += 1
+        if key in policy.disconnect and not self.overflowed:
+            self.overflowed = True
+            if self.on_overflow is not None:
+                self.on_overflow()
+        return None
+
+    def _replace(self, queued, pkt, key: str) -> None:
+        for index, item in enumerate(self._queue):
+            if item is queued:
+                self._queue[index] = pkt
+                break
+        del self._latest_keys[id(queued)]
+        self._latest[key] = pkt
+        self._latest_keys[id(pkt)] = key
+
+
+def install(sio: socketio.AsyncServer, policy: OutboundPolicy) -> None:
+    """
+    Создавать очереди новых engine.io-сокетов как OutboundQueue.
+    """
+    sio.eio.create_queue = lambda *args, **kwargs: OutboundQueue(policy)
+
+
+def queue_of(sio: socketio.AsyncServer, sid: str, namespace: str = "/") -> OutboundQueue | None:
+    """
+    Исходящая очередь соединения sid (если она OutboundQueue).
+    """
+    eio_sid = sio.manager.eio_sid_from_sid(sid, namespace)
+    socket = sio.eio.sockets.get(eio_sid) if eio_sid is not None else None
+    queue = getattr(socket, "queue", None)
+    return queue if isinstance(queue, OutboundQueue) else None
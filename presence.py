@@ -0,0 +1,56 @@
+# presence.py
+import inspect
+from typing import Awaitable, Callable, Union
+
+from background import BackgroundTask, every
+
+
+class PresenceAggregator(BackgroundTask):
+    """
+    Счётчик онлайна с отложенной публикацией.
+
+    Подключения и отключения только помечают значение «грязным»;
+    фоновая задача раз в interval секунд публикует его подписчикам,
+    и только если оно изменилось с прошлой публикации.
+
+    count может быть корутиной (общий счётчик в другом процессе). При poll=True
+    значение сверяется каждый тик, даже если локально ничего не помечено.
+    """
+
+    def __init__(
+        self,
+        count: Callable[[], Union[int, Awaitable[int]]],
+        publish: Callable[[int], Awaitable[None]],
+        interval: float = 0.25,
+        poll: bool = False,
+    ):
+        self.count = count
+        self._publish = publish
+        self.interval = interval
+        self.poll = poll
+        self.dirty = False
+        self.last_published: int | None = None
+        self.published = 0
+
+    def mark_dirty(self) -> None:
+        self.dirty = True
+
+    async def flush(self) -> bool:
+        """
+        Опубликовать значение, если оно помечено и изменилось.
+        """
+        if not (self.dirty or self.poll):
+            return False
+        self.dirty = False
+        value = self.count()
+        if inspect.isawaitable(value):
+            value = await value
+        if value == self.last_published:
+            return False
+        self.last_published = value
+        self.published += 1
+        await self._publish(value)
+        return True
+
+    async def run(self) -> None:
+        await every(self.interval, self.flush, "Не удалось опубликовать онлайн")
@@ -0,0 +1,82 @@
+# profiler.py
+"""
+Сэмплирующий профайлер по требованию.
+
+Отдельный поток раз в interval секунд снимает стек потока цикла событий
+(sys._current_frames) и считает одинаковые стеки. Сам цикл событий ничего
+не делает: цена — один захват GIL на замер, при 200 Гц это доли процента.
+Результат — collapsed stacks ("корень;...;лист N" на строку), формат
+flamegraph.pl, speedscope и inferno.
+
+Пока цикл простаивает, вершина стека — select/epoll; всё остальное —
+время, в которое цикл был занят (обработчики, кодирование, логирование).
+"""
+import os
+import sys
+import threading
+from collections import Counter
+from types import CodeType
+
+
+class SamplingProfiler:
+    """
+    Один прогон профайлера: start() -> ... -> stop() -> collapsed().
+    """
+
+    def __init__(self, interval: float = 0.005, max_depth: int = 128):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.samples: Counter[str] = Counter()
+        self._labels: dict[CodeType, str] = {}
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._target: int | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, thread_id: int | None = None) -> None:
+        """
+        Начать замеры стека потока thread_id (по умолчанию — текущего).
+        """
+        if self.running:
+            raise RuntimeError("профайлер уже запущен")
+        self._target = thread_id if thread_id is not None else threading.get_ident()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            if frame is not None:
+                self.samples[self._stack(frame)] += 1
+
+    def _stack(self, frame) -> str:
+        labels = self._labels
+        stack = []
+        while frame is not None and len(stack) < self.max_depth:
+            code = frame.f_code
+            label = labels.get(code)
+            if label is None:
+                label = labels[code] = _label(code)
+            stack.append(label)
+            frame = frame.f_back
+        stack.reverse()
+        return ";".join(stack)
+
+
+def _label(code: CodeType) -> str:
+    name = getattr(code, "co_qualname", code.co_name)
+    where = os.path.basename(code.co_filename)
+    return f"{name} ({where}:{code.co_firstlineno})".replace(";", ",")
@@ -0,0 +1,66 @@
+# project3/catalog.py
+from typing import Callable, Iterable, Mapping, Sized
+
+from .models import Topic
+
+
+class TopicCatalog:
+    """
+    Неизменяемый снимок каталога тем для лобби.
+
+    Строится один раз при старте и хранит только сводку: pk, название,
+    число вопросов, размер лобби (lobby_size(pk)). Сами вопросы (и
+    правильные ответы) в лобби не уходят — клиент получает их по одному
+    в событиях игры.
+
+    Живая часть — has_players (кто-то ждёт соперника в теме) — накладывается
+    при запросе: ключ наложения — кортеж флагов по темам, и для каждого
+    ключа кадр кодируется один раз (encode) и дальше отдаётся готовым.
+    """
+
+    def __init__(
+        self,
+        topics: Iterable[Topic],
+        encode: Callable[[list[dict]], object] | None = None,
+        max_frames: int = 64,
+        lobby_size: Callable[[int], int] = lambda pk: 2,
+    ):
+        self._topics = tuple((t.pk, t.name, len(t.questions), lobby_size(t.pk)) for t in topics)
+        self.pks = frozenset(pk for pk, *_ in self._topics)
+        self._encode = encode
+        self.max_frames = max_frames
+        self._frames: dict[tuple[bool, ...], object] = {}
+
+    def __len__(self) -> int:
+        return len(self._topics)
+
+    def __contains__(self, pk) -> bool:
+        return pk in self.pks
+
+    def overlay(self, waiting: Mapping[int, Sized]) -> tuple[bool, ...]:
+        """
+        has_players по темам; waiting не меняется (в отличие от setdefault).
+        """
+        return tuple(bool(waiting.get(pk)) for pk, *_ in self._topics)
+
+    def payload(self, waiting: Mapping[int, Sized]) -> list[dict]:
+        return self._payload(self.overlay(waiting))
+
+    def frame(self, waiting: Mapping[int, Sized]) -> object:
+        """
+        Закодированный кадр списка тем для текущего наложения.
+        """
+        key = self.overlay(waiting)
+        frame = self._frames.get(key)
+        if frame is None:
+            if len(self._frames) >= self.max_frames:
+                self._frames.clear()
+            frame = self._frames[key] = self._encode(self._payload(key))
+        return frame
+
+    def _payload(self, key: tuple[bool, ...]) -> list[dict]:
+        return [
+            {"pk": pk, "name": name, "question_count": count, "lobby_size": size,
+             "has_players": busy}
+            for (pk, name, count, size), busy in zip(self._topics, key)
+        ]
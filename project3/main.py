@@ -1,30 +1,54 @@
 import asyncio
 import json
 import logging
+from contextlib import asynccontextmanager
+from itertools import islice
 from uuid import uuid4
 from typing import Dict, List, Optional, Set
 from datetime import datetime
 
-from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
 import socketio
 from loguru import logger
 from pydantic import BaseModel
 
-from models import Player, Game, Topic
-from trivia_data import load_topics
+# общие с app.py модули — из корня репозитория (project3 запускается оттуда как пакет)
+from assets import AssetCache
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, Metrics, instrument
+from profiler import SamplingProfiler
+from wire import create_server, encode_event, send_encoded
 
+from .models import Topic
+from .trivia_data import load_topics
+from .catalog import TopicCatalog
+from .matchmaking import Matchmaker
+from .scheduler import Scheduler, Timer
+from .state import GameState
 
-from fastapi.responses import HTMLResponse
+
+from fastapi.responses import HTMLResponse, PlainTextResponse
 import os
 
 
 # Настройка логгера
 logger.add("quiz_server.log", rotation="10 MB", level="INFO")
 
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    scheduler.start()
+    sweeper = asyncio.create_task(run_matchmaking())
+    yield
+    await scheduler.stop()
+    sweeper.cancel()
+    try:
+        await sweeper
+    except asyncio.CancelledError:
+        pass
+
+
 # Инициализация FastAPI
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # Настройка CORS
 app.add_middleware(
@@ -35,50 +59,191 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Пауза между разбором ответа и следующим вопросом, секунды
+# (нагрузочный прогон ставит QUESTION_DELAY=0.05, чтобы не ждать по 3 с)
+QUESTION_DELAY = float(os.environ.get("QUESTION_DELAY", "3.0"))
+
+# Сколько секунд даётся на ответ; не ответивший к сроку получает «неверно»,
+# и игра идёт дальше. ANSWER_TIMEOUT=0 — ждать без ограничения
+ANSWER_TIMEOUT = float(os.environ.get("ANSWER_TIMEOUT", "20"))
+
+# Пакетный лог Socket.IO/Engine.IO: SIO_LOG=0 выключает (под нагрузкой
+# он пишет строку на каждый кадр)
+SIO_LOG = os.environ.get("SIO_LOG", "1") != "0"
+
 # Инициализация Socket.IO
-sio = socketio.AsyncServer(
+# WIRE_FORMAT=json | msgpack | negotiate — см. wire.py
+sio = create_server(
     async_mode='asgi',
     cors_allowed_origins="*",
-    logger=True,
-    engineio_logger=True
+    logger=SIO_LOG,
+    engineio_logger=SIO_LOG
 )
 
 # Обертка ASGI для Socket.IO
 app_with_socket = socketio.ASGIApp(sio, app)
 
-# Сначала монтируем статику
-app.mount("/static", StaticFiles(directory="static"), name="static")
+# Статика и корневая страница — из памяти, заранее сжатые (gzip/brotli),
+# с ETag/304; изменённый файл перечитывается сам
+STATIC_DIR = os.path.realpath(os.path.join(os.path.dirname(__file__), "static"))
+assets = AssetCache()
+
+
+@app.api_route("/static/{path:path}", methods=["GET", "HEAD"])
+async def static_file(path: str, request: Request):
+    """Файл из static/ через кэш ресурсов"""
+    full_path = os.path.realpath(os.path.join(STATIC_DIR, path))
+    if not full_path.startswith(STATIC_DIR + os.sep):
+        raise HTTPException(status_code=404, detail="Not Found")
+    try:
+        asset = assets.file(full_path)
+    except OSError:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return assets.response(asset, request)
+
 
 # Потом — корневой маршрут
 @app.get("/", response_class=HTMLResponse)
-async def read_root():
-    with open(os.path.join("static", "index.html"), "r", encoding="utf-8") as f:
-        return HTMLResponse(content=f.read())
+async def read_root(request: Request):
+    return assets.response(assets.file(os.path.join(STATIC_DIR, "index.html")), request)
 
 # === Глобальные хранилища ===
 TOPICS = {t.pk: t for t in load_topics()}
 
-# Ожидающие игроки: topic_pk → [sid]
-waiting_players: Dict[int, List[str]] = {}
+# Ожидающие игроки: очереди по темам (topic_pk → sid → заявка).
+# MATCH_TIMEOUT — сколько секунд ждать соперника (0 — без ограничения);
+# MATCH_BAND — подбор по рейтингу (допуск), MATCH_BAND_GROWTH — на сколько
+# допуск растёт за секунду ожидания
+MATCH_TIMEOUT = float(os.environ.get("MATCH_TIMEOUT", "60"))
+MATCH_BAND = os.environ.get("MATCH_BAND")
+MATCH_SWEEP_INTERVAL = float(os.environ.get("MATCH_SWEEP_INTERVAL", "1.0"))
+
+# Размер лобби: LOBBY_SIZE для всех тем, LOBBY_SIZES="1:10,3:50" — по темам
+# (от 2 до MAX_LOBBY_SIZE). Неполное лобби (от двух игроков) стартует, когда
+# старший в нём ждёт LOBBY_FILL_TIMEOUT секунд (0 — только полным составом)
+MAX_LOBBY_SIZE = 50
 
-# Активные игры: game_uid → Game
-active_games: Dict[str, Game] = {}
 
-# sid → player info
-sid_to_player: Dict[str, Player] = {}
+def lobby_size(value: str) -> int:
+    size = int(value)
+    if not 2 <= size <= MAX_LOBBY_SIZE:
+        raise ValueError(f"Размер лобби вне 2..{MAX_LOBBY_SIZE}: {size}")
+    return size
+
+
+LOBBY_SIZE = lobby_size(os.environ.get("LOBBY_SIZE", "2"))
+LOBBY_SIZES = {
+    int(pk): lobby_size(size)
+    for pk, size in (item.split(":") for item in os.environ.get("LOBBY_SIZES", "").split(",") if item)
+}
+LOBBY_FILL_TIMEOUT = float(os.environ.get("LOBBY_FILL_TIMEOUT", "15"))
+
+matchmaker = Matchmaker(
+    timeout=MATCH_TIMEOUT or None,
+    band=float(MATCH_BAND) if MATCH_BAND else None,
+    band_growth=float(os.environ.get("MATCH_BAND_GROWTH", "0")),
+    lobby_size=LOBBY_SIZE,
+    sizes=LOBBY_SIZES,
+    fill_timeout=LOBBY_FILL_TIMEOUT or None,
+)
+
+# Сводка тем для лобби (без вопросов), закодированная заранее —
+# get_topics накладывает только has_players
+CATALOG = TopicCatalog(TOPICS.values(), encode=lambda payload: encode_event(sio, "topics", payload),
+                       lobby_size=matchmaker.size)
+
+# Активные игры: game_uid → GameState (тема по ссылке, очки и ответы по местам)
+active_games: Dict[str, GameState] = {}
+
+# game_uid → закодированный кадр "game" текущего состояния для зрителей,
+# подключившихся до следующего изменения (рассылку в комнату кодирует менеджер)
+game_frames: Dict[str, list] = {}
+
+# sid → имя игрока, выбравшего тему
+sid_to_name: Dict[str, str] = {}
 
 # sid → game_uid
 sid_to_game: Dict[str, str] = {}
 
+# Сроки всех игр (следующий вопрос, дедлайн ответа) — в одном планировщике;
+# game_uid → текущий таймер игры, чтобы снять его вместе с игрой
+scheduler = Scheduler()
+game_timers: Dict[str, Timer] = {}
+
+# === Метрики для Prometheus: GET /metrics ===
+metrics = Metrics(prefix="quiz")  # обработчики оборачивает instrument в конце модуля
+metrics.gauge("connections", "Подключённые клиенты",
+              lambda: sum(1 for _ in sio.manager.get_participants("/", None)))
+metrics.gauge("players", "Игроки, выбравшие тему", lambda: len(sid_to_name))
+metrics.gauge("waiting_players", "Игроки в ожидании соперника", lambda: len(matchmaker))
+metrics.gauge("active_games", "Идущие игры", lambda: len(active_games))
+metrics.gauge("spectators", "Зрители идущих игр", lambda: sum(
+    len(sio.manager.rooms["/"].get(uid) or ()) - len(game.sids) for uid, game in active_games.items()))
+metrics.gauge("scheduled_timers", "Запланированные сроки игр", lambda: len(scheduler))
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    """Метрики в текстовом формате Prometheus"""
+    return PlainTextResponse(await metrics.render(), media_type=METRICS_CONTENT_TYPE)
+
+
+# === Профилирование по требованию: collapsed stacks для flame graph ===
+profiling = asyncio.Lock()
+
+
+@app.get("/admin/profile", response_class=PlainTextResponse)
+async def admin_profile(seconds: float = Query(default=10, gt=0, le=120),
+                        interval: float = Query(default=0.005, ge=0.001, le=1)):
+    """Стек цикла событий за seconds секунд в формате collapsed stacks"""
+    if profiling.locked():
+        raise HTTPException(status_code=409, detail="Profiling already in progress")
+    async with profiling:
+        profiler = SamplingProfiler(interval=interval)
+        profiler.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            profiler.stop()
+    return profiler.collapsed()
+
+
+@app.get("/admin/matchmaking")
+async def matchmaking_stats():
+    """Очереди ожидания: глубина и время ожидания по темам"""
+    return matchmaker.stats()
+
+
+@app.get("/games")
+async def list_games(limit: int = Query(default=100, ge=1, le=1000)):
+    """Идущие игры - uid для события spectate"""
+    return [
+        {"uid": uid, "topic": game.topic.name, "question_count": game.question_count,
+         "players": game.scoreboard()}
+        for uid, game in islice(active_games.items(), limit)
+    ]
+
 # === Вспомогательные функции ===
-def find_or_create_waiting_list(topic_pk: int) -> List[str]:
-    """Получить или создать список ожидающих игроков для темы"""
-    if topic_pk not in waiting_players:
-        waiting_players[topic_pk] = []
-    return waiting_players[topic_pk]
-
-async def start_game(topic_pk: int, player1_sid: str, player2_sid: str):
-    """Начать игру между двумя игроками"""
+async def run_matchmaking():
+    """Раз в MATCH_SWEEP_INTERVAL: снять просроченные заявки и запустить лобби,
+    набранные по допуску или по LOBBY_FILL_TIMEOUT"""
+    while True:
+        await asyncio.sleep(MATCH_SWEEP_INTERVAL)
+        try:
+            lobbies, expired = matchmaker.sweep()
+            for lobby in lobbies:
+                await start_game(lobby[0].topic, [ticket.sid for ticket in lobby])
+            for ticket in expired:
+                logger.info(f"Игрок {ticket.sid} не дождался соперника в теме {ticket.topic}")
+                await sio.emit("error", {
+                    "error": "matchmaking_timeout",
+                    "message": "Соперник не найден. Попробуйте ещё раз."
+                }, to=ticket.sid)
+        except Exception:
+            logger.exception("Ошибка подбора соперников")
+
+async def start_game(topic_pk: int, player_sids: List[str]):
+    """Начать игру игроков лобби"""
     if topic_pk not in TOPICS:
         logger.error(f"Тема с pk={topic_pk} не найдена")
         return
@@ -86,65 +251,108 @@ async def start_game(topic_pk: int, player1_sid: str, player2_sid: str):
     topic = TOPICS[topic_pk]
     game_uid = str(uuid4())
     
-    # Создаем игроков
-    player1 = sid_to_player[player1_sid]
-    player2 = sid_to_player[player2_sid]
-    
     # Создаем игру
-    game = Game(
+    game = GameState(
         uid=game_uid,
         topic=topic,
-        players=[player1, player2]
+        sids=player_sids,
+        names=[sid_to_name[player_sid] for player_sid in player_sids]
     )
     
-    # Сохраняем игру
+    # Сохраняем игру.
+    # Игроки и зрители игры - комната game_uid: каждое обновление
+    # кодируется один раз и уходит одной рассылкой
     active_games[game_uid] = game
-    sid_to_game[player1_sid] = game_uid
-    sid_to_game[player2_sid] = game_uid
+    for player_sid in player_sids:
+        sid_to_game[player_sid] = game_uid
+        await sio.enter_room(player_sid, game_uid)
     
-    # Отправляем данные игры обоим игрокам
-    game_data = game.to_dict()
-    await sio.emit("game", game_data, to=player1_sid)
-    await sio.emit("game", game_data, to=player2_sid)
+    # Отправляем данные игры всем игрокам
+    await sio.emit("game", game.to_dict(), to=game_uid)
+    schedule_deadline(game)
     
-    logger.info(f"Начата игра {game_uid} в теме {topic.name} между {player1.name} и {player2.name}")
+    logger.info(f"Начата игра {game_uid} в теме {topic.name}, игроков: {len(player_sids)}")
 
-async def send_next_question(game_uid: str):
-    """Отправить следующий вопрос после задержки"""
-    if game_uid not in active_games:
+def game_frame(game: GameState) -> list:
+    """Кадр "game" для текущего состояния игры (кодируется один раз)"""
+    frame = game_frames.get(game.uid)
+    if frame is None:
+        frame = game_frames[game.uid] = encode_event(sio, "game", game.to_dict())
+    return frame
+
+def schedule(game_uid: str, delay: float, callback, *args):
+    """Поставить следующий срок игры вместо текущего"""
+    timer = game_timers.pop(game_uid, None)
+    if timer is not None:
+        timer.cancel()
+    game_timers[game_uid] = scheduler.call_later(delay, callback, *args)
+
+def schedule_deadline(game: GameState):
+    """Срок ответа на текущий вопрос"""
+    if ANSWER_TIMEOUT > 0:
+        schedule(game.uid, ANSWER_TIMEOUT, answer_deadline, game.uid)
+
+async def remove_game(game_uid: str):
+    """Удалить игру вместе с её сроками и комнатой"""
+    active_games.pop(game_uid, None)
+    game_frames.pop(game_uid, None)
+    timer = game_timers.pop(game_uid, None)
+    if timer is not None:
+        timer.cancel()
+    await sio.close_room(game_uid)
+
+async def answer_deadline(game_uid: str):
+    """Срок ответа истёк: разбираем вопрос с теми ответами, что есть"""
+    game = active_games.get(game_uid)
+    if game is None or game.feedback_sent:
         return
-    
-    game = active_games[game_uid]
-    
-    # Задержка перед отправкой следующего вопроса
-    await asyncio.sleep(3.0)
-    
-    if game_uid not in active_games:
+    game_timers.pop(game_uid, None)
+    logger.info(f"Истекло время ответа в игре {game_uid}")
+    await finish_question(game)
+
+async def finish_question(game: GameState):
+    """Разобрать ответы на текущий вопрос и запланировать следующий"""
+    # Не ответившие к сроку получают «неверно»
+    game.feedback_sent = True
+    feedback = game.evaluate_answers()
+    game_frames.pop(game.uid, None)  # очки изменились
+    
+    # Отправляем результаты игрокам и зрителям
+    await sio.emit("game", {
+        "uid": game.uid,
+        "question_count": game.question_count,
+        "feedback": feedback,
+        "players": game.scoreboard()
+    }, to=game.uid)
+    
+    if game.uid in active_games:
+        schedule(game.uid, QUESTION_DELAY, send_next_question, game.uid)
+
+async def send_next_question(game_uid: str):
+    """Отправить следующий вопрос (срабатывает через QUESTION_DELAY после разбора)"""
+    game = active_games.get(game_uid)
+    if game is None:
         return
+    game_timers.pop(game_uid, None)
     
     game.advance()
+    game_frames.pop(game_uid, None)
     
     # Проверяем, есть ли еще вопросы
     if game.question_count <= 0:
         # Игра окончена
-        results = {
-            "players": [
-                {"name": p.name, "score": p.score}
-                for p in game.players
-            ]
-        }
-        for p in game.players:
-            await sio.emit("over", results, to=p.sid)
-        
-        # Удаляем игру
-        if game_uid in active_games:
-            del active_games[game_uid]
+        logger.info(f"Игра {game_uid} завершена")
+        # Ответы, пришедшие во время рассылки, игру уже не найдут;
+        # комнату закрываем после "over", чтобы его получили и зрители
+        active_games.pop(game_uid, None)
+        await sio.emit("over", game.results(), to=game_uid)
+        await remove_game(game_uid)
         return
     
     # Отправляем следующий вопрос
-    game_data = game.to_dict()
-    for p in game.players:
-        await sio.emit("game", game_data, to=p.sid)
+    await sio.emit("game", game.to_dict(), to=game_uid)
+    if game_uid in active_games:
+        schedule_deadline(game)
 
 # === Обработчики Socket.IO событий ===
 
@@ -159,70 +367,50 @@ async def disconnect(sid):
     """Обработка отключения клиента"""
     logger.info(f"Клиент отключился: {sid}")
     
-    # Удаляем из списка ожидающих
-    for topic_pk, sids in waiting_players.items():
-        if sid in sids:
-            sids.remove(sid)
-            if not sids:
-                del waiting_players[topic_pk]
-            break
+    # Удаляем из очереди ожидания
+    matchmaker.cancel(sid)
     
     # Удаляем из активных игр
     if sid in sid_to_game:
         game_uid = sid_to_game[sid]
         if game_uid in active_games:
             game = active_games[game_uid]
+            game.leave(sid)
             
-            # Находим другого игрока
-            other_player = None
-            for p in game.players:
-                if p.sid != sid:
-                    other_player = p
-                    break
-            
-            if other_player:
-                # Уведомляем оставшегося игрока
+            if game.playing < 2:
+                # Соперников не осталось - уведомляем оставшегося игрока
+                for n, other_sid in enumerate(game.sids):
+                    if game.present[n]:
+                        await sio.emit("error", {
+                            "error": "opponent_disconnected",
+                            "message": "Ваш соперник отключился. Игра завершена."
+                        }, to=other_sid)
+                
+                # И зрителей - всех в комнате, кроме игроков
                 await sio.emit("error", {
-                    "error": "opponent_disconnected",
-                    "message": "Ваш соперник отключился. Игра завершена."
-                }, to=other_player.sid)
-            
-            # Удаляем игру
-            if game_uid in active_games:
-                del active_games[game_uid]
+                    "error": "game_aborted",
+                    "message": "Игрок отключился. Игра завершена."
+                }, to=game_uid, skip_sid=list(game.sids))
+                
+                # Удаляем игру вместе с её сроками и комнатой
+                await remove_game(game_uid)
+            elif game.all_answered() and not game.feedback_sent:
+                # Ждали только ушедшего - разбираем, не дожидаясь срока
+                await finish_question(game)
         
         del sid_to_game[sid]
     
     # Удаляем информацию об игроке
-    if sid in sid_to_player:
-        del sid_to_player[sid]
+    if sid in sid_to_name:
+        del sid_to_name[sid]
 
 @sio.event
 async def get_topics(sid, data=None):
     """Обработка запроса списка тем"""
     logger.info(f"Запрос списка тем от {sid}, данные: {data}")
     
-    # Сериализуем темы вручную
-    topics_list = []
-    for t in TOPICS.values():
-        serialized_questions = [
-            {
-                "text": q.text,
-                "options": q.options,
-                "correct_index": q.correct_index
-            }
-            for q in t.questions
-        ]
-        
-        topics_list.append({
-            "pk": t.pk,
-            "name": t.name,
-            "questions": serialized_questions,
-            "has_players": len(find_or_create_waiting_list(t.pk)) > 0
-        })
-    
-    await sio.emit("topics", topics_list, to=sid)
-    logger.debug(f"Отправлены темы: {topics_list}")
+    # Готовый кадр из снимка каталога; очереди только читаем
+    await send_encoded(sio, sid, CATALOG.frame(matchmaker.queues))
 
 @sio.event
 async def join_game(sid, data):
@@ -237,6 +425,7 @@ async def join_game(sid, data):
     
     topic_pk = data.get("topic_pk")
     name = data.get("name", "").strip()
+    rating = data.get("rating")
     
     # Валидация темы
     if not isinstance(topic_pk, int) or topic_pk not in TOPICS:
@@ -250,27 +439,41 @@ async def join_game(sid, data):
         await sio.emit("error", {"error": "invalid_name", "message": "Invalid player name"}, to=sid)
         return
     
-    # Сохраняем информацию об игроке
-    sid_to_player[sid] = Player(sid=sid, name=name)
+    # Рейтинг необязателен: без него подходит любой соперник
+    if rating is not None and (isinstance(rating, bool) or not isinstance(rating, (int, float))):
+        logger.warning(f"Неверный рейтинг от {sid}: {rating}")
+        await sio.emit("error", {"error": "invalid_rating", "message": "Invalid rating"}, to=sid)
+        return
     
-    # Получаем список ожидающих для этой темы
-    waiting_list = find_or_create_waiting_list(topic_pk)
+    # Сохраняем информацию об игроке
+    sid_to_name[sid] = name
     
-    if len(waiting_list) == 0:
-        # Первый игрок - добавляем в список ожидающих
-        waiting_list.append(sid)
-        logger.info(f"Игрок {sid} ({name}) ожидает партнера в теме {topic_pk}")
+    members = matchmaker.join(sid, topic_pk, rating)
+    if members is None:
+        # Лобби темы ещё не набрано - ждём в очереди темы
+        logger.info(f"Игрок {sid} ({name}) ожидает игроков в теме {topic_pk}")
         return
     
-    # Есть партнер - начинаем игру
-    partner_sid = waiting_list.pop(0)
-    
-    # Удаляем тему из waiting_players если список пуст
-    if not waiting_list:
-        del waiting_players[topic_pk]
+    # Лобби набрано - начинаем игру
+    logger.info(f"Лобби темы {topic_pk} набрано с игроком {sid} ({name})")
+    await start_game(topic_pk, [ticket.sid for ticket in members] + [sid])
+
+@sio.event
+async def spectate(sid, data):
+    """Смотреть игру: зритель входит в комнату игры и получает те же обновления"""
+    logger.info(f"Запрос на просмотр игры от {sid}: {data}")
+    
+    game_uid = data.get("game_uid") if isinstance(data, dict) else None
+    game = active_games.get(game_uid) if isinstance(game_uid, str) else None
+    if game is None:
+        logger.warning(f"Игра для просмотра не найдена: {game_uid}")
+        await sio.emit("error", {"error": "game_not_found", "message": "Game not found"}, to=sid)
+        return
     
-    logger.info(f"Найден партнер для {sid} ({name}) в теме {topic_pk}")
-    await start_game(topic_pk, partner_sid, sid)
+    # Только чтение: ответы зрителя отбрасывает answer (его нет среди мест),
+    # а чужие ответы в комнату не уходят до разбора вопроса
+    await sio.enter_room(sid, game_uid)
+    await send_encoded(sio, sid, game_frame(game))
 
 @sio.event
 async def answer(sid, data):
@@ -299,53 +502,30 @@ async def answer(sid, data):
         return
     
     game = active_games[game_uid]
-    player = next((p for p in game.players if p.sid == sid), None)
     
-    if not player:
+    if sid not in game.slot:
         logger.warning(f"Игрок не найден в игре {game_uid} для sid={sid}")
         return
     
+    # Вопрос уже разобран (истёк срок) - ответ опоздал
+    if game.feedback_sent:
+        logger.info(f"Ответ от {sid} после разбора вопроса в игре {game_uid}")
+        return
+    
     # Записываем ответ
     game.record_answer(sid, index)
     
     # Проверяем, ответили ли оба игрока
-    if not game.both_answered():
-        logger.info(f"Ожидание ответа второго игрока в игре {game_uid}")
-        return
-    
-    # Оба игрока ответили - обрабатываем результаты
-    feedback = game.evaluate_answers()
-    
-    # Отправляем результаты обоим игрокам
-    for p in game.players:
-        await sio.emit("game", {
-            "uid": game.uid,
-            "question_count": game.question_count,
-            "feedback": feedback,
-            "players": [{"name": pl.name, "score": pl.score} for pl in game.players]
-        }, to=p.sid)
-    
-    # Проверяем, остались ли еще вопросы
-    if game.question_count <= 0:
-        logger.info(f"Игра {game_uid} завершена")
-        results = {
-            "players": [
-                {"name": p.name, "score": p.score}
-                for p in game.players
-            ]
-        }
-        for p in game.players:
-            await sio.emit("over", results, to=p.sid)
-        
-        # Удаляем игру
-        if game_uid in active_games:
-            del active_games[game_uid]
+    if not game.all_answered():
+        logger.info(f"Ожидание ответов ({game.outstanding}) в игре {game_uid}")
         return
     
-    # Запускаем задачу для отправки следующего вопроса
-    asyncio.create_task(send_next_question(game_uid))
+    # Все игроки ответили - разбираем, не дожидаясь срока
+    await finish_question(game)
+
+instrument(sio, metrics)
 
-# === Точка входа ===
+# === Точка входа: python -m project3.main из корня репозитория ===
 if __name__ == "__main__":
     import uvicorn
     logger.info("Запуск сервера викторины на http://0.0.0.0:8000")
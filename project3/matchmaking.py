@@ -0,0 +1,249 @@
+# project3/matchmaking.py
+import time
+from collections import OrderedDict, deque
+from itertools import islice
+from typing import Callable, Hashable, Iterator, Mapping
+
+from background import percentile
+
+
+class Ticket:
+    """Заявка игрока в очереди темы."""
+
+    __slots__ = ("sid", "topic", "rating", "enqueued_at")
+
+    def __init__(self, sid: str, topic: Hashable, rating: float | None, enqueued_at: float):
+        self.sid = sid
+        self.topic = topic
+        self.rating = rating
+        self.enqueued_at = enqueued_at
+
+
+class Matchmaker:
+    """
+    Очереди ожидания по темам.
+
+    Очередь темы — OrderedDict sid -> Ticket в порядке прихода, плюс индекс
+    sid -> тема: постановка, снятие самых старых и отмена по sid (уход
+    игрока) — O(1) на заявку при любой длине очереди.
+
+    Игра начинается, когда набралось лобби: size игроков темы (sizes,
+    по умолчанию lobby_size; 2 — обычная пара). band=None — лобби строго
+    по порядку прихода. С band лобби собирается, только если разброс
+    рейтингов в нём (максимум минус минимум) не больше допуска старшей
+    заявки: band + band_growth * (сколько она ждёт). Подходящих ищем среди
+    max(scan, size) самых старых заявок, так что цена join ограничена и
+    с рейтингами. Заявка без рейтинга подходит любому лобби.
+
+    sweep() раз в тик сводит тех, чей допуск расширился, пока они ждали;
+    с fill_timeout запускает неполное лобби (не меньше min_players), если
+    старшая заявка ждёт дольше fill_timeout; снимает заявки старше timeout.
+    """
+
+    def __init__(
+        self,
+        timeout: float | None = 60.0,
+        band: float | None = None,
+        band_growth: float = 0.0,
+        scan: int = 64,
+        waits: int = 1024,
+        lobby_size: int = 2,
+        sizes: Mapping[Hashable, int] | None = None,
+        fill_timeout: float | None = None,
+        min_players: int = 2,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.timeout = timeout
+        self.band = band
+        self.band_growth = band_growth
+        self.scan = scan
+        self.lobby_size = lobby_size
+        self.sizes = dict(sizes or {})
+        self.fill_timeout = fill_timeout
+        self.min_players = min_players
+        self._clock = clock
+        self._waits_size = waits
+        self.queues: dict[Hashable, OrderedDict[str, Ticket]] = {}
+        self._topic_of: dict[str, Hashable] = {}
+        self.waits: dict[Hashable, deque[float]] = {}
+        self.matched = 0
+        self.expired = 0
+        self.cancelled = 0
+
+    def __contains__(self, sid: str) -> bool:
+        return sid in self._topic_of
+
+    def __len__(self) -> int:
+        return len(self._topic_of)
+
+    def depth(self, topic: Hashable) -> int:
+        queue = self.queues.get(topic)
+        return len(queue) if queue else 0
+
+    def size(self, topic: Hashable) -> int:
+        return self.sizes.get(topic, self.lobby_size)
+
+    def join(self, sid: str, topic: Hashable, rating: float | None = None) -> list[Ticket] | None:
+        """
+        Добрать лобби темы. Набралось — заявки ждавших участников (старшие
+        первыми) снимаются и возвращаются; нет — sid встаёт в очередь и
+        возвращается None. Заявка sid в другой очереди, если была, отменяется.
+        """
+        self.cancel(sid, count=False)
+        now = self._clock()
+        queue = self.queues.setdefault(topic, OrderedDict())
+        members = self._find(queue, rating, now, self.size(topic) - 1)
+        if members is not None:
+            for ticket in members:
+                self._take(ticket, now)
+            self.matched += 1
+            return members
+        queue[sid] = Ticket(sid, topic, rating, now)
+        self._topic_of[sid] = topic
+        return None
+
+    def cancel(self, sid: str, count: bool = True) -> Ticket | None:
+        topic = self._topic_of.pop(sid, None)
+        if topic is None:
+            return None
+        if count:
+            self.cancelled += 1
+        return self.queues[topic].pop(sid)
+
+    def sweep(self) -> tuple[list[list[Ticket]], list[Ticket]]:
+        """
+        (лобби, набранные за время ожидания или по fill_timeout;
+        заявки, снятые по timeout).
+        """
+        now = self._clock()
+        lobbies: list[list[Ticket]] = []
+        expired: list[Ticket] = []
+        for topic, queue in self.queues.items():
+            size = self.size(topic)
+            if self.band is not None and len(queue) >= size:
+                lobbies.extend(self._group_waiting(queue, now, size))
+            if self.fill_timeout is not None:
+                lobbies.extend(self._fill_overdue(queue, now, size))
+            if self.timeout is not None:
+                while queue:
+                    ticket = next(iter(queue.values()))
+                    if now - ticket.enqueued_at < self.timeout:
+                        break
+                    queue.popitem(last=False)
+                    del self._topic_of[ticket.sid]
+                    expired.append(ticket)
+        self.expired += len(expired)
+        return lobbies, expired
+
+    def stats(self) -> dict:
+        """
+        Глубина очереди, ожидание самого старого и p50/p99 ожидания сведённых
+        по темам — в секундах.
+        """
+        now = self._clock()
+        topics = {}
+        for topic in self.queues.keys() | self.waits.keys():
+            queue = self.queues.get(topic) or {}
+            oldest = next(iter(queue.values()), None)
+            waits = sorted(self.waits.get(topic, ()))
+            topics[str(topic)] = {
+                "depth": len(queue),
+                "oldest_wait": round(now - oldest.enqueued_at, 3) if oldest else 0.0,
+                "wait_p50": round(percentile(waits, 0.50), 3),
+                "wait_p99": round(percentile(waits, 0.99), 3),
+            }
+        return {
+            "waiting": len(self),
+            "matched": self.matched,
+            "expired": self.expired,
+            "cancelled": self.cancelled,
+            "topics": topics,
+        }
+
+    def _allowance(self, ticket: Ticket, now: float) -> float:
+        return self.band + self.band_growth * (now - ticket.enqueued_at)
+
+    def _extend(self, span: tuple, ticket: Ticket, now: float) -> tuple | None:
+        """
+        span — (мин., макс. рейтинг, допуск) лобби; с ticket — новый span
+        или None, если разброс выйдет за допуск. Без band рейтинги не важны.
+        """
+        if self.band is None or ticket.rating is None:
+            return span
+        low, high, allowance = span
+        allowance = max(allowance, self._allowance(ticket, now))
+        if low is None:
+            return ticket.rating, ticket.rating, allowance
+        low, high = min(low, ticket.rating), max(high, ticket.rating)
+        return (low, high, allowance) if high - low <= allowance else None
+
+    def _find(self, queue: OrderedDict[str, Ticket], rating: float | None,
+              now: float, need: int) -> list[Ticket] | None:
+        if len(queue) < need:
+            return None
+        if self.band is None:
+            return list(islice(queue.values(), need))
+        members = []
+        span = (rating, rating, self.band)
+        for ticket in islice(queue.values(), max(self.scan, need)):
+            wider = self._extend(span, ticket, now)
+            if wider is not None:
+                members.append(ticket)
+                span = wider
+                if len(members) == need:
+                    return members
+        return None
+
+    def _gather(self, window: list[Ticket], first: int, used: set[str],
+                now: float, size: int) -> list[Ticket]:
+        """
+        Старшая заявка window[first] и подходящие ей младшие, всего до size.
+        """
+        anchor = window[first]
+        members = [anchor]
+        span = self._extend((None, None, self.band), anchor, now)
+        for ticket in window[first + 1:]:
+            if len(members) == size:
+                break
+            if ticket.sid not in used:
+                wider = self._extend(span, ticket, now)
+                if wider is not None:
+                    members.append(ticket)
+                    span = wider
+        return members
+
+    def _start(self, members: list[Ticket], used: set[str], now: float) -> list[Ticket]:
+        for ticket in members:
+            used.add(ticket.sid)
+            self._take(ticket, now)
+        self.matched += 1
+        return members
+
+    def _group_waiting(self, queue: OrderedDict[str, Ticket], now: float,
+                       size: int) -> Iterator[list[Ticket]]:
+        window = list(islice(queue.values(), max(self.scan, size)))
+        used: set[str] = set()
+        for i, first in enumerate(window):
+            if first.sid not in used:
+                members = self._gather(window, i, used, now, size)
+                if len(members) == size:
+                    yield self._start(members, used, now)
+
+    def _fill_overdue(self, queue: OrderedDict[str, Ticket], now: float,
+                      size: int) -> Iterator[list[Ticket]]:
+        while len(queue) >= self.min_players:
+            window = list(islice(queue.values(), max(self.scan, size)))
+            if now - window[0].enqueued_at < self.fill_timeout:
+                return
+            members = self._gather(window, 0, set(), now, size)
+            if len(members) < self.min_players:
+                return  # старшей некого добрать — ждёт дальше (или timeout)
+            yield self._start(members, set(), now)
+
+    def _take(self, ticket: Ticket, now: float) -> None:
+        del self.queues[ticket.topic][ticket.sid]
+        del self._topic_of[ticket.sid]
+        waits = self.waits.get(ticket.topic)
+        if waits is None:
+            waits = self.waits[ticket.topic] = deque(maxlen=self._waits_size)
+        waits.append(now - ticket.enqueued_at)
@@ -0,0 +1,120 @@
+# project3/scheduler.py
+import asyncio
+import heapq
+import inspect
+from typing import Any, Callable
+
+from loguru import logger
+
+from background import BackgroundTask
+
+
+class Timer:
+    """Запланированный вызов; cancel() снимает его без поиска в куче."""
+
+    __slots__ = ("when", "seq", "callback", "args", "cancelled", "_scheduler")
+
+    def __init__(self, when: float, seq: int, callback: Callable, args: tuple, scheduler):
+        self.when = when
+        self.seq = seq
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+        self._scheduler = scheduler
+
+    def __lt__(self, other: "Timer") -> bool:
+        return (self.when, self.seq) < (other.when, other.seq)
+
+    def cancel(self) -> None:
+        if not self.cancelled:
+            self.cancelled = True
+            self._scheduler._cancelled(self)
+
+
+class Scheduler(BackgroundTask):
+    """
+    Один планировщик на все игры: куча таймеров и одна задача, которая
+    спит до ближайшего срока.
+
+    Таймер — запись в куче, а не спящая задача, так что сто тысяч игр —
+    это сто тысяч маленьких объектов и одна задача. Отмена помечает
+    таймер, из кучи он уходит, когда доходит до вершины (или при
+    пересборке, если отменённых больше половины). Колбэк может быть
+    корутинной функцией — тогда он выполняется отдельной задачей, чтобы
+    медленная рассылка не задерживала остальные сроки.
+    """
+
+    def __init__(self):
+        self._heap: list[Timer] = []
+        self._seq = 0
+        self._active = 0
+        self._wake: asyncio.Future | None = None
+        self._running: set[asyncio.Task] = set()
+        self.fired = 0
+
+    def __len__(self) -> int:
+        return self._active
+
+    def call_later(self, delay: float, callback: Callable[..., Any], *args) -> Timer:
+        loop = asyncio.get_running_loop()
+        self._seq += 1
+        timer = Timer(loop.time() + max(0.0, delay), self._seq, callback, args, self)
+        heapq.heappush(self._heap, timer)
+        self._active += 1
+        if self._heap[0] is timer and self._wake is not None and not self._wake.done():
+            self._wake.set_result(None)  # новый срок раньше, чем тот, до которого спим
+        return timer
+
+    def _cancelled(self, timer: Timer) -> None:
+        self._active -= 1
+        if len(self._heap) > 64 and self._active < len(self._heap) // 2:
+            self._heap[:] = [t for t in self._heap if not t.cancelled]
+            heapq.heapify(self._heap)
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        heap = self._heap
+        while True:
+            now = loop.time()
+            while heap and heap[0].when <= now:
+                timer = heapq.heappop(heap)
+                if not timer.cancelled:
+                    timer.cancelled = True  # сработавший: cancel() больше ничего не делает
+                    self._active -= 1
+                    self._fire(timer)
+            while heap and heap[0].cancelled:
+                heapq.heappop(heap)
+            self._wake = loop.create_future()
+            handle = loop.call_at(heap[0].when, _wake_up, self._wake) if heap else None
+            try:
+                await self._wake
+            finally:
+                if handle is not None:
+                    handle.cancel()
+
+    def _fire(self, timer: Timer) -> None:
+        self.fired += 1
+        try:
+            result = timer.callback(*timer.args)
+        except Exception:
+            logger.exception("Ошибка в таймере {}", timer.callback)
+            return
+        if inspect.isawaitable(result):
+            task = asyncio.ensure_future(result)
+            self._running.add(task)
+            task.add_done_callback(self._finished)
+
+    def _finished(self, task: asyncio.Task) -> None:
+        self._running.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.opt(exception=task.exception()).error("Ошибка в таймере")
+
+    async def stop(self) -> None:
+        await super().stop()
+        for task in list(self._running):
+            task.cancel()
+
+
+def _wake_up(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
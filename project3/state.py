@@ -0,0 +1,144 @@
+# project3/state.py
+from array import array
+from typing import Any, Dict, List, Optional, Sequence
+
+from .models import Game, Player, Question, Topic
+
+# ответа нет (индексы вариантов — с 1)
+NO_ANSWER = 0
+
+
+class GameState:
+    """
+    Состояние идущей игры в рантайме.
+
+    Тема (и вопросы) общая для всех игр и хранится ссылкой. Игроки —
+    номера мест: sid -> место в slot, очки, ответы и присутствие — массивы
+    по местам. outstanding — сколько ответов на текущий вопрос ещё ждём:
+    ответ, уход игрока и проверка «все ответили» — O(1) при любом числе
+    игроков, разбор и итоги — один проход по местам (и сортировка).
+
+    Pydantic-модели (models.Game) — только на границе: to_model() для
+    сериализации и отладки; в сокет уходят готовые dict.
+    """
+
+    __slots__ = ("uid", "topic", "sids", "names", "slot", "scores", "answers",
+                 "present", "playing", "outstanding", "question_index", "feedback_sent")
+
+    def __init__(self, uid: str, topic: Topic, sids: Sequence[str], names: Sequence[str]):
+        self.uid = uid
+        self.topic = topic
+        self.sids = tuple(sids)
+        self.names = tuple(names)
+        self.slot = {sid: n for n, sid in enumerate(self.sids)}
+        self.scores = array("i", bytes(4 * len(self.sids)))
+        self.answers = array("b", bytes(len(self.sids)))
+        self.present = bytearray(b"\x01" * len(self.sids))
+        self.playing = len(self.sids)
+        self.outstanding = self.playing
+        self.question_index = 0
+        self.feedback_sent = False
+
+    @property
+    def current_question(self) -> Optional[Question]:
+        questions = self.topic.questions
+        if 0 <= self.question_index < len(questions):
+            return questions[self.question_index]
+        return None
+
+    @property
+    def question_count(self) -> int:
+        return max(0, len(self.topic.questions) - self.question_index)
+
+    def record_answer(self, sid: str, index: int) -> bool:
+        """
+        Записать ответ; False — sid не играет в этой игре. Повторный ответ
+        заменяет прежний.
+        """
+        n = self.slot.get(sid)
+        if n is None or not self.present[n]:
+            return False
+        if self.answers[n] == NO_ANSWER:
+            self.outstanding -= 1
+        self.answers[n] = index
+        return True
+
+    def leave(self, sid: str) -> bool:
+        """
+        Игрок ушёл: его ответа больше не ждём, очки остаются в итогах.
+        """
+        n = self.slot.get(sid)
+        if n is None or not self.present[n]:
+            return False
+        self.present[n] = 0
+        self.playing -= 1
+        if self.answers[n] == NO_ANSWER:
+            self.outstanding -= 1
+        return True
+
+    def all_answered(self) -> bool:
+        return self.outstanding == 0
+
+    def evaluate_answers(self) -> Dict[str, Any]:
+        """
+        Начислить очки за текущий вопрос и сбросить ответы; не ответившие —
+        «неверно».
+        """
+        q = self.current_question
+        if not q:
+            return {}
+        correct = q.correct_index
+        results = []
+        for n, name in enumerate(self.names):
+            is_correct = self.answers[n] == correct
+            if is_correct:
+                self.scores[n] += 1
+            results.append({"name": name, "is_correct": is_correct, "score": self.scores[n]})
+            self.answers[n] = NO_ANSWER
+        self.outstanding = self.playing
+        return {"answer": correct, "results": results}
+
+    def advance(self) -> None:
+        self.question_index += 1
+        self.feedback_sent = False
+
+    def scoreboard(self) -> List[Dict[str, Any]]:
+        return [{"name": name, "score": score} for name, score in zip(self.names, self.scores)]
+
+    def results(self) -> Dict[str, Any]:
+        """
+        Итоги для "over": игроки по убыванию очков с местом (равные очки —
+        одно место) и победители.
+        """
+        order = sorted(range(len(self.sids)), key=self.scores.__getitem__, reverse=True)
+        players = []
+        rank = 0
+        for position, n in enumerate(order):
+            if not position or self.scores[n] != self.scores[order[position - 1]]:
+                rank = position + 1
+            players.append({"name": self.names[n], "score": self.scores[n], "rank": rank})
+        return {
+            "players": players,
+            "winners": [p["name"] for p in players if p["rank"] == 1],
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        q = self.current_question
+        return {
+            "uid": self.uid,
+            "question_count": self.question_count,
+            "current_question": {
+                "text": q.text,
+                "options": q.options,
+            } if q else None,
+            "players": self.scoreboard(),
+        }
+
+    def to_model(self) -> Game:
+        players = [
+            Player(sid=sid, name=name, score=score, answered=answer != NO_ANSWER,
+                   answer_index=answer if answer != NO_ANSWER else None)
+            for sid, name, score, answer in zip(self.sids, self.names, self.scores, self.answers)
+        ]
+        return Game(uid=self.uid, topic=self.topic, players=players,
+                    current_question_index=self.question_index, feedback_sent=self.feedback_sent)
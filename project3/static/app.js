@@ -15,7 +15,7 @@ document.addEventListener("DOMContentLoaded", () => {
                     {{#each topics}}
                     <div class="topic-card" data-pk="{{this.pk}}">
                         <div class="name">{{this.name}}</div>
-                        <div class="questions-count">{{this.questions.length}} вопросов</div>
+                        <div class="questions-count">{{this.question_count}} вопросов</div>
                         {{#if this.has_players}}
                         <div class="status">Ищет соперника</div>
                         {{/if}}
@@ -44,7 +44,7 @@ document.addEventListener("DOMContentLoaded", () => {
             <div class="screen">
                 <a class="back-link" id="back-to-topics">&larr; Назад к темам</a>
                 <h2>Поиск соперника</h2>
-                <div class="status-message">Ожидание другого игрока в теме "{{topic.name}}"</div>
+                <div class="status-message">Ожидание игроков в теме "{{topic.name}}" (в игре {{topic.lobby_size}})</div>
                 <div class="loader"></div>
                 <p class="hint">Вы будете уведомлены, когда найдется соперник</p>
             </div>
@@ -174,21 +174,20 @@ document.addEventListener("DOMContentLoaded", () => {
     state.socket.on("over", (results) => {
       console.log("Игра завершена:", results);
 
-      let maxScore = Math.max(...results.players.map((p) => p.score));
+      // Игроки уже по убыванию очков, победители (место 1) — в winners
       let message = "";
 
-      if (results.players[0].score === results.players[1].score) {
+      if (results.winners.length > 1) {
         message = "Ничья!";
       } else {
-        const winner = results.players.find((p) => p.score === maxScore);
-        message = `Победил ${winner.name}!`;
+        message = `Победил ${results.winners[0]}!`;
       }
 
       render("results", {
         message: message,
         players: results.players.map((p) => ({
           ...p,
-          winner: p.score === maxScore,
+          winner: p.rank === 1,
         })),
       });
     });
@@ -202,6 +201,8 @@ document.addEventListener("DOMContentLoaded", () => {
         message = "Пожалуйста, введите ваше имя";
       } else if (error.error === "invalid_topic") {
         message = "Выбрана неверная тема";
+      } else if (error.error === "matchmaking_timeout") {
+        message = error.message;
       }
 
       render("error", { message: message });
@@ -1,5 +1,5 @@
 from typing import List
-from models import Topic, Question
+from .models import Topic, Question
 
 # Данные из Google таблицы (упрощенная версия)
 # Для полной реализации можно использовать библиотеку gspread для получения данных из Google таблиц
@@ -0,0 +1,131 @@
+# rate_limit.py
+"""
+Token bucket на событие: отдельно на соединение (sid) и на пользователя
+(все его вкладки вместе).
+
+Корзины живут прямо в записи Connection: conn.buckets — свои для sid,
+conn.user_buckets — общий словарь всех соединений пользователя (его
+раздаёт ConnectionRegistry). Проверка — O(1), без глобальных таблиц и
+без чистки: корзины уходят вместе с соединением.
+
+Правила: событие -> {"sid": [rate, burst], "user": [rate, burst]},
+rate — токенов в секунду, burst — ёмкость корзины. События без правила
+не ограничиваются.
+"""
+import json
+import time
+
+from registry import Connection
+
+Rule = tuple[float, float]
+
+
+class TokenBucket:
+    """
+    Корзина на burst токенов, пополняется со скоростью rate в секунду.
+    """
+
+    __slots__ = ("rate", "burst", "tokens", "updated", "denied")
+
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+        self.denied = 0  # отказов подряд с последнего пропущенного события
+
+    def take(self, now: float) -> bool:
+        tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if tokens >= 1:
+            self.tokens = tokens - 1
+            self.denied = 0
+            return True
+        self.tokens = tokens
+        self.denied += 1
+        return False
+
+    def refund(self) -> None:
+        self.tokens = min(self.burst, self.tokens + 1)
+
+    def retry_after(self) -> float:
+        """
+        Через сколько секунд появится следующий токен.
+        """
+        return max(0.0, (1 - self.tokens) / self.rate)
+
+
+def parse_rules(raw: str | dict | None) -> dict[str, dict[str, Rule]]:
+    """
+    Правила из JSON (переменная RATE_LIMITS) или словаря.
+    """
+    if isinstance(raw, str):
+        raw = json.loads(raw) if raw.strip() else {}
+    rules: dict[str, dict[str, Rule]] = {}
+    for event, scopes in (raw or {}).items():
+        rules[event] = {
+            scope: (float(rule[0]), float(rule[1]))
+            for scope, rule in scopes.items()
+            if scope in ("sid", "user")
+        }
+    return rules
+
+
+class RateLimiter:
+    """
+    Проверка события по корзинам sid и пользователя.
+
+    Счётчики allowed/limited — по событиям, для /admin/rate_limits.
+    """
+
+    def __init__(self, rules: dict[str, dict[str, Rule]], clock=time.monotonic):
+        self.rules = rules
+        self.clock = clock
+        self.allowed: dict[str, int] = {}
+        self.limited: dict[str, int] = {}
+
+    def check(self, conn: Connection, event: str) -> TokenBucket | None:
+        """
+        Списать токен за событие. None — событие пропускается, иначе —
+        исчерпанная корзина (по ней считается retry_after).
+        """
+        rule = self.rules.get(event)
+        if not rule:
+            return None
+        now = self.clock()
+
+        sid_bucket = None
+        if "sid" in rule:
+            if conn.buckets is None:
+                conn.buckets = {}
+            sid_bucket = self._bucket(conn.buckets, event, rule["sid"], now)
+            if not sid_bucket.take(now):
+                return self._limit(event, sid_bucket)
+
+        if "user" in rule:
+            user_bucket = self._bucket(conn.user_buckets, event, rule["user"], now)
+            if not user_bucket.take(now):
+                if sid_bucket is not None:
+                    sid_bucket.refund()  # событие не прошло — токен sid не тратим
+                return self._limit(event, user_bucket)
+
+        self.allowed[event] = self.allowed.get(event, 0) + 1
+        return None
+
+    def _bucket(self, buckets: dict, event: str, rule: Rule, now: float) -> TokenBucket:
+        bucket = buckets.get(event)
+        if bucket is None:
+            bucket = buckets[event] = TokenBucket(rule[0], rule[1], now)
+        return bucket
+
+    def _limit(self, event: str, bucket: TokenBucket) -> TokenBucket:
+        self.limited[event] = self.limited.get(event, 0) + 1
+        return bucket
+
+    def stats(self) -> dict:
+        return {
+            "rules": {event: {scope: list(rule) for scope, rule in scopes.items()}
+                      for event, scopes in self.rules.items()},
+            "allowed": dict(self.allowed),
+            "limited": dict(self.limited),
+        }
@@ -0,0 +1,120 @@
+# registry.py
+import sys
+import time
+from typing import Iterator
+
+
+class Connection:
+    """
+    Состояние одного соединения (sid) в одной компактной записи.
+    """
+
+    __slots__ = (
+        "sid", "user_id", "connected_at", "color", "score", "rooms", "session",
+        "buckets", "user_buckets", "outbox",
+    )
+
+    def __init__(self, sid: str, user_id: str):
+        self.sid = sid
+        self.user_id = user_id
+        self.connected_at = time.monotonic()
+        self.color: str | None = None
+        self.score = 0
+        self.rooms: set[str] = set()  # ведёт state_backend.MemoryBackend (см. create_backend)
+        self.session = None  # session_cache.UserSession
+        # rate_limit.TokenBucket по событиям: свои (создаются по требованию)
+        # и общие для всех соединений пользователя (раздаёт реестр)
+        self.buckets: dict | None = None
+        self.user_buckets: dict = {}
+        self.outbox = None  # outbound.OutboundQueue этого соединения
+
+    def duration(self) -> float:
+        """
+        Сколько секунд длится соединение.
+        """
+        return time.monotonic() - self.connected_at
+
+    def footprint(self) -> int:
+        """
+        Примерный размер записи в байтах (сама запись + множество комнат).
+        """
+        return sys.getsizeof(self) + sys.getsizeof(self.rooms)
+
+
+class ConnectionRegistry:
+    """
+    Реестр активных соединений: sid -> Connection и user_id -> {sid}.
+
+    Подключение, отключение и запросы присутствия — O(1),
+    без просмотра всех пользователей.
+    """
+
+    def __init__(self):
+        self._by_sid: dict[str, Connection] = {}
+        self._user_sids: dict[str, set[str]] = {}
+
+    def add(self, sid: str, user_id: str) -> Connection:
+        """
+        Зарегистрировать новое соединение sid для пользователя user_id.
+        """
+        conn = Connection(sid, user_id)
+        sids = self._user_sids.setdefault(user_id, set())
+        if sids:
+            conn.user_buckets = self._by_sid[next(iter(sids))].user_buckets
+        self._by_sid[sid] = conn
+        sids.add(sid)
+        return conn
+
+    def remove(self, sid: str) -> Connection | None:
+        """
+        Удалить соединение; пользователь пропадает, когда у него не осталось sid.
+        """
+        conn = self._by_sid.pop(sid, None)
+        if conn is None:
+            return None
+        sids = self._user_sids.get(conn.user_id)
+        if sids is not None:
+            sids.discard(sid)
+            if not sids:
+                del self._user_sids[conn.user_id]
+        return conn
+
+    def get(self, sid: str) -> Connection | None:
+        return self._by_sid.get(sid)
+
+    def user_of(self, sid: str) -> str | None:
+        conn = self._by_sid.get(sid)
+        return conn.user_id if conn is not None else None
+
+    def sids_of(self, user_id: str) -> set[str]:
+        return self._user_sids.get(user_id, set())
+
+    def sids(self) -> list[str]:
+        return list(self._by_sid)
+
+    def count_users(self) -> int:
+        """
+        Количество уникальных пользователей онлайн.
+        """
+        return len(self._user_sids)
+
+    def memory_per_connection(self) -> float:
+        """
+        Средний размер состояния одного соединения в байтах:
+        запись, её доля в индексах sid и user_id.
+        """
+        if not self._by_sid:
+            return 0.0
+        records = sum(conn.footprint() for conn in self._by_sid.values())
+        indexes = sys.getsizeof(self._by_sid) + sys.getsizeof(self._user_sids)
+        indexes += sum(sys.getsizeof(s) for s in self._user_sids.values())
+        return (records + indexes) / len(self._by_sid)
+
+    def __contains__(self, sid: str) -> bool:
+        return sid in self._by_sid
+
+    def __len__(self) -> int:
+        return len(self._by_sid)
+
+    def __iter__(self) -> Iterator[Connection]:
+        return iter(self._by_sid.values())
@@ -0,0 +1,91 @@
+# room_state.py
+from collections import deque
+from itertools import islice
+
+
+class RoomFeed:
+    """
+    Версионированное состояние комнат: room -> множество sid.
+
+    Каждое изменение получает порядковый номер (version) и попадает
+    в ограниченную историю, чтобы отставший клиент мог догнать ленту
+    через resync, не запрашивая полный снимок.
+
+    Обратный индекс sid -> комнаты хранит вызывающий код (множество joined
+    в записи соединения), поэтому выход из всех комнат не просматривает rooms.
+    """
+
+    def __init__(self, history: int = 1024):
+        self.rooms: dict[str, set[str]] = {}
+        self.version = 0
+        self._history: deque[dict] = deque(maxlen=history)
+
+    def snapshot(self) -> dict:
+        """
+        Полный снимок состояния с текущей версией.
+        """
+        return {
+            "version": self.version,
+            "rooms": {room: list(sids) for room, sids in self.rooms.items()},
+        }
+
+    def add(self, room: str, sid: str, joined: set[str]) -> list[dict]:
+        """
+        Добавить sid в комнату. Возвращает список дельт (может быть пустым).
+        """
+        changes = []
+        members = self.rooms.get(room)
+        if members is None:
+            members = self.rooms[room] = set()
+            changes.append(self._record("create", room))
+        if sid not in members:
+            members.add(sid)
+            joined.add(room)
+            changes.append(self._record("add", room, sid))
+        return changes
+
+    def remove(self, room: str, sid: str, joined: set[str]) -> list[dict]:
+        """
+        Убрать sid из комнаты; пустая комната удаляется.
+        """
+        members = self.rooms.get(room)
+        if not members or sid not in members:
+            return []
+        members.discard(sid)
+        joined.discard(room)
+        changes = [self._record("remove", room, sid)]
+        if not members:
+            del self.rooms[room]
+            changes.append(self._record("drop", room))
+        return changes
+
+    def leave_all(self, sid: str, joined: set[str]) -> list[dict]:
+        """
+        Убрать sid из всех комнат (при переходе в другую комнату или отключении).
+        """
+        changes = []
+        for room in list(joined):
+            changes.extend(self.remove(room, sid, joined))
+        return changes
+
+    def since(self, version: int) -> list[dict] | None:
+        """
+        Дельты после указанной версии.
+        None — история уже не покрывает этот промежуток, нужен полный снимок.
+        """
+        if version > self.version or version < 0:
+            return None
+        if version == self.version:
+            return []
+        if not self._history or self._history[0]["version"] > version + 1:
+            return None
+        skip = version + 1 - self._history[0]["version"]
+        return list(islice(self._history, skip, None))
+
+    def _record(self, op: str, room: str, sid: str | None = None) -> dict:
+        self.version += 1
+        delta = {"version": self.version, "op": op, "room": room}
+        if sid is not None:
+            delta["sid"] = sid
+        self._history.append(delta)
+        return delta
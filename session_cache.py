@@ -0,0 +1,121 @@
+# session_cache.py
+from background import BackgroundTask, every
+from registry import ConnectionRegistry
+
+
+class UserSession:
+    """
+    Типизированная сессия сокета: то, что раньше лежало в dict из sio.get_session.
+    """
+
+    __slots__ = ("user_id", "messages_sent", "owns_rooms", "profile")
+
+    def __init__(self, user_id: str, messages_sent: int = 0,
+                 owns_rooms: list[str] | None = None, profile: dict | None = None):
+        self.user_id = user_id
+        self.messages_sent = messages_sent
+        self.owns_rooms = owns_rooms if owns_rooms is not None else []
+        self.profile = profile
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "UserSession":
+        return cls(
+            user_id=data.get("user_id"),
+            messages_sent=data.get("messages_sent", 0),
+            owns_rooms=data.get("owns_rooms"),
+            profile=data.get("profile"),
+        )
+
+    def to_dict(self) -> dict:
+        data = {
+            "user_id": self.user_id,
+            "messages_sent": self.messages_sent,
+            "owns_rooms": self.owns_rooms,
+        }
+        if self.profile is not None:
+            data["profile"] = self.profile
+        return data
+
+
+class SessionCache(BackgroundTask):
+    """
+    Write-back кэш сессий поверх sio.get_session / sio.save_session.
+
+    Сессия живёт в записи соединения (Connection.session) и читается без
+    копирования. Изменения только помечают sid «грязным»; в хранилище
+    Socket.IO сессия уходит фоновым сбросом раз в flush_interval секунд
+    и при отключении.
+    """
+
+    def __init__(self, sio, registry: ConnectionRegistry, flush_interval: float = 5.0):
+        self.sio = sio
+        self.registry = registry
+        self.flush_interval = flush_interval
+        self._dirty: set[str] = set()
+
+    def create(self, sid: str, user_id: str) -> UserSession:
+        """
+        Новая сессия для только что подключившегося sid.
+        """
+        session = UserSession(user_id)
+        self.registry.get(sid).session = session
+        self._dirty.add(sid)
+        return session
+
+    def get(self, sid: str) -> UserSession | None:
+        """
+        Сессия из памяти процесса (без обращения к хранилищу).
+        """
+        conn = self.registry.get(sid)
+        return conn.session if conn is not None else None
+
+    async def load(self, sid: str) -> UserSession | None:
+        """
+        Сессия из кэша; если её нет — один раз читается из хранилища Socket.IO.
+        """
+        conn = self.registry.get(sid)
+        if conn is not None and conn.session is not None:
+            return conn.session
+        try:
+            session = UserSession.from_dict(await self.sio.get_session(sid))
+        except KeyError:
+            return None
+        if conn is not None:
+            conn.session = session
+        return session
+
+    def mark_dirty(self, sid: str) -> None:
+        self._dirty.add(sid)
+
+    async def flush(self, sid: str) -> None:
+        """
+        Записать сессию в хранилище, если она менялась с прошлого сброса.
+        """
+        if sid not in self._dirty:
+            return
+        self._dirty.discard(sid)
+        session = self.get(sid)
+        if session is None:
+            return
+        try:
+            await self.sio.save_session(sid, session.to_dict())
+        except KeyError:
+            pass  # сокет уже закрыт
+
+    async def flush_all(self) -> None:
+        for sid in list(self._dirty):
+            await self.flush(sid)
+
+    async def close(self, sid: str) -> None:
+        """
+        Финальный сброс при отключении.
+        """
+        await self.flush(sid)
+        self._dirty.discard(sid)
+
+    async def run(self) -> None:
+        await every(self.flush_interval, self.flush_all, "Не удалось сбросить сессии")
+
+    async def stop(self) -> None:
+        await super().stop()
+        await self.flush_all()
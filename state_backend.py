@@ -0,0 +1,404 @@
+# state_backend.py
+"""
+Общее состояние сервера (онлайн, комнаты, счётчики) за единым интерфейсом.
+
+MemoryBackend — состояние в памяти процесса (один uvicorn-воркер).
+UnixSocketBackend — клиент StateStore, который держит то же состояние
+в отдельном процессе и отвечает по локальному Unix-сокету; через тот же
+сокет работает шина UnixSocketManager для рассылок между воркерами.
+
+Несколько воркеров на одном хосте:
+    python state_backend.py --path /tmp/websockets-state.sock
+    STATE_BACKEND=unix uvicorn app:app --workers 4
+
+Клиентам при нескольких воркерах нужен транспорт websocket
+(long-polling требует sticky-сессий).
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+
+import socketio
+from socketio.async_pubsub_manager import AsyncPubSubManager
+from loguru import logger
+
+from registry import ConnectionRegistry
+from room_state import RoomFeed
+
+DEFAULT_SOCKET_PATH = "/tmp/websockets-state.sock"
+
+# Ограничение на длину одной строки протокола (снимок комнат может быть большим)
+LINE_LIMIT = 64 * 1024 * 1024
+
+
+class StateBackendError(Exception):
+    """Ошибка, которую вернуло хранилище состояния."""
+
+
+class StateBackend:
+    """
+    Интерфейс общего состояния. Все методы — корутины, чтобы реализация
+    могла ходить в другой процесс.
+    """
+
+    # методы, которые можно вызывать удалённо через StateStore
+    RPC_METHODS = frozenset({
+        "add_connection", "remove_connection", "count_connections",
+        "count_users", "sids", "room_add", "room_remove", "room_leave_all",
+        "rooms_snapshot", "rooms_since", "incr", "counter",
+    })
+
+    async def add_connection(self, sid: str, user_id: str) -> None:
+        raise NotImplementedError
+
+    async def remove_connection(self, sid: str) -> None:
+        raise NotImplementedError
+
+    async def count_connections(self) -> int:
+        raise NotImplementedError
+
+    async def count_users(self) -> int:
+        raise NotImplementedError
+
+    async def sids(self) -> list[str]:
+        raise NotImplementedError
+
+    async def room_add(self, room: str, sid: str) -> list[dict]:
+        """Добавить sid в комнату, вернуть дельты RoomFeed."""
+        raise NotImplementedError
+
+    async def room_remove(self, room: str, sid: str) -> list[dict]:
+        raise NotImplementedError
+
+    async def room_leave_all(self, sid: str) -> list[dict]:
+        raise NotImplementedError
+
+    async def rooms_snapshot(self) -> dict:
+        raise NotImplementedError
+
+    async def rooms_since(self, version: int) -> list[dict] | None:
+        raise NotImplementedError
+
+    async def incr(self, key: str, amount: int = 1) -> int:
+        raise NotImplementedError
+
+    async def counter(self, key: str) -> int:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+
+class MemoryBackend(StateBackend):
+    """
+    Состояние в памяти текущего процесса.
+
+    connections — реестр приложения, если он есть: тогда у sid одна запись
+    Connection на процесс, а add_connection для уже известного sid ничего не делает.
+    """
+
+    shared = False
+
+    def __init__(self, connections: ConnectionRegistry | None = None):
+        self.connections = connections if connections is not None else ConnectionRegistry()
+        self.feed = RoomFeed()
+        self.counters: dict[str, int] = {}
+
+    async def add_connection(self, sid: str, user_id: str) -> None:
+        if sid not in self.connections:
+            self.connections.add(sid, user_id)
+
+    async def remove_connection(self, sid: str) -> None:
+        self.connections.remove(sid)
+
+    async def count_connections(self) -> int:
+        return len(self.connections)
+
+    async def count_users(self) -> int:
+        return self.connections.count_users()
+
+    async def sids(self) -> list[str]:
+        return self.connections.sids()
+
+    async def room_add(self, room: str, sid: str) -> list[dict]:
+        conn = self.connections.get(sid)
+        if conn is None:
+            return []
+        return self.feed.add(room, sid, conn.rooms)
+
+    async def room_remove(self, room: str, sid: str) -> list[dict]:
+        conn = self.connections.get(sid)
+        if conn is None:
+            return []
+        return self.feed.remove(room, sid, conn.rooms)
+
+    async def room_leave_all(self, sid: str) -> list[dict]:
+        conn = self.connections.get(sid)
+        if conn is None:
+            return []
+        return self.feed.leave_all(sid, conn.rooms)
+
+    async def rooms_snapshot(self) -> dict:
+        return self.feed.snapshot()
+
+    async def rooms_since(self, version: int) -> list[dict] | None:
+        return self.feed.since(version)
+
+    async def incr(self, key: str, amount: int = 1) -> int:
+        value = self.counters.get(key, 0) + amount
+        self.counters[key] = value
+        return value
+
+    async def counter(self, key: str) -> int:
+        return self.counters.get(key, 0)
+
+
+class UnixSocketBackend(StateBackend):
+    """
+    Клиент StateStore: каждый вызов — одна JSON-строка запроса и одна ответа.
+    Запросы конвейеризуются по одному соединению, ответы сопоставляются по id.
+    """
+
+    shared = True
+
+    def __init__(self, path: str = DEFAULT_SOCKET_PATH):
+        self.path = path
+        self._writer: asyncio.StreamWriter | None = None
+        self._reader_task: asyncio.Task | None = None
+        self._pending: dict[int, asyncio.Future] = {}
+        self._ids = itertools.count(1)
+        self._lock: asyncio.Lock | None = None
+
+    async def _connect(self) -> asyncio.StreamWriter:
+        if self._writer is not None:
+            return self._writer
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if self._writer is None:
+                reader, writer = await asyncio.open_unix_connection(
+                    self.path, limit=LINE_LIMIT
+                )
+                self._writer = writer
+                self._reader_task = asyncio.create_task(self._read(reader))
+        return self._writer
+
+    async def _read(self, reader: asyncio.StreamReader) -> None:
+        try:
+            while line := await reader.readline():
+                reply = json.loads(line)
+                future = self._pending.pop(reply["id"], None)
+                if future is None or future.done():
+                    continue
+                if "error" in reply:
+                    future.set_exception(StateBackendError(reply["error"]))
+                else:
+                    future.set_result(reply["result"])
+        finally:
+            self._writer = None
+            pending, self._pending = self._pending, {}
+            for future in pending.values():
+                if not future.done():
+                    future.set_exception(
+                        ConnectionError(f"Хранилище состояния {self.path} недоступно")
+                    )
+
+    async def _call(self, method: str, *args):
+        writer = await self._connect()
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        writer.write(
+            json.dumps({"id": request_id, "method": method, "args": args}).encode()
+            + b"\n"
+        )
+        await writer.drain()
+        return await future
+
+    async def add_connection(self, sid: str, user_id: str) -> None:
+        await self._call("add_connection", sid, user_id)
+
+    async def remove_connection(self, sid: str) -> None:
+        await self._call("remove_connection", sid)
+
+    async def count_connections(self) -> int:
+        return await self._call("count_connections")
+
+    async def count_users(self) -> int:
+        return await self._call("count_users")
+
+    async def sids(self) -> list[str]:
+        return await self._call("sids")
+
+    async def room_add(self, room: str, sid: str) -> list[dict]:
+        return await self._call("room_add", room, sid)
+
+    async def room_remove(self, room: str, sid: str) -> list[dict]:
+        return await self._call("room_remove", room, sid)
+
+    async def room_leave_all(self, sid: str) -> list[dict]:
+        return await self._call("room_leave_all", sid)
+
+    async def rooms_snapshot(self) -> dict:
+        return await self._call("rooms_snapshot")
+
+    async def rooms_since(self, version: int) -> list[dict] | None:
+        return await self._call("rooms_since", version)
+
+    async def incr(self, key: str, amount: int = 1) -> int:
+        return await self._call("incr", key, amount)
+
+    async def counter(self, key: str) -> int:
+        return await self._call("counter", key)
+
+    async def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+            try:
+                await self._reader_task
+            except asyncio.CancelledError:
+                pass
+
+
+class StateStore:
+    """
+    Процесс-хранилище: MemoryBackend за Unix-сокетом плюс pub/sub-каналы.
+
+    Строки протокола:
+      {"id": 1, "method": "room_add", "args": [...]} -> {"id": 1, "result": ...}
+      {"op": "subscribe", "channel": "socketio"}      -> поток {"channel", "message"}
+      {"op": "publish", "channel": "...", "message": ...}
+
+    Соединения, зарегистрированные воркером, снимаются, если воркер отвалился.
+    """
+
+    def __init__(self):
+        self.state = MemoryBackend()
+        self._subscribers: dict[str, set[asyncio.StreamWriter]] = {}
+
+    async def serve(self, path: str = DEFAULT_SOCKET_PATH) -> asyncio.AbstractServer:
+        if os.path.exists(path):
+            os.unlink(path)
+        return await asyncio.start_unix_server(self._handle, path, limit=LINE_LIMIT)
+
+    async def _handle(self, reader: asyncio.StreamReader,
+                      writer: asyncio.StreamWriter) -> None:
+        owned: set[str] = set()
+        channels: set[str] = set()
+        try:
+            while line := await reader.readline():
+                request = json.loads(line)
+                op = request.get("op")
+                if op == "publish":
+                    self._publish(request["channel"], line)
+                elif op == "subscribe":
+                    channels.add(request["channel"])
+                    self._subscribers.setdefault(request["channel"], set()).add(writer)
+                else:
+                    writer.write(await self._dispatch(request, owned))
+                    await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            for channel in channels:
+                self._subscribers.get(channel, set()).discard(writer)
+            for sid in owned:
+                await self.state.room_leave_all(sid)
+                await self.state.remove_connection(sid)
+            if owned:
+                logger.warning("Воркер отключился, сняты соединения: {}", len(owned))
+            writer.close()
+
+    async def _dispatch(self, request: dict, owned: set[str]) -> bytes:
+        method = request.get("method")
+        args = request.get("args", [])
+        reply = {"id": request.get("id")}
+        if method not in StateBackend.RPC_METHODS:
+            reply["error"] = f"unknown method {method!r}"
+        else:
+            try:
+                reply["result"] = await getattr(self.state, method)(*args)
+            except Exception as e:
+                reply["error"] = repr(e)
+            if method == "add_connection":
+                owned.add(args[0])
+            elif method == "remove_connection":
+                owned.discard(args[0])
+        return json.dumps(reply).encode() + b"\n"
+
+    def _publish(self, channel: str, line: bytes) -> None:
+        for subscriber in self._subscribers.get(channel, ()):
+            subscriber.write(line)
+
+
+class UnixSocketManager(AsyncPubSubManager):
+    """
+    Менеджер клиентов python-socketio, который пересылает emit между
+    воркерами через pub/sub StateStore.
+    """
+
+    name = "unixsocket"
+
+    def __init__(self, path: str = DEFAULT_SOCKET_PATH, channel: str = "socketio",
+                 write_only: bool = False, logger=None):
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+        self.path = path
+        self._writer: asyncio.StreamWriter | None = None
+
+    async def _publish(self, data):
+        if self._writer is None or self._writer.is_closing():
+            _, self._writer = await asyncio.open_unix_connection(self.path)
+        line = {"op": "publish", "channel": self.channel, "message": data}
+        self._writer.write(json.dumps(line).encode() + b"\n")
+        await self._writer.drain()
+
+    async def _listen(self):
+        while True:
+            try:
+                reader, writer = await asyncio.open_unix_connection(
+                    self.path, limit=LINE_LIMIT
+                )
+            except OSError:
+                await asyncio.sleep(1)
+                continue
+            writer.write(
+                json.dumps({"op": "subscribe", "channel": self.channel}).encode() + b"\n"
+            )
+            await writer.drain()
+            while line := await reader.readline():
+                yield json.loads(line)["message"]
+            writer.close()
+
+
+def create_backend(
+    connections: ConnectionRegistry | None = None,
+) -> tuple[StateBackend, socketio.AsyncManager | None]:
+    """
+    Выбрать реализацию по переменным окружения STATE_BACKEND (memory | unix)
+    и STATE_SOCKET. Возвращает бэкенд и менеджер клиентов для AsyncServer.
+    connections — реестр приложения, который MemoryBackend ведёт вместо своего.
+    """
+    kind = os.environ.get("STATE_BACKEND", "memory")
+    if kind == "memory":
+        return MemoryBackend(connections), None
+    if kind == "unix":
+        path = os.environ.get("STATE_SOCKET", DEFAULT_SOCKET_PATH)
+        return UnixSocketBackend(path), UnixSocketManager(path)
+    raise ValueError(f"Неизвестный STATE_BACKEND: {kind!r}")
+
+
+async def _serve_forever(path: str) -> None:
+    server = await StateStore().serve(path)
+    logger.info("Хранилище состояния слушает {}", path)
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Хранилище состояния для воркеров app.py")
+    parser.add_argument("--path", default=os.environ.get("STATE_SOCKET", DEFAULT_SOCKET_PATH))
+    asyncio.run(_serve_forever(parser.parse_args().path))
@@ -0,0 +1,51 @@
+import gzip
+import os
+
+from starlette.requests import Request
+
+from assets import AssetCache
+
+
+def make_request(**headers) -> Request:
+    raw = [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": raw})
+
+
+def test_negotiation_and_not_modified():
+    """Сжатый вариант выбирается по Accept-Encoding, у каждого свой ETag; совпавший ETag — 304."""
+    cache = AssetCache()
+    asset = cache.add_text("/page", "<p>hello</p>" * 100)
+
+    plain = cache.response(asset, make_request())
+    gzipped = cache.response(asset, make_request(accept_encoding="gzip, deflate"))
+    refused = cache.response(asset, make_request(accept_encoding="gzip;q=0"))
+
+    assert "content-encoding" not in plain.headers
+    assert gzipped.headers["content-encoding"] == "gzip"
+    assert gzip.decompress(gzipped.body) == plain.body
+    assert gzipped.headers["etag"] != plain.headers["etag"]
+    assert "content-encoding" not in refused.headers
+
+    again = cache.response(asset, make_request(if_none_match=plain.headers["etag"]))
+    assert again.status_code == 304
+
+
+def test_file_reloaded_after_change(tmp_path):
+    """Файл читается один раз и перечитывается, когда меняется mtime/размер."""
+    now = [0.0]
+    path = tmp_path / "app.js"
+    path.write_text("let a = 1;")
+    cache = AssetCache(check_interval=1.0, clock=lambda: now[0])
+
+    first = cache.file(path)
+    assert cache.file(path) is first
+    assert first.media_type.endswith("javascript; charset=utf-8")
+
+    path.write_text("let a = 22;")
+    os.utime(path, ns=(1, 1))
+    assert cache.file(path) is first        # не чаще раза в check_interval
+    now[0] = 2.0
+    reloaded = cache.file(path)
+    assert reloaded is not first
+    assert reloaded.variants["identity"][0] == b"let a = 22;"
+    assert cache.loads == 2
@@ -0,0 +1,53 @@
+import jwt
+
+from auth import ALGO, SECRET_KEY, VerifiedTokenCache, create_jwt, decode_jwt
+
+
+def test_token_carries_iat_and_exp():
+    """Токен из create_jwt содержит sub, iat и exp = iat + ttl."""
+    payload = decode_jwt(create_jwt("alice", ttl=60))
+
+    assert payload["sub"] == "alice"
+    assert payload["exp"] - payload["iat"] == 60
+
+
+def test_expired_token_is_rejected():
+    """Истёкший токен не проходит проверку."""
+    assert decode_jwt(create_jwt("alice", ttl=-1)) is None
+
+
+def test_cache_entry_evicted_at_expiry():
+    """Запись кэша перестаёт отдаваться, как только наступил exp токена."""
+    now = [1000.0]
+    cache = VerifiedTokenCache(clock=lambda: now[0])
+    cache.put("token", {"sub": "alice", "exp": 1010})
+
+    assert cache.get("token") == {"sub": "alice", "exp": 1010}
+    now[0] = 1010.0
+    assert cache.get("token") is None
+    assert len(cache) == 0
+
+
+def test_cache_is_bounded_lru():
+    """Сверх maxsize вытесняется давно не использованный токен."""
+    cache = VerifiedTokenCache(maxsize=2, clock=lambda: 0.0)
+    cache.put("a", {"sub": "a", "exp": 10})
+    cache.put("b", {"sub": "b", "exp": 10})
+    cache.get("a")
+    cache.put("c", {"sub": "c", "exp": 10})
+
+    assert cache.get("b") is None
+    assert cache.get("a") == {"sub": "a", "exp": 10}
+    assert cache.get("c") == {"sub": "c", "exp": 10}
+
+
+def test_token_without_exp_is_rejected_and_not_cached():
+    """Токен без exp (бессрочный) не проходит проверку и не попадает в кэш."""
+    token = jwt.encode({"sub": "alice"}, SECRET_KEY, algorithm=ALGO)
+
+    assert decode_jwt(token) is None
+    assert decode_jwt(jwt.encode({"exp": 2**31}, SECRET_KEY, algorithm=ALGO)) is None
+
+    cache = VerifiedTokenCache()
+    cache.put(token, {"sub": "alice"})
+    assert len(cache) == 0
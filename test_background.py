@@ -0,0 +1,56 @@
+import asyncio
+
+from background import BackgroundTask, every, percentile
+
+
+def test_start_once_and_stop():
+    """Повторный start не плодит задач; stop отменяет её, после stop можно запустить снова."""
+    class Ticker(BackgroundTask):
+        runs = 0
+
+        async def run(self):
+            self.runs += 1
+            await asyncio.Event().wait()
+
+    async def scenario():
+        ticker = Ticker()
+        ticker.start()
+        ticker.start()
+        await asyncio.sleep(0)
+        assert ticker.runs == 1
+        await ticker.stop()
+        assert ticker._task is None
+        ticker.start()
+        await asyncio.sleep(0)
+        await ticker.stop()
+        return ticker.runs
+
+    assert asyncio.run(scenario()) == 2
+
+
+def test_every_survives_errors():
+    """Ошибка в action логируется, следующий тик всё равно выполняется."""
+    calls = []
+
+    async def action():
+        calls.append(len(calls))
+        if len(calls) == 1:
+            raise RuntimeError("boom")
+
+    async def scenario():
+        task = asyncio.create_task(every(0.001, action, "тик упал"))
+        while len(calls) < 3:
+            await asyncio.sleep(0.001)
+        task.cancel()
+
+    asyncio.run(scenario())
+    assert calls[:3] == [0, 1, 2]
+
+
+def test_percentile_nearest_rank():
+    """Квантиль — ближайший ранг по отсортированной выборке; пустая — 0."""
+    ordered = [float(n) for n in range(1, 101)]
+
+    assert percentile(ordered, 0.50) == 51.0
+    assert percentile(ordered, 0.99) == 100.0
+    assert percentile([], 0.5) == 0.0
@@ -0,0 +1,46 @@
+import asyncio
+
+from chat_batch import ChatBatcher
+
+
+def test_messages_in_window_go_out_as_one_frame():
+    """Сообщения одного окна уходят одним кадром на комнату."""
+    sent = []
+
+    async def publish(room, items):
+        sent.append((room, [item["text"] for item in items]))
+
+    async def scenario():
+        batcher = ChatBatcher(publish, window=0.01)
+        batcher.add("red", {"text": "a"})
+        batcher.add("blue", {"text": "b"})
+        batcher.add("red", {"text": "c"})
+        await asyncio.sleep(0.05)
+        batcher.add("red", {"text": "d"})
+        await batcher.close()
+        return batcher
+
+    batcher = asyncio.run(scenario())
+
+    assert sent == [("red", ["a", "c"]), ("blue", ["b"]), ("red", ["d"])]
+    assert (batcher.frames, batcher.messages) == (3, 4)
+
+
+def test_full_batch_is_sent_before_window_ends():
+    """Комната, набравшая max_batch, отправляется не дожидаясь окна."""
+    sent = []
+
+    async def publish(room, items):
+        sent.append(len(items))
+
+    async def scenario():
+        batcher = ChatBatcher(publish, window=10, max_batch=3)
+        for i in range(4):
+            batcher.add("red", {"text": str(i)})
+        await asyncio.sleep(0)
+        first = list(sent)
+        await batcher.close()
+        return first
+
+    assert asyncio.run(scenario()) == [3]
+    assert sent == [3, 1]
@@ -0,0 +1,84 @@
+import asyncio
+
+from assets import etag_matches
+from client_index import ClientIndex
+from visits import VisitAggregator
+
+
+def test_pages_cached_until_ttl():
+    """Снимок грузится один раз на ttl даже при одновременных запросах; ETag меняется вместе со списком."""
+    now = [0.0]
+    sids = ["a", "b", "c"]
+    calls = []
+
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0)
+        return list(sids)
+
+    index = ClientIndex(load, ttl=1.0, clock=lambda: now[0])
+
+    async def scenario():
+        first, second = await asyncio.gather(index.page(0, 2), index.page(0, 2))
+        assert first is second
+        assert first.body == '["a", "b"]' and first.total == 3
+        assert (await index.page(2, 2)).body == '["c"]'
+        assert len(calls) == 1
+
+        sids.append("d")
+        assert (await index.page(0, 2)).etag == first.etag   # снимок ещё свежий
+        now[0] = 1.5
+        changed = await index.page(0, 2)
+        assert changed.etag != first.etag and changed.total == 4
+
+    asyncio.run(scenario())
+
+
+def test_pages_bounded_and_out_of_range_not_cached():
+    """Кэш страниц ограничен max_pages; offset за концом списка — "[]" без записи в кэш."""
+    async def load():
+        return [str(n) for n in range(10)]
+
+    index = ClientIndex(load, max_pages=2)
+
+    async def scenario():
+        first = await index.page(0, 1)
+        await index.page(1, 1)
+        await index.page(0, 1)                 # свежая: вытеснится (1, 1)
+        await index.page(2, 1)
+        assert list(index._pages) == [(0, 1), (2, 1)]
+        assert await index.page(0, 1) is first
+
+        for offset in (10, 10**9):
+            empty = await index.page(offset, 5)
+            assert empty.body == "[]" and empty.total == 10
+        assert len(index._pages) == 2
+
+    asyncio.run(scenario())
+
+
+def test_etag_matches():
+    """If-None-Match: список, слабые теги и *."""
+    assert etag_matches('"x", W/"abc-0-100"', '"abc-0-100"')
+    assert etag_matches("*", '"abc-0-100"')
+    assert not etag_matches('"abc-0-50"', '"abc-0-100"')
+    assert not etag_matches(None, '"abc-0-100"')
+
+
+def test_visits_published_once_per_interval():
+    """Сколько бы ни было заходов, за интервал уходит одна рассылка; без заходов — ни одной."""
+    published = []
+
+    async def publish(count, interval):
+        published.append((count, interval))
+
+    visits = VisitAggregator(publish, interval=5)
+
+    async def scenario():
+        for _ in range(1000):
+            visits.hit()
+        assert await visits.flush()
+        assert not await visits.flush()
+
+    asyncio.run(scenario())
+    assert published == [(1000, 5)]
@@ -0,0 +1,54 @@
+from project3.models import Game, Player
+from project3.state import GameState
+from project3.trivia_data import load_topics
+
+
+def test_state_matches_pydantic_game():
+    """GameState отдаёт клиенту то же, что pydantic Game: вопрос, разбор, счёт."""
+    topic = load_topics()[0]
+    model = Game(uid="g", topic=topic, players=[Player(sid="a", name="Аня"), Player(sid="b", name="Боря")])
+    state = GameState("g", topic, ("a", "b"), ("Аня", "Боря"))
+    assert state.topic is topic
+
+    for step in range(len(topic.questions)):
+        assert state.to_dict() == model.to_dict()
+        correct = topic.questions[step].correct_index
+        for game in (model, state):
+            game.record_answer("a", correct)
+            if step % 2:
+                game.record_answer("b", correct % 4 + 1)   # b ответил неверно
+        assert state.all_answered() == bool(step % 2)
+        assert state.evaluate_answers() == model.evaluate_answers()
+        model.advance()
+        state.advance()
+
+    assert state.question_count == 0 and state.to_dict() == model.to_dict()
+    assert state.scoreboard() == [{"name": "Аня", "score": len(topic.questions)}, {"name": "Боря", "score": 0}]
+    assert not state.record_answer("чужой", 1)
+    assert state.to_model().model_dump() == model.model_dump()
+
+
+def test_lobby_outstanding_leave_and_ranking():
+    """N игроков: ждём только оставшихся, ушедший не держит вопрос, итоги по местам."""
+    topic = load_topics()[0]
+    correct = topic.questions[0].correct_index
+    sids = [f"s{n}" for n in range(5)]
+    state = GameState("g", topic, sids, [f"p{n}" for n in range(5)])
+
+    for sid in sids[:3]:
+        state.record_answer(sid, correct)
+    state.record_answer("s0", correct)                 # повторный ответ не считается дважды
+    assert state.outstanding == 2
+    assert state.leave("s4") and not state.leave("s4")
+    assert not state.record_answer("s4", correct)
+    state.record_answer("s3", correct % 4 + 1)
+    assert state.all_answered()
+
+    state.evaluate_answers()
+    assert state.outstanding == state.playing == 4
+    assert state.results() == {
+        "players": [{"name": "p0", "score": 1, "rank": 1}, {"name": "p1", "score": 1, "rank": 1},
+                    {"name": "p2", "score": 1, "rank": 1}, {"name": "p3", "score": 0, "rank": 4},
+                    {"name": "p4", "score": 0, "rank": 4}],
+        "winners": ["p0", "p1", "p2"],
+    }
@@ -0,0 +1,85 @@
+import asyncio
+import sys
+
+import pytest
+from loguru import logger
+
+import logging_setup
+from logging_setup import LogSampler, configure_logging, get_level, set_level
+
+
+@pytest.fixture
+def log_file(tmp_path, monkeypatch):
+    """
+    configure_logging пишет во временный файл; после теста возвращаем
+    стандартный обработчик loguru.
+    """
+    path = tmp_path / "test.log"
+    monkeypatch.setattr(logging_setup, "LOG_FILE", str(path))
+    yield path
+    for handler_id in logging_setup._state["handlers"]:
+        logger.remove(handler_id)
+    logging_setup._state.update(level=None, handlers=[])
+    logger.add(sys.stderr)
+
+
+def test_sampler_logs_one_in_n():
+    """rate=N пропускает каждое N-е событие, 0 — ни одного, без настройки — все."""
+    sampler = LogSampler({"message": 3, "create": 0})
+
+    assert [sampler.hit("message") for _ in range(6)] == [False, False, True] * 2
+    assert not any(sampler.hit("create") for _ in range(5))
+    assert all(sampler.hit("other") for _ in range(5))
+
+
+def test_sampler_set_rate_resets_counter():
+    """Смена частоты сбрасывает накопленный счётчик события."""
+    sampler = LogSampler({"message": 3})
+    sampler.hit("message")
+    sampler.hit("message")
+    sampler.set_rate("message", 2)
+
+    assert [sampler.hit("message") for _ in range(2)] == [False, True]
+
+
+def test_disabled_debug_does_not_format_arguments(log_file):
+    """На уровне INFO вызов logger.debug не вычисляет аргументы (ни repr, ни lazy)."""
+    calls = []
+
+    class Payload:
+        def __repr__(self):
+            calls.append("repr")
+            return "Payload()"
+
+    configure_logging("INFO")
+    logger.debug("{!r}", Payload())
+    logger.opt(lazy=True).debug("clients: {}", lambda: calls.append("lazy"))
+
+    assert calls == []
+
+
+def test_set_level_swaps_handlers(log_file):
+    """set_level ставит новые обработчики, снимает старые; DEBUG пишется после смены."""
+    configure_logging("INFO")
+    old = list(logging_setup._state["handlers"])
+
+    logger.debug("hidden")
+    assert asyncio.run(set_level("debug")) == "DEBUG"
+    logger.debug("shown")
+    logger.complete()
+
+    assert get_level() == "DEBUG"
+    assert not set(old) & set(logging_setup._state["handlers"])
+    text = log_file.read_text()
+    assert "shown" in text and "hidden" not in text
+    assert text.count("shown") == 1
+
+
+def test_set_level_rejects_unknown(log_file):
+    """Неизвестный уровень — ValueError, обработчики и уровень прежние."""
+    configure_logging("INFO")
+    handlers = list(logging_setup._state["handlers"])
+
+    with pytest.raises(ValueError):
+        asyncio.run(set_level("LOUD"))
+    assert get_level() == "INFO" and logging_setup._state["handlers"] == handlers
@@ -0,0 +1,12 @@
+from loop_lag import LoopLagMonitor
+
+
+def test_stats_and_reset():
+    """p50/p99/max считаются по замерам в миллисекундах, reset обнуляет."""
+    monitor = LoopLagMonitor(samples=100)
+    for ms in range(1, 101):
+        monitor.record(ms / 1000)
+
+    assert monitor.stats() == {"samples": 100, "p50_ms": 51.0, "p99_ms": 100.0, "max_ms": 100.0}
+    monitor.reset()
+    assert monitor.stats() == {"samples": 0, "p50_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
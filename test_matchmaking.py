@@ -0,0 +1,107 @@
+from project3.matchmaking import Matchmaker
+
+
+def test_fifo_cancel_and_timeout():
+    """Без рейтинга — по порядку прихода; отмена по sid; просроченные снимаются sweep."""
+    now = [0.0]
+    mm = Matchmaker(timeout=10, clock=lambda: now[0])
+
+    assert mm.join("a", 1) is None
+    assert mm.join("b", 2) is None
+    assert [t.sid for t in mm.join("c", 1)] == ["a"]
+    assert mm.depth(1) == 0 and "a" not in mm
+
+    mm.join("d", 1)
+    mm.join("e", 1, rating=5)  # нашёл d: без MATCH_BAND рейтинг не важен
+    assert len(mm) == 1 and "b" in mm
+
+    mm.join("f", 1)
+    assert mm.cancel("f").sid == "f"
+    assert mm.cancel("f") is None
+
+    now[0] = 11
+    pairs, expired = mm.sweep()
+    assert pairs == [] and [t.sid for t in expired] == ["b"]
+    assert mm.stats()["topics"]["1"]["wait_p50"] == 0.0
+    assert (mm.matched, mm.expired, mm.cancelled) == (2, 1, 1)
+
+
+def test_rating_band_widens_over_time():
+    """С band соперник подбирается по рейтингу, а допуск растёт, пока игроки ждут."""
+    now = [0.0]
+    mm = Matchmaker(timeout=None, band=100, band_growth=50, clock=lambda: now[0])
+
+    assert mm.join("low", 1, rating=1000) is None
+    assert mm.join("high", 1, rating=1400) is None      # разница 400 > 100
+    assert [t.sid for t in mm.join("mid", 1, rating=1080)] == ["low"]   # 80 <= 100
+    assert mm.join("any", 2) is None
+    assert [t.sid for t in mm.join("anyone", 2, rating=1)] == ["any"]   # без рейтинга — любой
+
+    mm.join("far", 1, rating=1900)
+    now[0] = 4                                           # допуск high: 100 + 200
+    assert mm.sweep() == ([], [])
+    now[0] = 8                                           # допуск high: 100 + 400
+    (first, second), = mm.sweep()[0]
+    assert (first.sid, second.sid) == ("high", "far")
+    assert len(mm) == 0
+
+
+def test_lobby_sizes_and_fill_timeout():
+    """Лобби темы набирается до своего размера; по fill_timeout стартует неполным."""
+    now = [0.0]
+    mm = Matchmaker(timeout=60, sizes={1: 4}, fill_timeout=5, clock=lambda: now[0])
+
+    assert mm.join("a", 1) is None
+    assert mm.join("b", 1) is None
+    assert mm.join("c", 1) is None
+    assert [t.sid for t in mm.join("d", 1)] == ["a", "b", "c"]   # 4-й полный состав
+    assert mm.join("y", 2) is None
+    assert [t.sid for t in mm.join("z", 2)] == ["y"]            # размер по умолчанию — 2
+
+    mm.join("e", 1)
+    now[0] = 3
+    mm.join("f", 1)
+    assert mm.sweep() == ([], [])
+    now[0] = 6                                           # e ждёт дольше fill_timeout
+    (lobby,), expired = mm.sweep()
+    assert [t.sid for t in lobby] == ["e", "f"] and expired == []
+
+    mm.join("alone", 1)
+    now[0] = 20
+    assert mm.sweep() == ([], [])                        # меньше min_players — ждёт
+    assert mm.matched == 3 and len(mm) == 1
+
+
+def test_band_spans_whole_lobby():
+    """Разброс рейтингов всего лобби на троих не больше допуска, а не только с новичком."""
+    now = [0.0]
+    mm = Matchmaker(timeout=None, band=100, band_growth=50, sizes={1: 3}, clock=lambda: now[0])
+
+    assert mm.join("low", 1, rating=1000) is None
+    assert mm.join("high", 1, rating=1180) is None
+    assert mm.join("mid", 1, rating=1090) is None     # по 90 с каждым, но разброс 180 > 100
+    assert mm.sweep() == ([], [])
+
+    now[0] = 2                                        # допуск: 100 + 2 * 50 >= 180
+    (lobby,), _ = mm.sweep()
+    assert [t.sid for t in lobby] == ["low", "high", "mid"]
+
+    assert mm.join("a", 1, rating=1000) is None
+    assert mm.join("far", 1, rating=1150) is None
+    assert mm.join("b", 1, rating=1090) is None       # с a и far разброс 150
+    assert [t.sid for t in mm.join("c", 1, rating=1050)] == ["a", "b"]
+    assert "far" in mm and len(mm) == 1
+
+
+def test_fill_timeout_without_band_ignores_ratings():
+    """Без band рейтинги заявок не мешают стартовать неполному лобби по fill_timeout."""
+    now = [0.0]
+    mm = Matchmaker(timeout=60, lobby_size=4, fill_timeout=15, clock=lambda: now[0])
+
+    assert mm.join("a", 1, rating=1000) is None
+    assert mm.join("b", 1, rating=2000) is None
+    now[0] = 16
+    (lobby,), expired = mm.sweep()
+
+    assert [t.sid for t in lobby] == ["a", "b"] and expired == []
+    assert len(mm) == 0
@@ -0,0 +1,105 @@
+import asyncio
+
+import pytest
+import socketio
+from engineio import packet as eio_packet
+from socketio import packet
+
+import metrics as metrics_module
+from metrics import Histogram, Metrics, frame_event, instrument
+from wire import create_server, encode_msgpack
+
+
+def test_histogram_render():
+    """Корзины в тексте накопленные, +Inf равна count; читатели gauge могут быть корутинами."""
+    metrics = Metrics(prefix="t", buckets=(0.01, 0.1))
+    for seconds in (0.005, 0.05, 0.05, 3.0):
+        metrics.observe("connect", seconds)
+    metrics.count_frame("update", 10)
+    metrics.count_frame("update", 5)
+
+    async def rooms():
+        return 7
+
+    metrics.gauge("rooms", "комнаты", rooms)
+    text = asyncio.run(metrics.render())
+
+    assert 't_handler_seconds_bucket{event="connect",le="0.01"} 1' in text
+    assert 't_handler_seconds_bucket{event="connect",le="0.1"} 3' in text
+    assert 't_handler_seconds_bucket{event="connect",le="+Inf"} 4' in text
+    assert 't_handler_seconds_count{event="connect"} 4' in text
+    assert 't_emitted_frames_total{event="update"} 2' in text
+    assert 't_emitted_bytes_total{event="update"} 15' in text
+    assert "# TYPE t_rooms gauge\nt_rooms 7" in text
+    assert Histogram((1.0,)).cumulative() == [0, 0]
+
+
+def test_frame_event():
+    """Имя события берётся из JSON-кадра без разбора; служебные кадры — с подчёркиванием."""
+    event = packet.Packet(packet.EVENT, data=["update", {"текст": 1}]).encode()
+    ack = packet.Packet(packet.ACK, data=[True], id=3).encode()
+
+    assert frame_event(eio_packet.Packet(eio_packet.MESSAGE, event)) == ("update", len(event.encode()))
+    assert frame_event(eio_packet.Packet(eio_packet.MESSAGE, ack))[0] == "_ack"
+    assert frame_event(eio_packet.Packet(eio_packet.PING)) is None
+
+
+
+def test_frame_event_msgpack_without_decoding(monkeypatch):
+    """MessagePack-кадры из wire помечены пакетом: имя события берётся без декодирования."""
+    monkeypatch.setattr(metrics_module, "MsgPackPacket", None)  # декодирование дало бы "_binary"
+    sio = create_server("msgpack", async_mode="asgi")
+    broadcast = sio.packet_class(packet.EVENT, data=["rooms_snapshot", {"rooms": {}}]).encode()
+    negotiated = encode_msgpack(packet.Packet(packet.EVENT, data=["topics", []]))
+
+    for data, name in ((broadcast, "rooms_snapshot"), (negotiated, "topics")):
+        assert frame_event(eio_packet.Packet(eio_packet.MESSAGE, data)) == (name, len(data))
+
+def test_instrument_records_emit_wait_and_exceptions():
+    """Обёртка считает ожидание emit внутри обработчика и исключения, не глотая их."""
+    sio = socketio.AsyncServer(async_mode="asgi")
+    metrics = Metrics()
+
+    @sio.event
+    async def ping(sid):
+        await sio.emit("pong", {}, to=sid)
+
+    @sio.event
+    async def boom(sid):
+        raise ValueError("boom")
+
+    instrument(sio, metrics)
+
+    async def scenario():
+        await sio._trigger_event("ping", "/", "sid1")
+        with pytest.raises(ValueError):
+            await sio._trigger_event("boom", "/", "sid1")
+        await sio._trigger_event("unknown", "/", "sid1")
+
+    asyncio.run(scenario())
+
+    assert metrics.handler_seconds["ping"].count == 1
+    assert 0 < metrics.emit_seconds["ping"].sum <= metrics.handler_seconds["ping"].sum
+    assert metrics.emit_seconds["boom"].sum == 0
+    assert metrics.exceptions == {("boom", "ValueError"): 1}
+    assert "unknown" not in metrics.handler_seconds
+
+
+def test_instrument_counts_frames_of_public_emit():
+    """
+    Кадры sio.emit доходят до sio.eio.send_packet: если python-socketio
+    перестанет слать через него, тест упадёт (версии закреплены в requirements.txt).
+    """
+    sio = socketio.AsyncServer(async_mode="asgi")
+    metrics = Metrics()
+    instrument(sio, metrics)
+
+    async def scenario():
+        sid = await sio.manager.connect("eio1", "/")
+        await sio.emit("update", {"n": 1}, to=sid)
+        await sio.emit("update", {"n": 2})
+
+    asyncio.run(scenario())
+
+    assert metrics.frames == {"update": 2}
+    assert metrics.bytes["update"] > 0
@@ -0,0 +1,60 @@
+import asyncio
+import json
+
+from pydantic import BaseModel
+
+from batch_validation import BatchValidator
+from ndjson_ingest import ingest, iter_line_chunks
+
+
+class Item(BaseModel):
+    name: str
+    qty: int
+
+
+async def _stream(parts: list[bytes]):
+    for part in parts:
+        yield part
+
+
+async def _collect(agen) -> list:
+    return [x async for x in agen]
+
+
+def test_lines_split_across_chunks_and_too_long():
+    """Строки собираются через границы кусков, длинная строка не копится."""
+    parts = [b'{"a"', b': 1}\n\n{"b": 2}\n' + b"x" * 50, b"y" * 50 + b'\n{"c": 3}']
+
+    chunks = asyncio.run(_collect(iter_line_chunks(_stream(parts), chunk_lines=2, max_line=64)))
+
+    assert chunks == [
+        [(1, b'{"a": 1}'), (3, b'{"b": 2}')],
+        [(4, None), (5, b'{"c": 3}')],
+    ]
+
+
+def test_ingest_reports_per_line_results():
+    """Ошибки приходят по номерам строк, принятые — пачками в on_accepted."""
+    body = b"\n".join([
+        b'{"name": "a", "qty": 1}',
+        b'{"name": "b", "qty": "many"}',
+        b"not json",
+        b'{"name": "c", "qty": 3}',
+    ])
+    published = []
+
+    async def on_accepted(items):
+        published.append(items)
+
+    lines = asyncio.run(_collect(ingest(
+        _stream([body]), BatchValidator(Item), on_accepted=on_accepted, chunk_lines=3,
+    )))
+    results = [json.loads(line) for line in lines]
+
+    assert [r["line"] for r in results if "errors" in r] == [2, 3]
+    assert [r for r in results if "errors" not in r] == [
+        {"lines": [1, 3], "accepted": 1, "rejected": 2},
+        {"lines": [4, 4], "accepted": 1, "rejected": 0},
+        {"done": True, "lines": 4, "accepted": 2, "rejected": 2},
+    ]
+    assert published == [[{"name": "a", "qty": 1}], [{"name": "c", "qty": 3}]]
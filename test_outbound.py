@@ -0,0 +1,82 @@
+from engineio import packet as eio_packet
+from socketio import packet
+
+from outbound import OutboundPolicy, OutboundQueue, event_of
+
+
+def frame(event: str, data=None):
+    encoded = packet.Packet(packet.EVENT, data=[event, data]).encode()
+    return eio_packet.Packet(eio_packet.MESSAGE, encoded)
+
+
+def drain(queue: OutboundQueue) -> list:
+    items = []
+    while not queue.empty():
+        items.append(queue.get_nowait())
+    return items
+
+
+def test_event_of_reads_socketio_events_only():
+    """Имя и данные события достаются из кадра; служебные пакеты — None."""
+    assert event_of(frame("update", {"n": 1})) == ("update", None)
+    assert event_of(frame("update", {"n": 1}), peek={"update"}) == ("update", {"n": 1})
+    assert event_of(eio_packet.Packet(eio_packet.MESSAGE, "0{}")) is None
+    assert event_of(eio_packet.Packet(eio_packet.PING)) is None
+
+
+def test_latest_only_replaces_queued_state_in_place():
+    """При хвосте в очереди остаётся только последнее состояние, на старом месте."""
+    queue = OutboundQueue(OutboundPolicy(high_water=10, backlog=1, latest={"update"}))
+    chat_a, first, chat_b, second = (
+        frame("chat", "a"), frame("update", 1), frame("chat", "b"), frame("update", 2)
+    )
+    for pkt in (chat_a, first, chat_b, second):
+        queue.put_nowait(pkt)
+
+    assert drain(queue) == [chat_a, second, chat_b]
+    assert queue.coalesced == 1
+
+    queue.put_nowait(frame("chat", "c"))
+    third = frame("update", 3)
+    queue.put_nowait(third)  # прежний кадр уже ушёл — новый встаёт в конец
+    assert drain(queue)[-1] is third
+
+
+def test_chat_over_high_water_disconnects_once():
+    """Чат выше high_water вызывает on_overflow один раз, прочее — отбрасывается."""
+    calls = []
+    queue = OutboundQueue(OutboundPolicy(high_water=2, backlog=1, disconnect={"chat"}))
+    queue.on_overflow = lambda: calls.append(True)
+    for i in range(4):
+        queue.put_nowait(frame("chat", i))
+    queue.put_nowait(frame("rooms", 1))
+    queue.put_nowait(eio_packet.Packet(eio_packet.CLOSE))
+
+    assert calls == [True]
+    assert queue.dropped == 3
+    assert queue.qsize() == 3  # два кадра чата + CLOSE
+
+
+def test_json_frames_parsed_only_for_peek_events(monkeypatch):
+    """При хвосте JSON-кадры не разбираются целиком, кроме событий из peek."""
+    parsed = []
+    original = packet.Packet.decode
+
+    def decode(self, encoded_packet):
+        parsed.append(encoded_packet)
+        return original(self, encoded_packet)
+
+    def key(event, data):
+        return "online" if event == "message" and "online" in data else event
+
+    queue = OutboundQueue(OutboundPolicy(high_water=10, backlog=0, latest={"update", "online"},
+                                         key=key, peek={"message"}))
+    updates = [frame("update", n) for n in range(3)]
+    monkeypatch.setattr(packet.Packet, "decode", decode)
+    for pkt in updates:
+        queue.put_nowait(pkt)
+    queue.put_nowait(frame("message", {"online": 1}))
+    queue.put_nowait(frame("message", {"online": 2}))
+
+    assert len(parsed) == 2
+    assert queue.coalesced == 3
@@ -0,0 +1,25 @@
+import time
+
+from profiler import SamplingProfiler
+
+
+def busy_loop(seconds: float) -> None:
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def test_collapsed_stacks():
+    """Стек потока попадает в collapsed stacks: корень слева, счётчик в конце строки."""
+    profiler = SamplingProfiler(interval=0.001)
+    profiler.start()
+    busy_loop(0.2)
+    profiler.stop()
+
+    lines = profiler.collapsed().splitlines()
+    assert lines
+    assert any("test_collapsed_stacks (test_profiler.py" in line and "busy_loop" in line
+               for line in lines)
+    stack, count = lines[0].rsplit(" ", 1)
+    assert int(count) > 0
+    assert not profiler.running
@@ -0,0 +1,24 @@
+from project3.catalog import TopicCatalog
+from project3.trivia_data import load_topics
+
+
+def test_catalog_summary_and_overlay():
+    """В лобби уходит только сводка тем; has_players накладывается, не трогая waiting."""
+    topics = load_topics()
+    encoded = []
+    catalog = TopicCatalog(topics, encode=lambda payload: encoded.append(payload) or len(encoded),
+                           lobby_size=lambda pk: 6 if pk == topics[0].pk else 2)
+    waiting = {topics[0].pk: ["sid1"], topics[1].pk: []}
+
+    payload = catalog.payload(waiting)
+    assert payload[0] == {"pk": topics[0].pk, "name": topics[0].name,
+                          "question_count": len(topics[0].questions), "lobby_size": 6,
+                          "has_players": True}
+    assert [t["has_players"] for t in payload[1:]] == [False] * (len(topics) - 1)
+    assert all("questions" not in t for t in payload)
+    assert waiting == {topics[0].pk: ["sid1"], topics[1].pk: []}
+
+    # кадр на наложение кодируется один раз
+    assert catalog.frame(waiting) == catalog.frame(dict(waiting)) == 1
+    assert catalog.frame({}) == 2
+    assert len(encoded) == 2
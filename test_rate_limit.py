@@ -0,0 +1,47 @@
+from rate_limit import RateLimiter, parse_rules
+from registry import ConnectionRegistry
+
+
+def make_limiter(rules: dict):
+    now = [0.0]
+    return RateLimiter(parse_rules(rules), clock=lambda: now[0]), now
+
+
+def test_sid_bucket_burst_and_refill():
+    """После burst событий корзина пуста, через 1/rate секунд — снова токен."""
+    limiter, now = make_limiter({"message": {"sid": [2, 3]}})
+    conn = ConnectionRegistry().add("s1", "alice")
+
+    assert [limiter.check(conn, "message") for _ in range(3)] == [None] * 3
+    bucket = limiter.check(conn, "message")
+    assert bucket is not None
+    assert bucket.retry_after() == 0.5
+
+    now[0] = 0.5
+    assert limiter.check(conn, "message") is None
+    assert limiter.allowed["message"] == 4
+    assert limiter.limited["message"] == 1
+
+
+def test_user_bucket_shared_between_connections():
+    """Корзина пользователя общая для всех его sid; отказ не тратит токен sid."""
+    limiter, _ = make_limiter({"join_room": {"sid": [1, 2], "user": [1, 2]}})
+    registry = ConnectionRegistry()
+    first = registry.add("s1", "alice")
+    second = registry.add("s2", "alice")
+    other = registry.add("s3", "bob")
+
+    assert limiter.check(first, "join_room") is None
+    assert limiter.check(second, "join_room") is None
+    assert limiter.check(second, "join_room") is not None  # корзина alice пуста
+    assert second.buckets["join_room"].tokens == 1          # токен sid вернули
+    assert limiter.check(other, "join_room") is None
+
+
+def test_events_without_rule_are_not_limited():
+    """Событие без правила проходит и не заводит корзин."""
+    limiter, _ = make_limiter({"message": {"sid": [1, 1]}})
+    conn = ConnectionRegistry().add("s1", "alice")
+
+    assert all(limiter.check(conn, "get_score") is None for _ in range(100))
+    assert conn.buckets is None
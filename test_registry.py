@@ -0,0 +1,43 @@
+from registry import Connection, ConnectionRegistry
+
+
+def test_add_remove_and_count_users():
+    """Пользователь считается один раз на все свои sid и пропадает с последним."""
+    registry = ConnectionRegistry()
+    registry.add("s1", "alice")
+    registry.add("s2", "alice")
+    registry.add("s3", "bob")
+
+    assert len(registry) == 3 and registry.count_users() == 2
+    assert registry.sids_of("alice") == {"s1", "s2"}
+    assert registry.user_of("s3") == "bob"
+
+    assert registry.remove("s1").sid == "s1"
+    assert registry.count_users() == 2
+    registry.remove("s2")
+    assert registry.count_users() == 1 and registry.sids_of("alice") == set()
+    assert registry.remove("s2") is None
+    assert "s2" not in registry and registry.sids() == ["s3"]
+
+
+def test_user_buckets_shared_between_sids():
+    """Корзины лимитов пользователя общие для всех его соединений."""
+    registry = ConnectionRegistry()
+    first = registry.add("s1", "alice")
+    first.user_buckets["create"] = object()
+
+    assert registry.add("s2", "alice").user_buckets is first.user_buckets
+    assert registry.add("s3", "bob").user_buckets == {}
+
+
+def test_memory_per_connection():
+    """Оценка памяти: пустой реестр — 0, иначе не меньше самой записи соединения."""
+    registry = ConnectionRegistry()
+    assert registry.memory_per_connection() == 0.0
+
+    for n in range(100):
+        registry.add(f"s{n}", f"user{n % 10}")
+
+    per_connection = registry.memory_per_connection()
+    assert per_connection >= Connection("s", "u").footprint()
+    assert per_connection < 4096
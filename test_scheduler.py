@@ -0,0 +1,43 @@
+import asyncio
+
+from project3.scheduler import Scheduler
+
+
+def test_order_cancel_and_coroutines():
+    """Сроки срабатывают по порядку, отменённые — нет, корутины выполняются задачами."""
+    async def scenario():
+        scheduler = Scheduler()
+        scheduler.start()
+        fired = []
+
+        async def later(name):
+            await asyncio.sleep(0)
+            fired.append(name)
+
+        # сроки с запасом: под нагрузкой b и c не должны попасть в один тик
+        scheduler.call_later(0.2, fired.append, "c")
+        scheduler.call_later(0.1, later, "b")
+        dropped = scheduler.call_later(0.05, fired.append, "dropped")
+        scheduler.call_later(0.0, fired.append, "a")   # раньше того, до которого спим
+        dropped.cancel()
+        dropped.cancel()
+        assert len(scheduler) == 3
+
+        await asyncio.sleep(0.3)
+        await scheduler.stop()
+        return fired, len(scheduler), scheduler.fired
+
+    assert asyncio.run(scenario()) == (["a", "b", "c"], 0, 3)
+
+
+def test_mass_cancel_rebuilds_heap():
+    """Когда отменено больше половины, куча пересобирается без них."""
+    async def scenario():
+        scheduler = Scheduler()
+        timers = [scheduler.call_later(60, print) for _ in range(1000)]
+        for timer in timers[:600]:
+            timer.cancel()
+        return len(scheduler), len(scheduler._heap)
+
+    active, heap = asyncio.run(scenario())
+    assert active == 400 and heap < 600
@@ -0,0 +1,91 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+
+@pytest.fixture(scope="module")
+def quiz(tmp_path_factory):
+    """
+    Модуль project3/main без запуска сервера: quiz_server.log — во временном
+    каталоге, кадры клиентам перехватываются вместо отправки.
+    """
+    os.environ.setdefault("SIO_LOG", "0")
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp("quiz"))
+    try:
+        from project3 import main
+    finally:
+        os.chdir(cwd)
+    main.sent = []
+
+    async def send_packet(eio_sid, pkt):
+        main.sent.append((eio_sid, json.loads(pkt.data[pkt.data.index("["):])))
+
+    main.sio.eio.send_packet = send_packet
+    return main
+
+
+def received(quiz, eio_sid: str, event: str) -> list:
+    return [data for to, (name, data) in quiz.sent if to == eio_sid and name == event]
+
+
+async def start_game_with_spectator(quiz, tag: str):
+    """Игра на двоих (p1, p2) и зритель; eio sid-ы — "<tag>-<имя>"."""
+    sids = {}
+    for name in ("p1", "p2", "viewer"):
+        sids[name] = await quiz.sio.manager.connect(f"{tag}-{name}", "/")
+    for name in ("p1", "p2"):
+        quiz.sid_to_name[sids[name]] = name
+    topic_pk = next(iter(quiz.TOPICS))
+    await quiz.start_game(topic_pk, [sids["p1"], sids["p2"]])
+    game = quiz.active_games[quiz.sid_to_game[sids["p1"]]]
+    await quiz.spectate(sids["viewer"], {"game_uid": game.uid})
+    return sids, game
+
+
+def test_spectator_gets_current_state_and_game_events(quiz):
+    """Зритель сразу получает состояние игры, а затем — разбор вопроса вместе с игроками."""
+    async def scenario():
+        sids, game = await start_game_with_spectator(quiz, "watch")
+        (snapshot,) = received(quiz, "watch-viewer", "game")
+        assert snapshot["uid"] == game.uid
+        assert [p["name"] for p in snapshot["players"]] == ["p1", "p2"]
+
+        await quiz.answer(sids["p1"], {"game_uid": game.uid, "index": 1})
+        await quiz.answer(sids["p2"], {"game_uid": game.uid, "index": 2})
+        feedback = received(quiz, "watch-viewer", "game")[-1]
+        assert feedback["feedback"]["answer"] == game.topic.questions[0].correct_index
+        assert received(quiz, "watch-p1", "game")[-1] == feedback
+        await quiz.remove_game(game.uid)
+
+    asyncio.run(scenario())
+
+
+def test_spectator_answer_is_ignored(quiz):
+    """Ответ зрителя не засчитывается: игра по-прежнему ждёт обоих игроков."""
+    async def scenario():
+        sids, game = await start_game_with_spectator(quiz, "ignore")
+
+        await quiz.answer(sids["viewer"], {"game_uid": game.uid, "index": 1})
+        assert game.outstanding == 2
+        await quiz.answer(sids["p1"], {"game_uid": game.uid, "index": 1})
+        assert game.outstanding == 1 and not game.feedback_sent
+        assert "viewer" not in [p["name"] for p in game.scoreboard()]
+        await quiz.remove_game(game.uid)
+
+    asyncio.run(scenario())
+
+
+def test_spectate_unknown_game(quiz):
+    """Просмотр несуществующей игры — ошибка game_not_found."""
+    async def scenario():
+        sid = await quiz.sio.manager.connect("eio-lost", "/")
+        await quiz.spectate(sid, {"game_uid": "no-such-game"})
+
+    asyncio.run(scenario())
+
+    assert received(quiz, "eio-lost", "error") == [
+        {"error": "game_not_found", "message": "Game not found"}
+    ]
@@ -0,0 +1,170 @@
+import asyncio
+import functools
+import json
+import os
+import tempfile
+
+import socketio
+
+from presence import PresenceAggregator
+from registry import ConnectionRegistry
+from state_backend import MemoryBackend, StateStore, UnixSocketBackend, UnixSocketManager
+from visits import VisitAggregator
+
+
+def run_with_store(scenario):
+    """Поднять StateStore на временном сокете и прогнать сценарий."""
+
+    async def main():
+        path = os.path.join(tempfile.mkdtemp(), "state.sock")
+        server = await StateStore().serve(path)
+        try:
+            await scenario(path)
+        finally:
+            server.close()
+            await server.wait_closed()
+
+    asyncio.run(main())
+
+
+def test_memory_backend_shares_app_registry():
+    """С реестром приложения у sid одна запись: комнаты лежат в ней, add_connection её не заменяет."""
+
+    async def scenario():
+        registry = ConnectionRegistry()
+        backend = MemoryBackend(registry)
+        conn = registry.add("s1", "alice")
+
+        await backend.add_connection("s1", "alice")
+        await backend.room_add("room1", "s1")
+
+        assert registry.get("s1") is conn and conn.rooms == {"room1"}
+        assert await backend.count_connections() == 1
+        left = await backend.room_leave_all("s1")
+        await backend.remove_connection("s1")
+        assert [c["op"] for c in left] == ["remove", "drop"]
+        assert "s1" not in registry
+
+    asyncio.run(scenario())
+
+
+def test_counts_and_rooms_are_global_across_workers():
+    """Два «воркера» видят общий онлайн и общую карту комнат."""
+
+    async def scenario(path):
+        worker_a, worker_b = UnixSocketBackend(path), UnixSocketBackend(path)
+
+        await worker_a.add_connection("sid-a1", "alice")
+        await worker_a.add_connection("sid-a2", "alice")
+        await worker_b.add_connection("sid-b1", "bob")
+
+        assert await worker_b.count_connections() == 3
+        assert await worker_b.count_users() == 2
+
+        created = await worker_a.room_add("room1", "sid-a1")
+        joined = await worker_b.room_add("room1", "sid-b1")
+
+        assert [c["op"] for c in created] == ["create", "add"]
+        assert [c["op"] for c in joined] == ["add"]
+        snapshot = await worker_b.rooms_snapshot()
+        assert sorted(snapshot["rooms"]["room1"]) == ["sid-a1", "sid-b1"]
+        assert snapshot["version"] == joined[-1]["version"]
+
+        assert await worker_a.incr("lost") == 1
+        assert await worker_b.incr("lost") == 2
+
+        await worker_a.close()
+        await worker_b.close()
+
+    run_with_store(scenario)
+
+
+def test_store_drops_connections_of_dead_worker():
+    """Если воркер отвалился, его соединения и членство в комнатах снимаются."""
+
+    async def scenario(path):
+        worker_a, worker_b = UnixSocketBackend(path), UnixSocketBackend(path)
+        await worker_a.add_connection("sid-a1", "alice")
+        await worker_a.room_add("room1", "sid-a1")
+        await worker_b.add_connection("sid-b1", "bob")
+
+        await worker_a.close()
+        await asyncio.sleep(0.05)
+
+        assert await worker_b.count_connections() == 1
+        assert (await worker_b.rooms_snapshot())["rooms"] == {}
+        await worker_b.close()
+
+    run_with_store(scenario)
+
+
+def test_emit_bus_delivers_to_other_workers():
+    """Сообщение, опубликованное одним менеджером, получает другой."""
+
+    async def scenario(path):
+        sender, receiver = UnixSocketManager(path), UnixSocketManager(path)
+        messages = receiver._listen()
+        first = asyncio.ensure_future(messages.__anext__())
+        await asyncio.sleep(0.05)  # подписка успевает дойти до хранилища
+
+        await sender._publish({"method": "emit", "event": "message", "data": [1]})
+
+        message = await asyncio.wait_for(first, 1)
+        assert message["event"] == "message"
+        await messages.aclose()
+
+    run_with_store(scenario)
+
+
+def test_presence_and_visits_reach_each_client_once_across_workers():
+    """Два воркера на общей шине: онлайн и заходы приходят каждому клиенту по одному кадру."""
+
+    async def scenario(path):
+        workers = []
+        for name in ("a", "b"):
+            backend = UnixSocketBackend(path)
+            sio = socketio.AsyncServer(async_mode="asgi", client_manager=UnixSocketManager(path))
+            sio.manager.initialize()
+            frames = []
+
+            async def send_packet(eio_sid, pkt, frames=frames):
+                frames.append(json.loads(pkt.data[pkt.data.index("["):]))
+
+            sio.eio.send_packet = send_packet
+            sid = await sio.manager.connect(f"eio-{name}", "/")
+            await sio.enter_room(sid, "presence")
+            await backend.add_connection(sid, f"user-{name}")
+
+            async def publish_online(value, sio=sio):
+                await sio.emit("message", {"online": value}, room="presence", ignore_queue=True)
+
+            async def publish_visits(count, interval, sio=sio):
+                await sio.emit("message", {"visits": count}, ignore_queue=True)
+
+            workers.append({
+                "sio": sio,
+                "frames": frames,
+                "presence": PresenceAggregator(backend.count_connections, publish_online, poll=True),
+                "visits": VisitAggregator(publish_visits, shared=functools.partial(backend.incr, "visits")),
+            })
+        for worker in workers:
+            worker["visits"].start()
+        await asyncio.sleep(0.05)  # подписки на шину и отметки счётчика заходов
+
+        workers[0]["visits"].hit()
+        for _ in range(3):
+            workers[1]["visits"].hit()
+        for _ in range(2):
+            for worker in workers:
+                await worker["presence"].flush()
+                await worker["visits"].flush()
+        await asyncio.sleep(0.05)  # чужие рассылки через шину, если бы они были
+
+        for worker in workers:
+            events = [data for _, data in worker["frames"]]
+            assert [e["online"] for e in events if "online" in e] == [2]
+            assert sum(e["visits"] for e in events if "visits" in e) == 4
+            await worker["visits"].stop()
+            worker["sio"].manager.thread.cancel()
+
+    run_with_store(scenario)
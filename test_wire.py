@@ -0,0 +1,58 @@
+import asyncio
+
+import msgpack
+from socketio import packet
+
+from wire import HybridPacket, encode_msgpack, requested_format
+from wire import create_server, encode_event, send_encoded
+
+
+def test_hybrid_packet_decodes_json_and_msgpack():
+    """Текстовый кадр разбирается как JSON, бинарный — как MessagePack."""
+    as_json = HybridPacket(packet.EVENT, data=["message", {"text": "hi"}]).encode()
+    as_msgpack = msgpack.dumps({"type": packet.EVENT, "nsp": "/",
+                                "data": ["message", {"text": "hi"}]})
+
+    for encoded in (as_json, as_msgpack):
+        pkt = HybridPacket(encoded_packet=encoded)
+        assert pkt.packet_type == packet.EVENT
+        assert pkt.data == ["message", {"text": "hi"}]
+
+
+def test_binary_payload_goes_inline_for_msgpack():
+    """Для msgpack-клиента бинарные данные остаются внутри пакета, без вложений."""
+    pkt = HybridPacket(packet.EVENT, data=["file", b"\x00\x01"])
+
+    decoded = msgpack.loads(encode_msgpack(pkt))
+
+    assert decoded["type"] == packet.EVENT
+    assert decoded["data"] == ["file", b"\x00\x01"]
+
+
+def test_format_is_negotiated_from_query():
+    """Формат выбирается параметром ?wire=, по умолчанию — JSON."""
+    assert requested_format({"QUERY_STRING": "EIO=4&transport=websocket&wire=msgpack"}) == "msgpack"
+    assert requested_format({"QUERY_STRING": "EIO=4&transport=websocket"}) == "json"
+
+
+def test_send_encoded_reuses_frame():
+    """Кадр encode_event уходит тем же объектом каждому sid, без повторного кодирования."""
+    sio = create_server("negotiate", async_mode="asgi")
+    sent = []
+
+    async def send_packet(eio_sid, pkt):
+        sent.append((eio_sid, pkt))
+
+    sio.eio.send_packet = send_packet
+
+    async def scenario():
+        frame = encode_event(sio, "game", {"uid": "game"})
+        for eio_sid in ("eio-a", "eio-b"):
+            await send_encoded(sio, await sio.manager.connect(eio_sid, "/"), frame)
+        await send_encoded(sio, "gone", frame)
+        return frame
+
+    frame = asyncio.run(scenario())
+
+    assert [eio_sid for eio_sid, _ in sent] == ["eio-a", "eio-b"]
+    assert all(pkt is frame[0] for _, pkt in sent)
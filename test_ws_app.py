@@ -1,4 +1,6 @@
 import json
+import time
+
 import socketio
 import requests
 import pytest
@@ -56,6 +58,21 @@ def test_get_users_online(sio: socketio.SimpleClient):
     assert data["users"] >= 1
 
 
+def test_presence_opt_in(sio: socketio.SimpleClient):
+    """Проверка, что при подписке на онлайн сразу приходит текущее значение."""
+    sio.emit("presence_updates", {"enabled": False})
+    sio.emit("presence_updates", {"enabled": True})
+
+    for _ in range(10):
+        event, data = sio.receive()
+        if event == "message" and "online" in data:
+            break
+    else:
+        raise AssertionError("Не дождались {'online': N}")
+
+    assert data["online"] >= 1
+
+
 def test_create_product_valid(sio: socketio.SimpleClient):
     """Проверка успешного создания валидного продукта."""
     payload = {
@@ -104,3 +121,186 @@ def test_create_transfer_valid(sio: socketio.SimpleClient):
     assert transfer["ac_from"] == payload["ac_from"]
     assert transfer["ac_to"] == payload["ac_to"]
     assert transfer["amount"] == payload["amount"]
+
+
+def test_create_products_batch(sio: socketio.SimpleClient):
+    """Пакет: валидные продукты принимаются, ошибки приходят по индексам."""
+    payload = [
+        {"title": "Чай", "price": 120.0},
+        {"title": "", "price": -1.0},
+        {"title": "Кофе", "price": 450.0, "discount": 10.0},
+    ]
+
+    sio.emit("create_products", payload)
+    result = wait_event(sio, "products")
+
+    assert [p["title"] for p in result["items"]] == ["Чай", "Кофе"]
+    assert [e["index"] for e in result["errors"]] == [1]
+    locs = [e["loc"] for e in result["errors"][0]["errors"]]
+    assert ["title"] in locs and ["price"] in locs
+
+
+def test_ingest_ndjson_notifies_subscribers(sio: socketio.SimpleClient):
+    """Потоковая загрузка NDJSON: результаты по строкам + событие ingested."""
+    assert sio.call("subscribe_ingest", {"kind": "orders"}) is True
+
+    def body():
+        yield b'{"customer_name": "Ann", "customer_address": "Moscow", "total_price": 10}\n'
+        yield b'{"customer_name": "", "customer_address": "Moscow", "total_price": 10}\n'
+
+    resp = requests.post(f"{API_URL}/ingest/orders", params={"notify": "true"},
+                         data=body(), stream=True)
+    results = [json.loads(line) for line in resp.iter_lines() if line]
+
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    assert results[0]["line"] == 2
+    assert results[-1] == {"done": True, "lines": 2, "accepted": 1, "rejected": 1}
+    ingested = wait_event(sio, "ingested")
+    assert ingested["kind"] == "orders"
+    assert [o["customer_name"] for o in ingested["items"]] == ["Ann"]
+    assert sio.call("subscribe_ingest", {"kind": "orders", "enabled": False}) is False
+
+
+def test_batch_flood_is_rate_limited(sio: socketio.SimpleClient):
+    """Поток create_products сверх лимита получает rate_limited."""
+    for _ in range(10):
+        sio.emit("create_products", [])
+
+    limited = wait_event(sio, "rate_limited", max_steps=20)
+
+    assert limited["event"] == "create_products"
+    assert limited["retry_after"] > 0
+
+
+def test_resync_flood_is_rate_limited():
+    """Лимит действует на все события, не только на обёрнутые вручную: поток resync_rooms."""
+    # свой клиент: исчерпанная корзина не должна мешать остальным тестам
+    client = socketio.SimpleClient()
+    client.connect(API_URL, auth={"token": get_token("flood")})
+    try:
+        for _ in range(10):
+            client.emit("resync_rooms", {"since": 0})
+
+        limited = wait_event(client, "rate_limited", max_steps=30)
+
+        assert limited["event"] == "resync_rooms"
+    finally:
+        client.disconnect()
+
+
+def test_metrics_endpoint(sio: socketio.SimpleClient):
+    """Проверка, что /metrics отдаёт гистограммы обработчиков и счётчики кадров."""
+    sio.emit("get_users_online")
+    wait_event(sio, "users")
+
+    resp = requests.get(f"{API_URL}/metrics")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain")
+    assert 'sio_handler_seconds_count{event="get_users_online"}' in resp.text
+    assert 'sio_emitted_frames_total{event="users"}' in resp.text
+    assert "sio_connections " in resp.text
+
+
+def test_admin_profile_returns_collapsed_stacks():
+    """Проверка, что /admin/profile возвращает collapsed stacks цикла событий."""
+    resp = requests.get(f"{API_URL}/admin/profile", params={"seconds": 0.3, "interval": 0.002})
+    assert resp.status_code == 200
+    stack, count = resp.text.splitlines()[0].rsplit(" ", 1)
+    assert ";" in stack
+    assert int(count) > 0
+
+
+def test_admin_profile_single_run_at_a_time():
+    """Второй /admin/profile, пока идёт первый, получает 409."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    def run(seconds):
+        return requests.get(f"{API_URL}/admin/profile", params={"seconds": seconds})
+
+    with ThreadPoolExecutor(2) as pool:
+        first = pool.submit(run, 1.0)
+        time.sleep(0.3)
+        second = run(0.1)
+        assert second.status_code == 409
+        assert first.result().status_code == 200
+
+
+def test_admin_logging_level_and_sampling():
+    """PUT /admin/logging меняет уровень и сэмплирование, неизвестный уровень — 400."""
+    before = requests.get(f"{API_URL}/admin/logging").json()
+
+    resp = requests.put(f"{API_URL}/admin/logging",
+                        json={"level": "debug", "sample": {"message": 7}})
+    assert resp.status_code == 200
+    assert resp.json()["level"] == "DEBUG"
+    assert resp.json()["sample"]["message"] == 7
+    assert requests.put(f"{API_URL}/admin/logging", json={"level": "LOUD"}).status_code == 400
+
+    restored = requests.put(f"{API_URL}/admin/logging", json=before)
+    assert restored.json() == before
+
+
+def test_index_pages_and_etag(sio: socketio.SimpleClient):
+    """Проверка, что GET / отдаёт страницу клиентов с ETag, а повтор с If-None-Match — 304."""
+    resp = requests.get(f"{API_URL}/", params={"limit": 1})
+    assert resp.status_code == 200
+    assert len(json.loads(resp.text)) == 1
+    assert int(resp.headers["x-total-count"]) >= 1
+
+    again = requests.get(f"{API_URL}/", params={"limit": 1},
+                         headers={"If-None-Match": resp.headers["etag"]})
+    assert again.status_code == 304
+
+
+def test_test_page_compressed_and_cached():
+    """Проверка, что /test отдаётся сжатым, с ETag, а повтор с If-None-Match — 304."""
+    resp = requests.get(f"{API_URL}/test", headers={"Accept-Encoding": "gzip"})
+    assert resp.status_code == 200
+    assert resp.headers["content-encoding"] == "gzip"
+    assert "Socket.IO test" in resp.text
+
+    again = requests.get(f"{API_URL}/test", headers={"Accept-Encoding": "gzip",
+                                                     "If-None-Match": resp.headers["etag"]})
+    assert again.status_code == 304
+
+
+def test_healthz():
+    """Проверка лёгкого health-эндпоинта."""
+    resp = requests.get(f"{API_URL}/healthz")
+    assert resp.status_code == 200
+    assert resp.text == "ok"
+
+
+def test_profile_roundtrip_through_session(sio: socketio.SimpleClient):
+    """Проверка, что профиль из join читается через get_profile по sid."""
+    profile = {"name": "Alice", "surname": "Smith", "id": "123"}
+
+    sio.emit("join", profile)
+    sio.emit("get_profile", {"sid": sio.sid})
+    data = wait_event(sio, "profile")
+
+    assert data == profile
+
+
+def test_rooms_feed_snapshot_delta_resync(sio: socketio.SimpleClient):
+    """Проверка ленты комнат: снимок при подписке, дельта при join_room, resync."""
+    sio.emit("subscribe_rooms")
+    snapshot = wait_event(sio, "rooms_snapshot")
+
+    assert isinstance(snapshot["version"], int)
+    assert isinstance(snapshot["rooms"], dict)
+
+    sio.emit("join_room", {"room": "feed-test"})
+    delta = wait_event(sio, "room_delta")
+
+    assert delta["version"] > snapshot["version"]
+    assert any(
+        c["op"] == "add" and c["room"] == "feed-test" and c["sid"] == sio.sid
+        for c in delta["changes"]
+    )
+
+    sio.emit("resync_rooms", {"since": snapshot["version"]})
+    missed = wait_event(sio, "room_delta")
+
+    assert missed["changes"][0]["version"] == snapshot["version"] + 1
+    assert missed["changes"][-1]["version"] == missed["version"]
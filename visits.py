@@ -0,0 +1,60 @@
+# visits.py
+from typing import Awaitable, Callable
+
+from background import BackgroundTask, every
+
+
+class VisitAggregator(BackgroundTask):
+    """
+    Заходы на HTTP-страницу, разосланные пачкой.
+
+    hit() только увеличивает счётчик; фоновая задача раз в interval
+    секунд публикует число заходов за интервал одним событием — и только
+    если они были. Сколько бы раз ни дёрнули страницу, сокетам уходит не
+    больше одной рассылки за интервал.
+
+    shared — общий счётчик нескольких воркеров: прибавляет заходы воркера
+    и возвращает сумму по всем. С ним публикуется прирост суммы с прошлого
+    тика, поэтому каждый воркер может рассылать только своим клиентам.
+    """
+
+    def __init__(
+        self,
+        publish: Callable[[int, float], Awaitable[None]],
+        interval: float = 5.0,
+        shared: Callable[[int], Awaitable[int]] | None = None,
+    ):
+        self._publish = publish
+        self.interval = interval
+        self.shared = shared
+        self._seen: int | None = None
+        self.pending = 0
+        self.total = 0
+        self.published = 0
+
+    def hit(self) -> None:
+        self.pending += 1
+        self.total += 1
+
+    async def flush(self) -> bool:
+        count, self.pending = self.pending, 0
+        if self.shared is not None:
+            count = await self._shared_delta(count)
+        if not count:
+            return False
+        self.published += 1
+        await self._publish(count, self.interval)
+        return True
+
+    async def _shared_delta(self, count: int) -> int:
+        # без отметки с запуска run() берём только свои заходы
+        total = await self.shared(count)
+        delta = count if self._seen is None else max(0, total - self._seen)
+        self._seen = total
+        return delta
+
+    async def run(self) -> None:
+        if self.shared is not None:
+            # чужие заходы до нашего старта не считаем
+            self._seen = await self.shared(0)
+        await every(self.interval, self.flush, "Не удалось разослать число заходов")
@@ -0,0 +1,199 @@
+# wire.py
+"""
+Формат пакетов Socket.IO на проводе: JSON (текст) или MessagePack (бинарный).
+
+WIRE_FORMAT выбирает режим для всего развёртывания:
+  json      — стандартный сервер python-socketio (по умолчанию);
+  msgpack   — все клиенты обязаны использовать msgpack-парсер;
+  negotiate — формат выбирает каждый клиент: ?wire=msgpack в URL
+              подключения включает MessagePack, без параметра — JSON,
+              так что существующие клиенты продолжают работать.
+
+Клиент на python-socketio:
+    socketio.AsyncClient(serializer="msgpack").connect("http://host:8000?wire=msgpack")
+"""
+import os
+import weakref
+from urllib.parse import parse_qs
+
+import socketio
+from engineio import packet as eio_packet
+from socketio import packet
+from socketio.msgpack_packet import MsgPackPacket
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - режим negotiate/msgpack недоступен
+    msgpack = None
+
+WIRE_QUERY_PARAM = "wire"
+MSGPACK = "msgpack"
+
+# в MessagePack бинарные данные передаются внутри пакета, без вложений
+_PLAIN_TYPES = {packet.BINARY_EVENT: packet.EVENT, packet.BINARY_ACK: packet.ACK}
+
+
+class _EncodedText(str):
+    """JSON-текст пакета, который помнит исходный пакет (для перекодирования)."""
+
+
+class _EncodedBytes(bytes):
+    """MessagePack-кадр, который помнит исходный пакет (имя события без разбора)."""
+
+
+def _tagged(encoded, pkt: packet.Packet):
+    encoded = (_EncodedText if isinstance(encoded, str) else _EncodedBytes)(encoded)
+    encoded.packet = pkt
+    return encoded
+
+
+def encode_msgpack(pkt: packet.Packet) -> bytes:
+    """
+    Закодировать пакет Socket.IO в MessagePack (как socketio.msgpack_packet).
+    """
+    data = {
+        "type": _PLAIN_TYPES.get(pkt.packet_type, pkt.packet_type),
+        "data": pkt.data,
+        "nsp": pkt.namespace or "/",
+    }
+    if pkt.id is not None:
+        data["id"] = pkt.id
+    return _tagged(msgpack.dumps(data), pkt)
+
+
+class TaggedMsgPackPacket(MsgPackPacket):
+    """
+    MsgPackPacket для WIRE_FORMAT=msgpack: кадр помечен исходным пакетом,
+    как и в negotiate, чтобы метрики и очереди не декодировали его обратно.
+    """
+
+    def encode(self):
+        return _tagged(super().encode(), self)
+
+
+class HybridPacket(packet.Packet):
+    """
+    Пакет, который принимает оба формата: текстовый кадр — JSON,
+    бинарный кадр без ожидаемых вложений — MessagePack.
+
+    encode() возвращает обычный JSON, но помеченный исходным пакетом,
+    чтобы сервер мог один раз перекодировать его для msgpack-клиентов.
+    """
+
+    def encode(self):
+        encoded = super().encode()
+        if isinstance(encoded, list):
+            encoded[0] = _tagged(encoded[0], self)
+            return encoded
+        return _tagged(encoded, self)
+
+    def decode(self, encoded_packet):
+        if isinstance(encoded_packet, (bytes, bytearray)):
+            return MsgPackPacket.decode(self, encoded_packet)
+        return super().decode(encoded_packet)
+
+
+def text_event_name(data: str) -> str | None:
+    """
+    Имя события из JSON-кадра без разбора всего пакета: 2/ns,12["name",...].
+    """
+    start = data.find('["')
+    if start < 0:
+        return None
+    end = data.find('"', start + 2)
+    return data[start + 2:end] if end > 0 else None
+
+
+def requested_format(environ: dict) -> str:
+    query = parse_qs(environ.get("QUERY_STRING", ""))
+    return (query.get(WIRE_QUERY_PARAM) or ["json"])[0].lower()
+
+
+class NegotiatingServer(socketio.AsyncServer):
+    """
+    AsyncServer, который держит формат каждого клиента (по eio_sid).
+
+    Рассылки менеджера кодируются в JSON один раз, как обычно; для
+    msgpack-клиентов тот же пакет перекодируется тоже один раз на emit
+    (кэш по объекту engine.io-пакета), а не на каждого получателя.
+    Работает с любым client_manager, включая pub/sub.
+    """
+
+    def __init__(self, *args, **kwargs):
+        if msgpack is None:
+            raise RuntimeError("WIRE_FORMAT=negotiate требует пакет msgpack")
+        kwargs["serializer"] = HybridPacket
+        super().__init__(*args, **kwargs)
+        self.msgpack_sids: set[str] = set()
+        self._msgpack_packets: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+    async def _handle_eio_connect(self, eio_sid, environ):
+        if requested_format(environ) == MSGPACK:
+            self.msgpack_sids.add(eio_sid)
+        return await super()._handle_eio_connect(eio_sid, environ)
+
+    async def _handle_eio_disconnect(self, eio_sid, reason):
+        try:
+            await super()._handle_eio_disconnect(eio_sid, reason)
+        finally:
+            self.msgpack_sids.discard(eio_sid)
+
+    async def _send_packet(self, eio_sid, pkt):
+        if eio_sid in self.msgpack_sids:
+            await self.eio.send(eio_sid, encode_msgpack(pkt))
+            return
+        await super()._send_packet(eio_sid, pkt)
+
+    async def _send_eio_packet(self, eio_sid, eio_pkt):
+        if eio_sid in self.msgpack_sids:
+            if eio_pkt.binary:
+                return  # вложение JSON-пакета: в MessagePack оно уже внутри
+            source = getattr(eio_pkt.data, "packet", None)
+            if source is not None:
+                eio_pkt = self._as_msgpack(eio_pkt, source)
+        await super()._send_eio_packet(eio_sid, eio_pkt)
+
+    def _as_msgpack(self, eio_pkt, source: packet.Packet):
+        converted = self._msgpack_packets.get(eio_pkt)
+        if converted is None:
+            converted = eio_packet.Packet(eio_packet.MESSAGE, encode_msgpack(source))
+            self._msgpack_packets[eio_pkt] = converted
+        return converted
+
+
+def encode_event(sio: socketio.AsyncServer, event: str, data,
+                 namespace: str = "/") -> list[eio_packet.Packet]:
+    """
+    Закодировать событие один раз, чтобы слать его многим или многократно
+    (как рассылка менеджера): пакет сервера, значит, формат любой из трёх.
+    """
+    encoded = sio.packet_class(packet.EVENT, namespace=namespace, data=[event, data]).encode()
+    if not isinstance(encoded, list):
+        encoded = [encoded]
+    return [eio_packet.Packet(eio_packet.MESSAGE, part) for part in encoded]
+
+
+async def send_encoded(sio: socketio.AsyncServer, sid: str, eio_pkts: list[eio_packet.Packet],
+                       namespace: str = "/") -> None:
+    """
+    Отправить заранее закодированное событие (encode_event) клиенту sid.
+    """
+    eio_sid = sio.manager.eio_sid_from_sid(sid, namespace)
+    if eio_sid is None:
+        return
+    for pkt in eio_pkts:
+        await sio._send_eio_packet(eio_sid, pkt)
+
+
+def create_server(mode: str | None = None, **kwargs) -> socketio.AsyncServer:
+    """
+    AsyncServer с форматом из WIRE_FORMAT (json | msgpack | negotiate).
+    """
+    mode = (mode or os.environ.get("WIRE_FORMAT", "json")).lower()
+    if mode == "json":
+        return socketio.AsyncServer(**kwargs)
+    if mode == MSGPACK:
+        return socketio.AsyncServer(serializer=TaggedMsgPackPacket, **kwargs)
+    if mode == "negotiate":
+        return NegotiatingServer(**kwargs)
+    raise ValueError(f"Неизвестный WIRE_FORMAT: {mode!r}")